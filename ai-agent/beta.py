@@ -2,8 +2,12 @@ import subprocess
 import os
 import re
 import webbrowser
-import ollama
 import sys
+from pathlib import Path
+
+# Ollama calls go through the shared LLM gateway in ../ai
+sys.path.append(str(Path(__file__).resolve().parent.parent / "ai"))
+from llm_gateway import get_gateway
 
 class CommandProcessor:
     def __init__(self, model_name="phi"):
@@ -90,9 +94,8 @@ class CommandProcessor:
     def generate_code(self, prompt):
         """Generate code using the Ollama Phi model"""
         try:
-            response = ollama.generate(model=self.model, prompt=prompt)
             # Extract code from response - may need adjustment based on Phi's output format
-            code = response['response']
+            code = get_gateway().ollama_generate(self.model, prompt)
             # Clean up code (remove markdown code blocks if present)
             code = re.sub(r'```(?:html|css|javascript|js)?(.*?)```', r'\1', code, flags=re.DOTALL)
             return code.strip()
@@ -114,7 +117,6 @@ class ChatBot:
         
         # If not a command, pass to the LLM for a response
         try:
-            response = ollama.generate(model=self.model, prompt=user_input)
-            return response['response']
+            return get_gateway().ollama_generate(self.model, user_input)
         except Exception as e:
             return f"Error: {e}"
\ No newline at end of file
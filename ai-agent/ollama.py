@@ -1,17 +1,17 @@
+import sys
+from pathlib import Path
+
 import requests
 
+# Requests go through the shared LLM gateway in ../ai (pooled connections, timeouts)
+sys.path.append(str(Path(__file__).resolve().parent.parent / "ai"))
+from llm_gateway import get_gateway
+
 def get_ai_response(user_text):
     try:
-        url = "http://localhost:11434/api/generate"
-        payload = {
-            "model": "phi",  # change to your model name
-            "prompt": user_text,
-            "stream": False
-        }
-        response = requests.post(url, json=payload)
-        if response.status_code == 200:
-            return response.json().get('response', '[No response]')
-        else:
-            return f"[Error {response.status_code}]: {response.text}"
+        model = "phi"  # change to your model name
+        return get_gateway().ollama_generate(model, user_text) or '[No response]'
+    except requests.HTTPError as e:
+        return f"[Error {e.response.status_code}]: {e.response.text}"
     except Exception as e:
         return f"[Ollama Error]: {e}"
@@ -1,58 +1,124 @@
 # ai_core.py
+import asyncio
 import os
-import re
-import json
-from typing import Dict, Any, List
+import time
+from typing import Dict, Any, List, Optional
 
 import google.generativeai as genai
 from config import Config
 from security import SecurityValidator
+from intent_matcher import IntentMatcher, IntentRule
+from analysis_cache import AnalysisCache, refers_to_context
+from intent_classifier import IntentClassifier
+from analysis_router import CascadingRouter
+from batch_analysis import BATCH_REPLY_FORMAT, chunked, format_command_list, parse_batch_response
+from prompt_compiler import PromptTemplate, TokenLedger
+from analysis_schema import build_analysis_schema, structured_generation_config, read_streamed_analysis
+from llm_gateway import get_gateway
 from logger import log_info, log_error, log_warning
 
-class AI_Core:
-    """Handles AI-powered content generation and command analysis."""
-    
-    def __init__(self, api_key: str):
-        self.gemini_client = None
-        if api_key:
-            try:
-                genai.configure(api_key=api_key)
-                self.gemini_client = genai.GenerativeModel('gemini-1.5-flash-latest')
-                log_info("Google Gemini AI initialized successfully.")
-            except Exception as e:
-                log_error(f"Failed to initialize Gemini AI: {e}")
-        else:
-            log_warning("Gemini AI not initialized: API key is missing.")
+CREATE_WORDS = ("create", "make", "generate", "write")
+FILE_TYPE_WORDS = ("word", "doc", "document", "excel", "spreadsheet", "pdf", "python", "script", "text", "file", "a", "an")
+TOPIC_MARKERS = ("about", "regarding", "on", "for")
+DOCUMENT_WORDS = ("document", "documents", "doc", "docs", "file", "files", "notes", "report", "spreadsheet", "pdf")
+CONTENT_MARKERS = ("about", "mentioning", "mentions", "mention", "containing", "contains", "regarding")
+# Whole commands that ask for help ("help", "what can you do"), not sentences that merely contain "help"
+HELP_PHRASES = ("help", "help me", "show help", "what can you do", "what can you do for me", "what can you help with",
+                "what can you help me with", "commands", "show commands", "list commands", "what are your commands")
+# Imperative openers for the clipboard and status rules ("read my clipboard", not "what is a clipboard")
+READ_CLIPBOARD_OPENERS = ("read", "show", "paste", "check", "get", "what's in", "whats in", "what is in",
+                          "what's on", "whats on", "what is on")
+STATUS_SUBJECTS = ("cpu", "processor", "memory", "ram")
+STATUS_OPENERS = ("check", "show", "monitor", "what's my", "whats my", "what is my")
+STATUS_WORDS = ("usage", "utilization", "load", "status", "used", "free", "available")
 
-    # Note: LRU cache is removed because the 'history' list is unhashable.
-    def analyze_command(self, command: str, history: List[Dict[str, str]]) -> Dict[str, Any]:
-        """
-        Analyzes the user command using AI to determine intent, action, and parameters,
-        taking into account the conversation history for context.
-        """
-        if not self.gemini_client:
-            log_warning("AI analysis skipped: Gemini client not available.")
-            return self._analyze_with_rules(command)
 
-        # Format the history for the prompt
-        formatted_history = "\n".join([f"{msg['role'].capitalize()}: {msg['content']}" for msg in history])
+def _content_topic(match):
+    topic = match.after(TOPIC_MARKERS, whole_words=True)
+    return {"content_topic": topic or match.without(CREATE_WORDS + FILE_TYPE_WORDS)}
 
-        # NEW: Expanded prompt with all new actions and context memory
-        prompt = f"""
-        You are the core logic of the JARVIS AI assistant. Analyze the user's command in the context of the conversation history.
 
-        CONVERSATION HISTORY:
-        {formatted_history}
-        
-        LATEST USER COMMAND: "{command}"
+def _content_query(match):
+    query = match.after(CONTENT_MARKERS, whole_words=True).rstrip("?. ")
+    return {"query": query} if query else None
+
+
+def _quoted_or_after(match, keywords):
+    for quote in ("'", '"'):
+        start = match.command.find(quote)
+        end = match.command.find(quote, start + 1)
+        if start != -1 and end != -1:
+            return match.command[start + 1:end]
+    return match.after(keywords).replace("to clipboard", "").replace("to my clipboard", "").strip()
+
+
+def _status_type(match):
+    return {"status_type": "cpu" if match.has_any(("cpu", "processor")) else "memory"}
+
+
+CREATION_SLOTS = TOPIC_MARKERS + FILE_TYPE_WORDS
+
+# Built once at import; every rule-based analysis is a single automaton pass.
+RULE_MATCHER = IntentMatcher([
+    IntentRule("help", "show_help", [HELP_PHRASES], confidence=0.95, whole_command=True),
+    IntentRule("file_management", "search_content", [("find", "locate", "search", "which", "show"), DOCUMENT_WORDS,
+                                                     CONTENT_MARKERS], confidence=0.9, whole_words=True,
+               build=_content_query),
+    IntentRule("file_management", "list_files", [("list files", "show files", "list my files")], confidence=0.95),
+    IntentRule("file_creation", "create_word", [CREATE_WORDS, ("word", ".docx", "doc")], build=_content_topic,
+               slot_words=CREATION_SLOTS),
+    IntentRule("file_creation", "create_excel", [CREATE_WORDS, ("excel", ".xlsx", "spreadsheet")], build=_content_topic,
+               slot_words=CREATION_SLOTS),
+    IntentRule("file_creation", "create_pdf", [CREATE_WORDS, ("pdf",)], build=_content_topic,
+               slot_words=CREATION_SLOTS),
+    IntentRule("file_creation", "create_python", [CREATE_WORDS, ("python", ".py", "script")], build=_content_topic,
+               slot_words=CREATION_SLOTS),
+    IntentRule("file_creation", "create_text", [CREATE_WORDS], confidence=0.6, build=_content_topic,
+               slot_words=CREATION_SLOTS),
+    IntentRule("file_management", "find_file", [("find", "locate")], confidence=0.85, whole_words=True,
+               build=lambda m: {"query": m.without(("find", "locate", "file", "files", "my"))},
+               slot_words=("file", "files", "my")),
+    IntentRule("file_management", "delete_file", [("delete", "remove")], confidence=0.85, whole_words=True,
+               build=lambda m: {"query": m.without(("delete", "remove", "file", "the", "my"))},
+               slot_words=("file", "the", "my")),
+    IntentRule("system_control", "take_screenshot", [("screenshot", "screen shot")], confidence=0.95),
+    IntentRule("clipboard_management", "write_clipboard", [("copy",), ("clipboard",)], confidence=0.9,
+               whole_words=True, anchored=True, build=lambda m: {"text": _quoted_or_after(m, ("copy",))}),
+    IntentRule("clipboard_management", "read_clipboard", [READ_CLIPBOARD_OPENERS, ("clipboard",)], confidence=0.9,
+               whole_words=True, anchored=True),
+    IntentRule("system_control", "get_system_status", [STATUS_OPENERS, STATUS_SUBJECTS], confidence=0.9,
+               whole_words=True, anchored=True, build=_status_type),
+    # A usage word without those openers ("how much ram is free"): below the bar, so the classifier or LLM confirms it
+    IntentRule("system_control", "get_system_status", [STATUS_SUBJECTS, STATUS_WORDS], confidence=0.8,
+               whole_words=True, build=_status_type),
+    IntentRule("weather_inquiry", "get_weather", [("weather",)], confidence=0.85,
+               build=lambda m: {"city": m.after((" in ",)).rstrip("?. ")}, slot_words=(" in ",)),
+    IntentRule("system_control", "open_application", [("open", "launch", "start")], confidence=0.85, whole_words=True,
+               build=lambda m: {"application_name": m.without(("open", "launch", "start"))}),
+    IntentRule("web_browse", "web_search", [("search", "google", "browse")], confidence=0.85, whole_words=True,
+               build=lambda m: {"query": m.without(("search for", "search", "google", "browse", "the web"))},
+               slot_words=("search for", "the web")),
+    IntentRule("knowledge_inquiry", "get_summary", [("tell me about", "who is", "who was", "what is")], confidence=0.7,
+               build=lambda m: {"topic": m.after(("tell me about", "who is", "who was", "what is")).rstrip("?. ")}),
+])
+
+# Intents the analysis prompt offers on top of Config.VALID_INTENTS
+EXTRA_INTENTS = ["knowledge_inquiry", "system_status", "clipboard_management", "weather_inquiry"]
+# Parameter names the JarvisCore handlers read
+ANALYSIS_PARAMETERS = ["content_topic", "query", "application_name", "status_type", "city", "topic", "text"]
+# Bump when the actions or parameters above change, so cached analyses in the old shape are dropped
+ANALYSIS_CACHE_SCHEMA = "ai_core/1"
 
+# Shared by the single-command and batch analysis prompts
+ANALYSIS_GUIDE = f"""
         First, determine if the command is a task or a general conversation/question.
 
         1. If it's a task, identify the 'intent' and 'action'.
-           - Valid Intents: {', '.join(Config.VALID_INTENTS)}, knowledge_inquiry, system_status, clipboard_management, weather_inquiry
+           - Valid Intents: {', '.join(Config.VALID_INTENTS + EXTRA_INTENTS)}
            - Action mapping examples:
              - "create word doc" -> intent: 'file_creation', action: 'create_word'
              - "list files" -> intent: 'file_management', action: 'list_files'
+             - "find the document about solar panels" -> intent: 'file_management', action: 'search_content', parameters: {{"query": "solar panels"}}
              - "open chrome" -> intent: 'system_control', action: 'open_application'
              - "search for AI" -> intent: 'web_browse', action: 'web_search'
              - "what is the weather in Paris" -> intent: 'weather_inquiry', action: 'get_weather', parameters: {{"city": "Paris"}}
@@ -69,14 +135,188 @@ class AI_Core:
            - Set 'intent' to 'conversation'.
            - Set 'action' to 'chat'.
            - Generate a helpful answer in the 'response' field, using the history for context.
+"""
+
+# Structured output: replies are constrained to these intents, actions and parameters
+SCHEMA_VOCABULARY = (
+    Config.VALID_INTENTS + EXTRA_INTENTS,
+    [rule.action for rule in RULE_MATCHER.rules] + ["chat"],
+    dict.fromkeys(ANALYSIS_PARAMETERS, "STRING"),
+)
+ANALYSIS_SCHEMA = build_analysis_schema(*SCHEMA_VOCABULARY, with_response=True)
+BATCH_ANALYSIS_SCHEMA = build_analysis_schema(*SCHEMA_VOCABULARY, with_response=True, batch=True)
+
+# Static parts are formatted once and sent as the system instruction; only history and commands vary per call
+ANALYSIS_PROMPT = PromptTemplate(
+    "analysis",
+    system=[
+        "You are the core logic of the JARVIS AI assistant. Analyze the user's command in the context of the conversation history.",
+        ANALYSIS_GUIDE,
+        "**IMPORTANT**: Respond with ONLY a single, valid JSON object and nothing else.",
+    ],
+    user="""
+        CONVERSATION HISTORY:
+        {history}
+
+        LATEST USER COMMAND: "{command}"
+    """,
+)
+
+BATCH_ANALYSIS_PROMPT = PromptTemplate(
+    "batch_analysis",
+    system=[
+        "You are the core logic of the JARVIS AI assistant. Analyze each of the user's commands independently, in the context of the conversation history.",
+        ANALYSIS_GUIDE,
+        f"**IMPORTANT**: {BATCH_REPLY_FORMAT}",
+    ],
+    user="""
+        CONVERSATION HISTORY:
+        {history}
+
+        USER COMMANDS:
+        {commands}
+    """,
+)
+
+
+def _format_history(history: List[Dict[str, str]]) -> str:
+    return "\n".join([f"{msg['role'].capitalize()}: {msg['content']}" for msg in history])
 
-        **IMPORTANT**: Respond with ONLY a single, valid JSON object and nothing else.
+class AI_Core:
+    """Handles AI-powered content generation and command analysis."""
+    
+    def __init__(self, api_key: str):
+        self.gemini_client = None
+        self.analysis_model = None
+        self.batch_analysis_model = None
+        self.token_ledger = TokenLedger()
+        self.gateway = get_gateway()
+        self.analysis_cache = AnalysisCache(
+            Config.WORKSPACE_DIR / Config.ANALYSIS_CACHE_FILE,
+            max_entries=Config.ANALYSIS_CACHE_MAX_ENTRIES,
+            ttl_seconds=Config.ANALYSIS_CACHE_TTL_SECONDS,
+            schema=ANALYSIS_CACHE_SCHEMA,
+        )
+        self.intent_classifier = IntentClassifier.load(Config.WORKSPACE_DIR / Config.INTENT_MODEL_FILE)
+        self.router = CascadingRouter(
+            [
+                ("rules", self._analyze_with_fast_rules, Config.RULE_CONFIDENCE_BAR),
+                ("local", self._analyze_locally, Config.LOCAL_CLASSIFIER_THRESHOLD),
+            ],
+            self._analyze_with_ai,
+            speculative=Config.SPECULATIVE_ANALYSIS,
+            speculate_after_ms=Config.SPECULATE_AFTER_MS,
+        )
+        if api_key:
+            try:
+                genai.configure(api_key=api_key)
+                self.gemini_client = genai.GenerativeModel(Config.GEMINI_MODEL)
+                self.analysis_model = self._analysis_model(ANALYSIS_PROMPT, ANALYSIS_SCHEMA)
+                self.batch_analysis_model = self._analysis_model(BATCH_ANALYSIS_PROMPT, BATCH_ANALYSIS_SCHEMA)
+                log_info("Google Gemini AI initialized successfully.")
+            except Exception as e:
+                log_error(f"Failed to initialize Gemini AI: {e}")
+        else:
+            log_warning("Gemini AI not initialized: API key is missing.")
+
+    @staticmethod
+    def _analysis_model(template: PromptTemplate, schema: Dict[str, Any]):
+        generation_config = structured_generation_config(schema) if Config.STRUCTURED_OUTPUT else None
+        return genai.GenerativeModel(Config.GEMINI_MODEL, system_instruction=template.system,
+                                     generation_config=generation_config)
+
+    def analyze_command(self, command: str, history: List[Dict[str, str]]) -> Dict[str, Any]:
+        """
+        Analyzes the user command using AI to determine intent, action, and parameters,
+        taking into account the conversation history for context.
+        Results are cached on the normalized command plus a digest of the recent history.
+        The rules and the local classifier answer first; Gemini is called when
+        neither is confident, or starts early if they are still running after
+        Config.SPECULATE_AFTER_MS.
+        """
+        if not self.gemini_client:
+            log_warning("AI analysis skipped: Gemini client not available.")
+            return self._analyze_with_rules(command)
+
+        cached = self.analysis_cache.get(command, history)
+        if cached is not None:
+            log_info(f"Analysis cache hit for '{command}' ({self.analysis_cache.stats()['hit_rate']:.0%} hit rate).")
+            return cached
+
+        return self.router.route(command, history)
+
+    async def analyze_command_async(self, command: str, history: List[Dict[str, str]]) -> Dict[str, Any]:
+        """Async variant of analyze_command; the blocking SDK calls run on a worker thread."""
+        return await asyncio.to_thread(self.analyze_command, command, list(history))
+
+    def analyze_many(self, commands: List[str], history: Optional[List[Dict[str, str]]] = None,
+                     batch_size: int = Config.ANALYSIS_BATCH_SIZE) -> List[Dict[str, Any]]:
+        """
+        Analyzes a list of commands (e.g. a replayed script) with one Gemini call
+        per batch instead of one per command. Results are returned in input order;
+        commands the batch reply does not answer fall back to the rules.
         """
-        
+        history = history or []
+        if not self.gemini_client:
+            return [self._analyze_with_rules(command) for command in commands]
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(commands)
+        pending = []
+        for i, command in enumerate(commands):
+            results[i] = self.analysis_cache.get(command, history) or self.router.try_local(command)
+            if results[i] is None:
+                pending.append(i)
+
+        formatted_history = _format_history(history)
+        training_log = Config.WORKSPACE_DIR / Config.INTENT_TRAINING_LOG
+        calls = 0
+        for batch in chunked(pending, batch_size):
+            calls += 1
+            request = BATCH_ANALYSIS_PROMPT.render(
+                history=formatted_history, commands=format_command_list([commands[i] for i in batch])
+            )
+            try:
+                started_at = time.perf_counter()
+                response = self.gateway.gemini(self.batch_analysis_model, request, Config.GEMINI_MODEL)
+                self.token_ledger.record(BATCH_ANALYSIS_PROMPT.name, BATCH_ANALYSIS_PROMPT.system + request,
+                                         response, started_at)
+                parsed = parse_batch_response(response.text, len(batch))
+            except Exception as e:
+                log_error(f"Batch command analysis failed: {e}. Falling back to rule-based analysis.")
+                parsed = [None] * len(batch)
+
+            for i, analysis in zip(batch, parsed):
+                if analysis is None:
+                    results[i] = self._analyze_with_rules(commands[i])
+                    continue
+                self.analysis_cache.put(commands[i], analysis, history, persist=False)
+                IntentClassifier.log_example(training_log, commands[i], analysis)
+                results[i] = analysis
+
+        if pending:
+            self.analysis_cache.save()
+        log_info(f"Analyzed {len(commands)} commands with {calls} Gemini call(s).")
+        return results
+
+    def _analyze_locally(self, command: str) -> Optional[Dict[str, Any]]:
+        analysis = self.intent_classifier.analyze(command, RULE_MATCHER)
+        if analysis is not None:
+            analysis["response"] = None
+        return analysis
+
+    def _analyze_with_ai(self, command: str, history: List[Dict[str, str]]) -> Dict[str, Any]:
+        request = ANALYSIS_PROMPT.render(history=_format_history(history), command=command)
         try:
-            response = self.gemini_client.generate_content(prompt)
-            json_text = re.search(r'\{.*\}', response.text, re.DOTALL).group(0)
-            analysis = json.loads(json_text)
+            started_at = time.perf_counter()
+            response = self.gateway.gemini(self.analysis_model, request, Config.GEMINI_MODEL, stream=True)
+            # Tasks are returned as soon as intent/action/parameters arrive; chat needs the full response
+            analysis = read_streamed_analysis(response, lambda members: members["intent"] != "conversation")
+            self.token_ledger.record(ANALYSIS_PROMPT.name, ANALYSIS_PROMPT.system + request, response, started_at)
+            if not analysis or not analysis.get("intent"):
+                raise ValueError("reply contained no analysis object")
+            analysis.setdefault("response", None)
+            self.analysis_cache.put(command, analysis, history)
+            IntentClassifier.log_example(Config.WORKSPACE_DIR / Config.INTENT_TRAINING_LOG, command, analysis)
             return analysis
         except Exception as e:
             log_error(f"AI command analysis failed: {e}. Falling back to rule-based analysis.")
@@ -95,7 +335,7 @@ class AI_Core:
         }
         prompt = content_prompts.get(file_type, content_prompts['text'])
         try:
-            response = self.gemini_client.generate_content(prompt)
+            response = self.gateway.gemini(self.gemini_client, prompt, Config.GEMINI_MODEL)
             content = response.text.strip()
             if file_type == 'code' and content.startswith('```python'):
                 content = content[9:].replace('```', '').strip()
@@ -104,13 +344,18 @@ class AI_Core:
             log_error(f"AI content generation failed: {e}")
             return f"This is a placeholder {file_type} file about {topic}."
 
+    async def generate_file_content_async(self, topic: str, file_type: str) -> str:
+        return await asyncio.to_thread(self.generate_file_content, topic, file_type)
+
+    def _analyze_with_fast_rules(self, command: str) -> Optional[Dict[str, Any]]:
+        # Commands that lean on the conversation ("open it again") go to Gemini with the history
+        if refers_to_context(command):
+            return None
+        return self._analyze_with_rules(command)
+
     def _analyze_with_rules(self, command: str) -> Dict[str, Any]:
-        # This method remains the same
-        cmd = command.lower().strip()
-        if "create" in cmd or "make" in cmd:
-            return {"intent": "file_creation", "action": "create_text", "parameters": {"content_topic": cmd.replace("create", "").strip()}, "response": None}
-        if "list files" in cmd:
-            return {"intent": "file_management", "action": "list_files", "parameters": {}, "response": None}
-        if "help" in cmd:
-             return {"intent": "help", "action": "show_help", "parameters": {}, "response": None}
-        return {"intent": "conversation", "action": "chat", "parameters": {}, "response": "I'm having trouble connecting to my advanced reasoning circuits. Can you please rephrase?"}
\ No newline at end of file
+        analysis = RULE_MATCHER.match(command)
+        if analysis is None:
+            return {"intent": "conversation", "action": "chat", "parameters": {}, "response": "I'm having trouble connecting to my advanced reasoning circuits. Can you please rephrase?", "confidence": 0.3}
+        analysis["response"] = None
+        return analysis
@@ -0,0 +1,152 @@
+# analysis_cache.py
+import copy
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from logger import log_info, log_warning
+
+# Words that make a command depend on what was said before ("open it again")
+REFERENCE_WORDS = {"it", "that", "this", "them", "those", "again", "same", "previous", "last", "one"}
+# Openers that continue the previous request ("and in London?", "what about tomorrow")
+FOLLOW_UP_OPENERS = ("and ", "also ", "what about ", "how about ")
+
+
+def refers_to_context(command: str) -> bool:
+    """True when the command can only be understood with the conversation before it."""
+    normalized = AnalysisCache.normalize(command)
+    return normalized.startswith(FOLLOW_UP_OPENERS) or not REFERENCE_WORDS.isdisjoint(re.findall(r"[a-z']+", normalized))
+
+
+class AnalysisCache:
+    """
+    TTL + LRU cache for command analysis results, persisted to a JSON file.
+
+    Task analyses for self-contained commands ("list files", "open chrome") are
+    stored under the normalized command alone, so they hit regardless of the
+    conversation. Conversational answers and commands that refer back to the
+    conversation are keyed on the command plus a digest of the recent history.
+    `schema` names the analyzer and its parameter schema ("ai4/1"); a file
+    written under another schema is ignored instead of replaying parameters
+    this analyzer's handlers don't understand.
+    """
+
+    def __init__(self, cache_file: Path, max_entries: int = 256, ttl_seconds: float = 24 * 3600,
+                 context_messages: int = 2, schema: str = ""):
+        self.cache_file = Path(cache_file)
+        self.schema = schema
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.context_messages = context_messages
+        self.entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def normalize(command: str) -> str:
+        """Lowercases, collapses whitespace and drops trailing punctuation."""
+        return re.sub(r"\s+", " ", command.lower()).strip().rstrip(".!?")
+
+    def context_digest(self, history: Optional[List[Dict[str, str]]]) -> str:
+        recent = (history or [])[-self.context_messages:] if self.context_messages else []
+        payload = json.dumps([[m.get("role"), m.get("content")] for m in recent], ensure_ascii=False)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+    def _keys(self, command: str, history: Optional[List[Dict[str, str]]]):
+        normalized = self.normalize(command)
+        return normalized, f"{normalized}#{self.context_digest(history)}"
+
+    @staticmethod
+    def _is_context_free(normalized: str, analysis: Dict[str, Any]) -> bool:
+        if analysis.get("response") or analysis.get("intent") == "conversation":
+            return False
+        return not refers_to_context(normalized)
+
+    def get(self, command: str, history: Optional[List[Dict[str, str]]] = None) -> Optional[Dict[str, Any]]:
+        """Returns a copy of the cached analysis, or None on a miss."""
+        plain_key, context_key = self._keys(command, history)
+        now = time.time()
+        with self._lock:
+            for key in (plain_key, context_key):
+                entry = self.entries.get(key)
+                if entry is None:
+                    continue
+                if now - entry["stored_at"] > self.ttl_seconds:
+                    del self.entries[key]
+                    continue
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(entry["analysis"])
+            self.misses += 1
+            return None
+
+    def put(self, command: str, analysis: Dict[str, Any], history: Optional[List[Dict[str, str]]] = None,
+            persist: bool = True):
+        """Stores an analysis; batch callers pass persist=False and call save() once at the end."""
+        plain_key, context_key = self._keys(command, history)
+        key = plain_key if self._is_context_free(plain_key, analysis) else context_key
+        with self._lock:
+            self.entries[key] = {"analysis": copy.deepcopy(analysis), "stored_at": time.time()}
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+        if persist:
+            self.save()
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+        self.save()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+    def _load(self):
+        try:
+            if not self.cache_file.exists():
+                return
+            data = json.loads(self.cache_file.read_text(encoding="utf-8"))
+            if data.get("schema", "") != self.schema:
+                log_info(f"Ignoring analysis cache written for schema '{data.get('schema', '')}'.")
+                return
+            now = time.time()
+            # Stored oldest-first, so insertion order restores the LRU order
+            for key, entry in data.get("entries", []):
+                if now - entry.get("stored_at", 0) <= self.ttl_seconds:
+                    self.entries[key] = entry
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            log_info(f"Loaded {len(self.entries)} cached command analyses.")
+        except Exception as e:
+            log_warning(f"Could not load analysis cache, starting empty: {e}")
+            self.entries.clear()
+
+    def save(self):
+        """Writes the cache atomically so a crash never leaves a half-written file."""
+        try:
+            with self._save_lock:
+                with self._lock:
+                    payload = {"version": 1, "schema": self.schema, "entries": list(self.entries.items())}
+                self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+                tmp_file = self.cache_file.with_suffix(self.cache_file.suffix + ".tmp")
+                tmp_file.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+                tmp_file.replace(self.cache_file)
+        except Exception as e:
+            log_warning(f"Could not persist analysis cache: {e}")
@@ -0,0 +1,117 @@
+# analysis_router.py
+"""
+Routing between the cheap command-analysis tiers (keyword rules, local
+classifier) and the remote LLM tier.
+
+In cascading mode the fast tiers run first and the LLM is only called when
+none of them is confident. In speculative mode a timer is armed as the fast
+tiers start: if they are still running when it fires (speculate_after_ms),
+the LLM call starts on a worker thread alongside them, and its answer is
+used only if they end up without one. Fast tiers normally settle within
+microseconds, so commands they answer never make an LLM request either way.
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+from logger import log_info, log_warning
+
+# (name, analyze(command) -> analysis or None, minimum confidence to accept)
+FastTier = Tuple[str, Callable[[str], Optional[Dict[str, Any]]], float]
+
+
+class CascadingRouter:
+    """
+    Answers from the first fast tier whose confidence clears its bar and only
+    pays for the remote tier otherwise. Per-tier timings (ms) for the most
+    recent commands are kept in `timings`.
+    """
+
+    def __init__(self, fast_tiers: Sequence[FastTier], remote_tier: Callable[..., Dict[str, Any]],
+                 speculative: bool = False, speculate_after_ms: float = 20.0, max_workers: int = 4,
+                 history_size: int = 200):
+        self.fast_tiers = list(fast_tiers)
+        self.remote_tier = remote_tier
+        self.speculative = speculative
+        self.speculate_after = speculate_after_ms / 1000
+        self.local_answers = 0
+        self.remote_answers = 0
+        self.timings: Deque[Dict[str, Any]] = deque(maxlen=history_size)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analysis") if speculative else None
+
+    def try_local(self, command: str, timings: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """Returns the first fast-tier answer that clears its bar, otherwise None."""
+        for name, tier, threshold in self.fast_tiers:
+            start = time.perf_counter()
+            try:
+                analysis = tier(command)
+            except Exception as e:
+                log_warning(f"Analysis tier '{name}' failed: {e}")
+                analysis = None
+            if timings is not None:
+                timings[name] = round((time.perf_counter() - start) * 1000, 3)
+            if analysis and analysis.get("confidence", 0.0) >= threshold:
+                self.local_answers += 1
+                analysis["tier"] = name
+                return analysis
+        return None
+
+    def route(self, command: str, *remote_args) -> Dict[str, Any]:
+        timings: Dict[str, Any] = {"command": command}
+        self.timings.append(timings)
+        settled = threading.Event()
+        speculation = None
+        if self._executor is not None:
+            speculation = self._executor.submit(self._speculate, settled, timings, command, *remote_args)
+
+        analysis = self.try_local(command, timings)
+        settled.set()
+        if analysis is not None:
+            timings["answered_by"] = analysis["tier"]
+            log_info(f"Analysis answered by '{analysis['tier']}' tier: {self._format(timings)}")
+            return analysis
+
+        self.remote_answers += 1
+        timings["answered_by"] = "remote"
+        # None when the fast tiers settled before the timer fired and nothing was started
+        analysis = speculation.result() if speculation is not None else None
+        if analysis is None:
+            analysis = self._timed_remote(timings, command, *remote_args)
+        log_info(f"Analysis answered by remote tier: {self._format(timings)}")
+        return analysis
+
+    def _speculate(self, settled: threading.Event, timings: Dict[str, Any], command: str,
+                   *remote_args) -> Optional[Dict[str, Any]]:
+        """Starts the remote tier if the fast tiers are still running after speculate_after."""
+        if settled.wait(self.speculate_after):
+            return None
+        timings["speculated"] = True
+        return self._timed_remote(timings, command, *remote_args)
+
+    def _timed_remote(self, timings: Dict[str, Any], command: str, *remote_args) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            return self.remote_tier(command, *remote_args)
+        finally:
+            timings["remote"] = round((time.perf_counter() - start) * 1000, 3)
+
+    @staticmethod
+    def _format(timings: Dict[str, Any]) -> str:
+        return ", ".join(f"{k}={v}ms" for k, v in timings.items()
+                         if k not in ("command", "answered_by") and isinstance(v, float))
+
+    def timing_summary(self) -> Dict[str, Dict[str, float]]:
+        """Mean and max latency (ms) per tier over the recorded commands."""
+        per_tier: Dict[str, List[float]] = {}
+        for entry in list(self.timings):
+            for key, value in entry.items():
+                if isinstance(value, float):
+                    per_tier.setdefault(key, []).append(value)
+        return {tier: {"count": len(values), "mean_ms": round(sum(values) / len(values), 3), "max_ms": max(values)}
+                for tier, values in per_tier.items()}
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
@@ -0,0 +1,159 @@
+# analysis_schema.py
+"""
+Structured output for the LLM analysis tier.
+
+`build_analysis_schema` turns an analyzer's intent list, action table and
+parameter names into a Gemini response schema, so replies are valid JSON by
+construction. `IncrementalJSONParser` reads a streamed reply and hands out each
+top-level member as soon as it is complete; Gemini emits schema properties in
+alphabetical order (action, intent, parameters, response), so a task can be
+dispatched before the rest of the body arrives.
+"""
+import json
+import re
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+TASK_FIELDS = ("intent", "action", "parameters")
+
+
+def build_analysis_schema(intents: Iterable[str], actions: Iterable[str], parameters: Dict[str, str],
+                          with_response: bool = False, batch: bool = False) -> Dict[str, Any]:
+    """
+    Returns a response schema for one analysis object, or for an array of
+    them with an "index" field when batch is set. `parameters` maps each
+    parameter name to its schema type ("STRING", "BOOLEAN", ...).
+    """
+    properties: Dict[str, Any] = {
+        "intent": {"type": "STRING", "enum": sorted(set(intents))},
+        "action": {"type": "STRING", "enum": sorted(set(actions))},
+        "parameters": {
+            "type": "OBJECT",
+            "properties": {name: {"type": kind, "nullable": True} for name, kind in parameters.items()},
+        },
+    }
+    required = ["intent", "action", "parameters"]
+    if with_response:
+        properties["response"] = {"type": "STRING", "nullable": True}
+    if batch:
+        properties["index"] = {"type": "INTEGER"}
+        required.insert(0, "index")
+    item = {"type": "OBJECT", "properties": properties, "required": required}
+    return {"type": "ARRAY", "items": item} if batch else item
+
+
+def structured_generation_config(schema: Dict[str, Any]) -> Dict[str, Any]:
+    return {"response_mime_type": "application/json", "response_schema": schema}
+
+
+class IncrementalJSONParser:
+    """
+    Incremental parser for a single top-level JSON object.
+
+    Call `feed()` with each chunk of text; it returns the (key, value) members
+    that were completed by that chunk. Each character is scanned once, so
+    feeding a whole reply chunk by chunk stays linear in its length. Text before
+    the opening brace (e.g. a ```json fence) is ignored.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.members: Dict[str, Any] = {}
+        self.complete = False
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._member_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        self.buffer += chunk
+        completed = []
+        buffer = self.buffer
+        while self._pos < len(buffer) and not self.complete:
+            char = buffer[self._pos]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = self._depth > 0
+            elif char in "{[":
+                self._depth += 1
+                if self._depth == 1:
+                    self._member_start = self._pos + 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    completed += self._close_member(self._pos)
+                    self.complete = True
+            elif char == "," and self._depth == 1:
+                completed += self._close_member(self._pos)
+                self._member_start = self._pos + 1
+            self._pos += 1
+        return completed
+
+    def _close_member(self, end: int) -> List[Tuple[str, Any]]:
+        text = self.buffer[self._member_start:end].strip()
+        if not text:
+            return []
+        try:
+            member = json.loads("{" + text + "}")
+        except json.JSONDecodeError:
+            return []
+        self.members.update(member)
+        return list(member.items())
+
+    def has(self, *keys: str) -> bool:
+        return all(key in self.members for key in keys)
+
+    def result(self) -> Optional[Dict[str, Any]]:
+        """The whole object once the closing brace has arrived, otherwise None."""
+        return dict(self.members) if self.complete else None
+
+
+def iter_stream_text(stream: Iterable[Any]) -> Iterator[str]:
+    """Text of each streamed chunk, skipping chunks without text (e.g. the final usage chunk)."""
+    for chunk in stream:
+        try:
+            text = chunk.text
+        except (ValueError, AttributeError):
+            continue
+        if text:
+            yield text
+
+
+def read_streamed_analysis(stream: Iterable[Any],
+                           dispatch_early: Callable[[Dict[str, Any]], bool] = lambda members: True
+                           ) -> Optional[Dict[str, Any]]:
+    """
+    Consumes a streamed analysis reply. Returns as soon as intent, action and
+    parameters are complete and `dispatch_early` accepts them, leaving the rest
+    of the stream unread; otherwise returns the whole object. Falls back to the
+    first {...} span of the text if the reply was not a clean object. A gateway
+    stream is marked finished here, so its latency covers the body that was read.
+    """
+    parser = IncrementalJSONParser()
+    try:
+        for text in iter_stream_text(stream):
+            parser.feed(text)
+            if parser.complete:
+                break
+            if parser.has(*TASK_FIELDS) and dispatch_early(parser.members):
+                return dict(parser.members)
+    finally:
+        finish = getattr(stream, "finish", None)
+        if finish is not None:
+            finish()
+    result = parser.result()
+    if result is not None:
+        return result
+    match = re.search(r'\{.*\}', parser.buffer, re.DOTALL)
+    if match:
+        try:
+            return json.loads(match.group(0))
+        except json.JSONDecodeError:
+            return None
+    return None
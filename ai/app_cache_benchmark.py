@@ -0,0 +1,148 @@
+# app_cache_benchmark.py
+"""
+Compares the JSON app cache with the memory-mapped binary cache
+(binary_app_cache.py): file size, time and memory to open, and exact, prefix
+and "*name*" lookup latency.
+
+The JSON side does what its readers do: json.load, then a lowercase name
+dictionary and a scan over every name for prefix and substring matches. The
+binary side maps the file and searches it in place. --scale N repeats the
+records N times (with numbered names) to see how both grow with the cache.
+
+    python app_cache_benchmark.py [--cache ../apps_cache.json] [--scale 1]
+                                  [--repeat 200] [--output app_cache_benchmark.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from binary_app_cache import MappedAppCache, write_app_cache
+
+DEFAULT_CACHE = Path(__file__).resolve().parent.parent / "apps_cache.json"
+QUERIES = ["notepad", "chrome", "microsoft", "visual studio code", "py", "zzz-not-installed"]
+
+
+def load_apps(path: Path, scale: int) -> List[Dict[str, str]]:
+    with open(path, "r", encoding="utf-8-sig") as f:
+        apps = [app for app in json.load(f) if app.get("Name") and app.get("Path")]
+    scaled = list(apps)
+    for copy in range(1, scale):
+        scaled += [dict(app, Name=f"{app['Name']} {copy}", Path=f"{app['Path']}.{copy}") for app in apps]
+    return scaled
+
+
+# --- JSON readers ---
+def open_json(path: str):
+    with open(path, "r", encoding="utf-8-sig") as f:
+        apps = json.load(f)
+    by_name: Dict[str, List[str]] = {}
+    keys = []
+    for app in apps:
+        for name in [app["Name"], *app.get("Aliases", [])]:
+            key = name.lower()
+            by_name.setdefault(key, []).append(app["Path"])
+            keys.append((key, app["Path"]))
+    return by_name, keys
+
+
+def json_lookups(index) -> Dict[str, Callable[[str], List[str]]]:
+    by_name, keys = index
+    return {
+        "exact": lambda q: by_name.get(q.lower(), []),
+        "prefix": lambda q: [path for key, path in keys if key.startswith(q.lower())],
+        "contains": lambda q: [path for key, path in keys if q.lower() in key],
+    }
+
+
+# --- Binary readers ---
+def binary_lookups(cache: MappedAppCache) -> Dict[str, Callable[[str], List[str]]]:
+    return {
+        "exact": lambda q: [cache.path(i) for i in cache.exact(q)],
+        "prefix": lambda q: [cache.path(i) for i in cache.prefix(q)],
+        "contains": lambda q: [cache.path(i) for i in cache.containing(q)],
+    }
+
+
+def time_call(func: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return {"median_us": round(statistics.median(samples), 2), "min_us": round(min(samples), 2)}
+
+
+def measure_open(open_func: Callable[[], Any], close_func: Callable[[Any], None], repeat: int) -> Dict[str, float]:
+    timing = time_call(lambda: close_func(open_func()), repeat)
+    tracemalloc.start()
+    handle = open_func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    close_func(handle)
+    timing["peak_kib"] = round(peak / 1024, 1)
+    return timing
+
+
+def run_benchmark(apps: List[Dict[str, str]], repeat: int) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory(prefix="app_cache_benchmark_") as scratch:
+        json_path, binary_path = os.path.join(scratch, "apps.json"), os.path.join(scratch, "apps.bin")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(apps, f, ensure_ascii=False, separators=(",", ":"))
+        write_app_cache(binary_path, apps)
+
+        results: Dict[str, Any] = {"apps": len(apps), "formats": {}}
+        index = open_json(json_path)
+        cache = MappedAppCache(binary_path)
+        try:
+            for name, path, open_func, close_func, lookups in (
+                    ("json", json_path, lambda: open_json(json_path), lambda _: None, json_lookups(index)),
+                    ("binary", binary_path, lambda: MappedAppCache(binary_path), MappedAppCache.close,
+                     binary_lookups(cache))):
+                result = {"bytes": os.path.getsize(path), "open": measure_open(open_func, close_func, repeat),
+                          "lookups": {}}
+                for kind, lookup in lookups.items():
+                    result["lookups"][kind] = {query: time_call(lambda: lookup(query), repeat) for query in QUERIES}
+                results["formats"][name] = result
+
+            # Both formats must answer the same
+            json_side, binary_side = json_lookups(index), binary_lookups(cache)
+            results["consistent"] = all(sorted(json_side[kind](query)) == sorted(binary_side[kind](query))
+                                        for kind in json_side for query in QUERIES)
+        finally:
+            cache.close()
+    return results
+
+
+def print_report(results: Dict[str, Any]):
+    print(f"\n{results['apps']} apps (answers identical: {results['consistent']})")
+    print(f"{'':10}{'bytes':>10}{'open µs':>12}{'open KiB':>11}{'exact µs':>11}{'prefix µs':>11}{'contains µs':>13}")
+    for name, result in results["formats"].items():
+        lookups = {kind: statistics.median(q["median_us"] for q in by_query.values())
+                   for kind, by_query in result["lookups"].items()}
+        print(f"{name:10}{result['bytes']:>10}{result['open']['median_us']:>12.1f}{result['open']['peak_kib']:>11.1f}"
+              f"{lookups['exact']:>11.2f}{lookups['prefix']:>11.2f}{lookups['contains']:>13.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the JSON and binary app caches.")
+    parser.add_argument("--cache", type=Path, default=DEFAULT_CACHE, help="JSON cache to take the records from")
+    parser.add_argument("--scale", type=int, default=1, help="Repeat the records this many times")
+    parser.add_argument("--repeat", type=int, default=200, help="Samples per measurement")
+    parser.add_argument("--output", type=Path, default=None, help="Also write the results as JSON")
+    args = parser.parse_args()
+
+    results = run_benchmark(load_apps(args.cache, max(1, args.scale)), args.repeat)
+    print_report(results)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
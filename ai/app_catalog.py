@@ -0,0 +1,141 @@
+# app_catalog.py
+"""
+Turns raw scan records into the launch catalog written to the app caches.
+
+The build runs as a pipeline of stages over {"Name", "Path", "Source"}
+records (Source is the scanned root's kind: start_menu, desktop or path):
+
+    normalize   tidy names ("X - Shortcut"), expand and normalize paths
+    dedupe      one record per resolved target; the other names it was found
+                under are kept in "Aliases" so they still match
+    classify    "Kind": app, tool, uninstaller or documentation
+    prioritize  "Priority": launch preference used to order matches
+    select      keep apps and tools, best first
+
+Each stage reports how many records it took and returned and how long it ran.
+"""
+import os
+import re
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from app_scanner import Root, default_roots, scan_roots
+
+Record = Dict[str, object]
+
+LAUNCHABLE_KINDS = ("app", "tool")
+DOCUMENT_EXTENSIONS = {".chm", ".txt", ".pdf", ".htm", ".html", ".rtf", ".md", ".url", ".ico", ".hlp", ".xps"}
+UNINSTALLER_NAME = re.compile(r"\buninstall", re.IGNORECASE)
+UNINSTALLER_FILE = re.compile(r"^(unins\d*|uninst\w*|uninstall\w*)\.exe$", re.IGNORECASE)
+DOCUMENTATION_NAME = re.compile(r"\b(help|manuals?|readme|documentation|release notes|website|license)\b",
+                                re.IGNORECASE)
+# Background helpers and installers found on PATH, ranked below the tools people launch by name
+HELPER_NAME = re.compile(r"(helper|host|svc|service|setup|install|update|handler|broker|elevat)", re.IGNORECASE)
+SHORTCUT_SUFFIX = re.compile(r"\s+-\s+shortcut$", re.IGNORECASE)
+
+PRIORITY = {"app": 100, "tool": 50, "uninstaller": 10, "documentation": 5}
+SOURCE_BONUS = {"start_menu": 10, "desktop": 10, "path": 0}
+HELPER_PENALTY = 20
+
+
+def _target_key(path: str) -> Tuple[str, str]:
+    # The launched file name stays part of the key: multi-call binaries (busybox) act on argv[0]
+    return os.path.normcase(os.path.realpath(path)), os.path.normcase(os.path.basename(path))
+
+
+# --- Stages ---
+def normalize(records: List[Record]) -> List[Record]:
+    normalized = []
+    for record in records:
+        name = " ".join(str(record.get("Name") or "").split())
+        name = SHORTCUT_SUFFIX.sub("", name)
+        path = str(record.get("Path") or "").strip().strip('"')
+        if not name or not path:
+            continue
+        normalized.append(dict(record, Name=name, Path=os.path.normpath(os.path.expandvars(path))))
+    return normalized
+
+
+def dedupe(records: List[Record]) -> List[Record]:
+    """Merges records that launch the same file; a shortcut's name beats a PATH file name."""
+    merged: Dict[Tuple[str, str], Record] = {}
+    for record in records:
+        key = _target_key(record["Path"])
+        kept = merged.get(key)
+        if kept is None:
+            merged[key] = dict(record, Aliases=list(record.get("Aliases") or []))
+            continue
+        if SOURCE_BONUS.get(record.get("Source"), 0) > SOURCE_BONUS.get(kept.get("Source"), 0):
+            kept["Aliases"].append(kept["Name"])
+            kept.update(Name=record["Name"], Path=record["Path"], Source=record.get("Source"))
+        else:
+            kept["Aliases"].append(record["Name"])
+    for record in merged.values():
+        seen = {record["Name"].lower()}
+        record["Aliases"] = [alias for alias in record["Aliases"]
+                             if alias.lower() not in seen and not seen.add(alias.lower())]
+    return list(merged.values())
+
+
+def classify(records: List[Record]) -> List[Record]:
+    for record in records:
+        name, path = record["Name"], record["Path"]
+        file_name = os.path.basename(path)
+        if UNINSTALLER_NAME.search(name) or UNINSTALLER_FILE.match(file_name):
+            kind = "uninstaller"
+        elif os.path.splitext(file_name)[1].lower() in DOCUMENT_EXTENSIONS or DOCUMENTATION_NAME.search(name):
+            kind = "documentation"
+        elif record.get("Source") in ("start_menu", "desktop"):
+            kind = "app"
+        else:
+            kind = "tool"
+        record["Kind"] = kind
+    return records
+
+
+def prioritize(records: List[Record]) -> List[Record]:
+    for record in records:
+        priority = PRIORITY[record["Kind"]] + SOURCE_BONUS.get(record.get("Source"), 0)
+        if record["Kind"] == "tool" and HELPER_NAME.search(record["Name"]):
+            priority -= HELPER_PENALTY
+        record["Priority"] = max(priority, 0)
+    return records
+
+
+def select(records: List[Record]) -> List[Record]:
+    kept = [record for record in records if record["Kind"] in LAUNCHABLE_KINDS]
+    return sorted(kept, key=lambda record: -record["Priority"])
+
+
+STAGES: List[Tuple[str, Callable[[List[Record]], List[Record]]]] = [
+    ("normalize", normalize),
+    ("dedupe", dedupe),
+    ("classify", classify),
+    ("prioritize", prioritize),
+    ("select", select),
+]
+
+
+def build_catalog(records: Iterable[Record]) -> Tuple[List[Record], List[Dict[str, object]]]:
+    """Runs every stage; returns the catalog and one {stage, in, out, ms} entry per stage."""
+    records = list(records)
+    stats = []
+    for name, stage in STAGES:
+        start = time.perf_counter()
+        count = len(records)
+        records = stage(records)
+        stats.append({"stage": name, "in": count, "out": len(records),
+                      "ms": round((time.perf_counter() - start) * 1000, 2)})
+    return records, stats
+
+
+def tag_sources(per_root: Dict[str, List[Dict[str, str]]], roots: Iterable[Root]) -> List[Record]:
+    """Scan results in root order, each record tagged with its root's kind."""
+    return [dict(record, Source=kind) for root, kind in roots for record in per_root.get(root, [])]
+
+
+def scan_catalog(roots: Optional[Iterable[Root]] = None) -> List[Record]:
+    """Scans the roots (default_roots() if not given) and builds the catalog."""
+    roots = list(roots) if roots is not None else default_roots()
+    catalog, _ = build_catalog(tag_sources(scan_roots(roots), roots))
+    return catalog
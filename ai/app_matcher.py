@@ -0,0 +1,210 @@
+# app_matcher.py
+"""
+Typo-tolerant, ranked lookup of installed apps by spoken or typed name.
+
+Names are compared in a compact form (lowercase letters and digits only), so
+"fire fox" finds "Firefox". Candidates come from two indexes built once:
+character trigrams of each compact name, and a deletion-neighbourhood index
+over compact names and their words for edit-distance matches ("vs cold" ->
+alias "vs code"): two strings within edit distance k share a string reachable
+by at most k deletions from each, so typo candidates are found with a few
+dictionary lookups instead of a scan of every name.
+Aliases and recently launched apps get a score boost. A match is only
+launched directly when it is both strong and clearly ahead of the next app
+(see confident()); weaker matches, typos like "vs cold" included, are
+offered as suggestions by display name instead.
+"""
+import re
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+MIN_SCORE = 0.55
+ALIAS_BOOST = 0.08
+RECENT_BOOST = 0.06  # For an app launched just now; halves every RECENT_HALF_LIFE seconds
+RECENT_HALF_LIFE = 7 * 24 * 3600
+MAX_EDITS = 2  # Deletions stored per term; bounds the edit distance a typo may have
+AUTO_LAUNCH_SCORE = 0.85  # Launch without asking only at or above this score...
+AUTO_LAUNCH_MARGIN = 0.05  # ...and this far ahead of the next app
+
+
+def compact(name: str) -> str:
+    return "".join(WORD_PATTERN.findall(name.lower()))
+
+
+def trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def bounded_levenshtein(a: str, b: str, limit: int) -> int:
+    """Edit distance, or limit + 1 as soon as it is known to exceed limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        row_min = i
+        for j, char_b in enumerate(b, 1):
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b))
+            current.append(value)
+            row_min = min(row_min, value)
+        if row_min > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def deletions(term: str, depth: int) -> set:
+    """term and every string made by deleting up to `depth` of its characters."""
+    found, frontier = {term}, {term}
+    for _ in range(depth):
+        frontier = {word[:i] + word[i + 1:] for word in frontier for i in range(len(word))}
+        found |= frontier
+    return found
+
+
+def confident(matches: List[Tuple[float, str, str]], min_score: float = AUTO_LAUNCH_SCORE,
+              margin: float = AUTO_LAUNCH_MARGIN) -> Optional[Tuple[float, str, str]]:
+    """The best of search()'s matches if it is safe to launch without asking, else None."""
+    if not matches or matches[0][0] < min_score:
+        return None
+    # Several installs of the same app are not ambiguous; search() already put the preferred one first
+    best_name = compact(matches[0][1])
+    runner_up = next((score for score, name, _ in matches[1:] if compact(name) != best_name), 0.0)
+    if matches[0][0] - runner_up < margin:
+        return None
+    return matches[0]
+
+
+class AppMatcher:
+    """
+    Ranked app lookup over {"Name", "Path"} records (their catalog "Aliases"
+    and "Priority" too, see app_catalog.py) plus name aliases.
+    """
+
+    def __init__(self, apps: Iterable[Dict[str, str]], aliases: Optional[Dict[str, str]] = None):
+        self.entries: List[Dict[str, object]] = []
+        self.trigram_index: Dict[str, List[int]] = {}
+        self.term_index: Dict[str, List[int]] = {}
+        self.deletion_index: Dict[str, List[str]] = {}
+        self.launched_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+        # compact name or executable -> (path, display name), so an alias like "vscode" -> "code" shows the app's name
+        by_compact: Dict[str, Tuple[str, str]] = {}
+        by_executable: Dict[str, Tuple[str, str]] = {}
+        for app in apps:
+            name, path = app.get("Name"), app.get("Path")
+            if not name or not path:
+                continue
+            executable = compact(re.split(r"[\\/]", path)[-1].rsplit(".", 1)[0])
+            if executable:
+                by_executable.setdefault(executable, (path, name))
+            for match_name in [name, *(app.get("Aliases") or [])]:
+                key = compact(match_name)
+                if key:
+                    by_compact.setdefault(key, (path, name))
+                    self._add(match_name, path, key, alias=False, priority=app.get("Priority") or 0, display=name)
+        # Aliases of an app that is not in the catalog show their longest form ("vscode" -> "Visual Studio Code")
+        fullest: Dict[str, str] = {}
+        for alias, command in (aliases or {}).items():
+            if len(alias) > len(fullest.get(command, "")):
+                fullest[command] = alias
+        for alias, command in (aliases or {}).items():
+            key = compact(alias)
+            if key:
+                path, display = (by_compact.get(compact(command)) or by_executable.get(compact(command))
+                                 or (command, fullest[command].title()))
+                self._add(alias, path, key, alias=True, display=display)
+
+    def _add(self, name: str, path: str, key: str, alias: bool, priority: int = 0, display: Optional[str] = None):
+        index = len(self.entries)
+        self.entries.append({"name": display or name, "path": path, "key": key, "alias": alias,
+                             "priority": priority, "trigrams": len(trigrams(key))})
+        for gram in trigrams(key):
+            self.trigram_index.setdefault(gram, []).append(index)
+        words = WORD_PATTERN.findall(name.lower())
+        for term in {key, *[w for w in words if len(w) >= 3]}:
+            if term not in self.term_index:
+                for variant in deletions(term, self._tolerance(term)):
+                    self.deletion_index.setdefault(variant, []).append(term)
+            self.term_index.setdefault(term, []).append(index)
+
+    @staticmethod
+    def _tolerance(term: str) -> int:
+        return 1 if len(term) <= 5 else MAX_EDITS
+
+    def _near_terms(self, key: str) -> List[Tuple[int, str]]:
+        """(distance, term) for indexed terms within the key's edit tolerance."""
+        tolerance = self._tolerance(key)
+        candidates = {term for variant in deletions(key, tolerance)
+                      for term in self.deletion_index.get(variant, ())}
+        near = []
+        for term in candidates:
+            distance = bounded_levenshtein(key, term, tolerance)
+            if distance <= tolerance:
+                near.append((distance, term))
+        return near
+
+    def record_launch(self, path: str):
+        """Boosts an app in later lookups."""
+        with self._lock:
+            self.launched_at[path] = time.time()
+
+    def _boost(self, entry: Dict[str, object], now: float) -> float:
+        boost = ALIAS_BOOST if entry["alias"] else 0.0
+        launched = self.launched_at.get(entry["path"])
+        if launched is not None:
+            boost += RECENT_BOOST * 0.5 ** ((now - launched) / RECENT_HALF_LIFE)
+        return boost
+
+    def search(self, query: str, limit: int = 5, min_score: float = MIN_SCORE) -> List[Tuple[float, str, str]]:
+        """Top `limit` (score, name, path) matches, best first, one per path."""
+        key = compact(query)
+        if not key:
+            return []
+        scores: Dict[int, float] = {}
+
+        # Trigram overlap (Dice coefficient) and substring containment
+        query_grams = trigrams(key)
+        overlap = Counter(i for gram in query_grams for i in self.trigram_index.get(gram, ()))
+        for index, shared in overlap.items():
+            entry = self.entries[index]
+            score = 2 * shared / (len(query_grams) + entry["trigrams"])
+            if key == entry["key"]:
+                score = 1.0
+            elif key in entry["key"]:
+                score = max(score, 0.8 + 0.15 * len(key) / len(entry["key"]))
+            scores[index] = score
+
+        # Edit distance against whole compact names and single words of the names
+        for distance, term in self._near_terms(key):
+            similarity = 0.95 * (1 - distance / max(len(key), len(term)))
+            for index in self.term_index[term]:
+                # A typo match on one word of a longer name counts for the share of the name it covers,
+                # so "spotify" ~ "notify" stays far below a whole-name match on "systemd-notify"
+                entry_key = self.entries[index]["key"]
+                weight = 1.0 if term == entry_key else 0.5 + 0.4 * len(term) / len(entry_key)
+                scores[index] = max(scores.get(index, 0.0), similarity * weight)
+
+        now = time.time()
+        ranked: Dict[str, Tuple[float, str, str]] = {}
+        priorities: Dict[str, int] = {}
+        for index, score in scores.items():
+            if score < min_score:
+                continue
+            entry = self.entries[index]
+            total = round(min(1.0, score + self._boost(entry, now)), 4)
+            if entry["path"] not in ranked or total > ranked[entry["path"]][0]:
+                ranked[entry["path"]] = (total, entry["name"], entry["path"])
+                priorities[entry["path"]] = entry["priority"]
+        # Equal scores go to the higher launch priority, then the shorter name
+        return sorted(ranked.values(), key=lambda match: (-match[0], -priorities[match[2]], len(match[1])))[:limit]
+
+    def best(self, query: str, min_score: float = MIN_SCORE) -> Optional[Tuple[float, str, str]]:
+        matches = self.search(query, 1, min_score)
+        return matches[0] if matches else None
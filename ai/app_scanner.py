@@ -0,0 +1,267 @@
+# app_scanner.py
+"""
+Pure-Python application discovery, producing the {"Name", "Path"} records of
+apps_cache.json.
+
+Sources, per platform:
+    Windows   Start Menu shortcuts (.lnk, parsed from the Shell Link binary
+              format instead of through WScript.Shell) and *.exe on PATH
+    Linux     freedesktop .desktop entries in the XDG application folders and
+              executables on PATH
+
+Directories are listed with os.scandir on a thread pool: every folder found
+while walking a root becomes its own task, so deep Start Menu trees and many
+PATH entries are read concurrently.
+"""
+import configparser
+import os
+import shlex
+import shutil
+import struct
+import sys
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from logger import log_warning
+
+IS_WINDOWS = sys.platform == "win32"
+
+# Shell Link (MS-SHLLINK) header and flags
+LNK_HEADER_SIZE = 0x4C
+LNK_CLSID = bytes.fromhex("0114020000000000c000000000000046")
+HAS_TARGET_ID_LIST = 0x01
+HAS_LINK_INFO = 0x02
+HAS_NAME = 0x04
+HAS_RELATIVE_PATH = 0x08
+HAS_WORKING_DIR = 0x10
+HAS_ARGUMENTS = 0x20
+HAS_ICON_LOCATION = 0x40
+IS_UNICODE = 0x80
+VOLUME_ID_AND_LOCAL_BASE_PATH = 0x01
+COMMON_NETWORK_RELATIVE_LINK = 0x02
+ENVIRONMENT_VARIABLE_BLOCK = 0xA0000001
+
+# Exec field codes (%f, %U, ...) that are replaced by the launcher, not part of the command
+DESKTOP_FIELD_CODES = {"%f", "%F", "%u", "%U", "%d", "%D", "%n", "%N", "%i", "%c", "%k", "%v", "%m"}
+
+Root = Tuple[str, str]  # (folder, kind): kind is "start_menu", "desktop" or "path"
+
+
+# --- Shell Link (.lnk) ---
+def _c_string(data: bytes, offset: int, encoding: str = "mbcs" if IS_WINDOWS else "cp1252") -> str:
+    end = data.find(b"\0", offset)
+    return data[offset:end if end >= 0 else len(data)].decode(encoding, errors="replace")
+
+
+def _utf16_string(data: bytes, offset: int) -> str:
+    end = offset
+    while end + 1 < len(data) and data[end:end + 2] != b"\0\0":
+        end += 2
+    return data[offset:end].decode("utf-16-le", errors="replace")
+
+
+def _link_info_target(data: bytes, start: int) -> Optional[str]:
+    """Local or network target path from the LinkInfo structure at `start`."""
+    header_size, flags = struct.unpack_from("<II", data, start + 4)
+    local_offset, network_offset, suffix_offset = struct.unpack_from("<III", data, start + 16)
+    unicode = header_size >= 0x24
+    if unicode:
+        local_offset_u, suffix_offset_u = struct.unpack_from("<II", data, start + 28)
+    suffix = (_utf16_string(data, start + suffix_offset_u) if unicode and suffix_offset_u
+              else _c_string(data, start + suffix_offset))
+
+    if flags & VOLUME_ID_AND_LOCAL_BASE_PATH:
+        base = (_utf16_string(data, start + local_offset_u) if unicode and local_offset_u
+                else _c_string(data, start + local_offset))
+        return base + suffix
+    if flags & COMMON_NETWORK_RELATIVE_LINK:
+        link = start + network_offset
+        net_name_offset = struct.unpack_from("<I", data, link + 8)[0]
+        share = _c_string(data, link + net_name_offset)
+        return share + ("\\" + suffix if suffix else "")
+    return None
+
+
+def parse_lnk(data: bytes) -> Dict[str, str]:
+    """
+    Reads a Shell Link file's target ("target"), and its relative path,
+    working directory and arguments when present. Raises ValueError on
+    anything that is not a shell link.
+    """
+    if len(data) < LNK_HEADER_SIZE or struct.unpack_from("<I", data)[0] != LNK_HEADER_SIZE \
+            or data[4:20] != LNK_CLSID:
+        raise ValueError("not a shell link")
+    flags = struct.unpack_from("<I", data, 0x14)[0]
+    offset = LNK_HEADER_SIZE
+    result: Dict[str, str] = {}
+    try:
+        if flags & HAS_TARGET_ID_LIST:
+            offset += 2 + struct.unpack_from("<H", data, offset)[0]
+        if flags & HAS_LINK_INFO:
+            link_info_size = struct.unpack_from("<I", data, offset)[0]
+            target = _link_info_target(data, offset)
+            if target:
+                result["target"] = target
+            offset += link_info_size
+
+        wide = bool(flags & IS_UNICODE)
+        for flag, key in ((HAS_NAME, "name"), (HAS_RELATIVE_PATH, "relative_path"),
+                          (HAS_WORKING_DIR, "working_dir"), (HAS_ARGUMENTS, "arguments"),
+                          (HAS_ICON_LOCATION, "icon")):
+            if flags & flag:
+                count = struct.unpack_from("<H", data, offset)[0]
+                size = count * 2 if wide else count
+                raw = data[offset + 2:offset + 2 + size]
+                result[key] = raw.decode("utf-16-le" if wide else "cp1252", errors="replace")
+                offset += 2 + size
+
+        # ExtraData: the environment-variable block holds targets such as %ProgramFiles%\...
+        while "target" not in result and offset + 8 <= len(data):
+            block_size, signature = struct.unpack_from("<II", data, offset)
+            if block_size < 8:
+                break
+            if signature == ENVIRONMENT_VARIABLE_BLOCK:
+                target = _utf16_string(data, offset + 268) or _c_string(data, offset + 8)
+                if target:
+                    result["target"] = os.path.expandvars(target)
+            offset += block_size
+    except struct.error as e:
+        raise ValueError(f"truncated shell link: {e}") from e
+    return result
+
+
+def resolve_lnk(path: str) -> Optional[str]:
+    """Target of a .lnk file, like WScript.Shell's TargetPath; None if unreadable."""
+    try:
+        with open(path, "rb") as f:
+            link = parse_lnk(f.read())
+    except (OSError, ValueError):
+        return None
+    target = link.get("target")
+    if not target and link.get("relative_path"):
+        target = os.path.normpath(os.path.join(os.path.dirname(path), link["relative_path"]))
+    return target or None
+
+
+# --- freedesktop .desktop ---
+def parse_desktop_entry(path: str) -> Optional[Dict[str, str]]:
+    """Name and executable of a launchable Application entry, else None."""
+    parser = configparser.RawConfigParser(interpolation=None, strict=False)
+    parser.optionxform = str
+    try:
+        parser.read(path, encoding="utf-8")
+    except (configparser.Error, UnicodeDecodeError, OSError):
+        return None
+    if not parser.has_section("Desktop Entry"):
+        return None
+    entry = parser["Desktop Entry"]
+    if entry.get("Type", "Application") != "Application" or \
+            entry.get("NoDisplay", "").lower() == "true" or entry.get("Hidden", "").lower() == "true":
+        return None
+    name, command = entry.get("Name"), entry.get("TryExec") or entry.get("Exec")
+    if not name or not command:
+        return None
+    try:
+        words = [word for word in shlex.split(command) if word not in DESKTOP_FIELD_CODES]
+    except ValueError:
+        return None
+    # "env VAR=value program ..." launches program
+    if words and words[0] == "env":
+        words = [word for word in words[1:] if "=" not in word] or words
+    if not words:
+        return None
+    executable = words[0] if os.path.isabs(words[0]) else shutil.which(words[0])
+    return {"Name": name, "Path": executable} if executable else None
+
+
+# --- Roots ---
+def default_roots() -> List[Root]:
+    """The folders to scan on this platform, in apppath.ps1's order on Windows."""
+    roots: List[Root] = []
+    if IS_WINDOWS:
+        for base in (os.environ.get("ProgramData"), os.environ.get("APPDATA")):
+            if base:
+                roots.append((os.path.join(base, "Microsoft", "Windows", "Start Menu", "Programs"), "start_menu"))
+    else:
+        data_home = os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+        data_dirs = os.environ.get("XDG_DATA_DIRS") or "/usr/local/share:/usr/share"
+        for base in [data_home] + data_dirs.split(":"):
+            if base:
+                roots.append((os.path.join(base, "applications"), "desktop"))
+    for folder in os.environ.get("PATH", "").split(os.pathsep):
+        folder = folder.strip().strip('"')
+        if folder and folder not in [root for root, _ in roots]:
+            roots.append((folder, "path"))
+    return roots
+
+
+def _is_path_executable(entry: os.DirEntry) -> bool:
+    if IS_WINDOWS:
+        return entry.name.lower().endswith(".exe") and entry.is_file()
+    return entry.is_file() and os.access(entry.path, os.X_OK)
+
+
+def _scan_directory(folder: str, kind: str) -> Tuple[List[Tuple[str, Dict[str, str]]], List[str]]:
+    """One folder: ((source file, record) pairs, subfolders to walk next)."""
+    records, subfolders = [], []
+    try:
+        with os.scandir(folder) as it:
+            for entry in it:
+                try:
+                    if kind != "path" and entry.is_dir(follow_symlinks=False):
+                        subfolders.append(entry.path)
+                        continue
+                    name = entry.name
+                    if kind == "path":
+                        if _is_path_executable(entry):
+                            records.append((entry.path, {"Name": os.path.splitext(name)[0] if IS_WINDOWS else name,
+                                                         "Path": entry.path}))
+                    elif kind == "start_menu" and name.lower().endswith(".lnk"):
+                        target = resolve_lnk(entry.path)
+                        if target and os.path.exists(target):
+                            records.append((entry.path, {"Name": name[:-4], "Path": target}))
+                    elif kind == "desktop" and name.endswith(".desktop"):
+                        record = parse_desktop_entry(entry.path)
+                        if record:
+                            records.append((entry.path, record))
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return records, subfolders
+
+
+def scan_roots(roots: Iterable[Root], max_workers: Optional[int] = None) -> Dict[str, List[Dict[str, str]]]:
+    """
+    Scans the roots concurrently; returns the records found under each root,
+    ordered by source file so repeated scans produce the same list.
+    """
+    roots = list(roots)
+    found: Dict[str, List[Tuple[str, Dict[str, str]]]] = {root: [] for root, _ in roots}
+    workers = max_workers or min(32, (os.cpu_count() or 1) * 4)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="app-scan") as pool:
+        pending = {pool.submit(_scan_directory, root, kind): (root, kind) for root, kind in roots}
+        while pending:
+            done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+            for future in done:
+                root, kind = pending.pop(future)
+                try:
+                    records, subfolders = future.result()
+                except Exception as e:
+                    log_warning(f"App scan of '{root}' failed: {e}")
+                    continue
+                found[root].extend(records)
+                for folder in subfolders:
+                    pending[pool.submit(_scan_directory, folder, kind)] = (root, kind)
+
+    # A .desktop file shadows one with the same id (path relative to its root) in a later XDG folder
+    results, desktop_ids = {}, set()
+    for root, kind in roots:
+        pairs = sorted(found[root], key=lambda pair: pair[0].lower())
+        if kind == "desktop":
+            ids = [os.path.relpath(source, root).replace(os.sep, "-") for source, _ in pairs]
+            pairs = [pair for pair, desktop_id in zip(pairs, ids) if desktop_id not in desktop_ids]
+            desktop_ids.update(ids)
+        results[root] = [record for _, record in pairs]
+    return results
@@ -0,0 +1,102 @@
+# audio_output.py
+import queue
+import threading
+from typing import Iterator, Optional
+
+from logger import log_info, log_warning
+
+try:
+    import sounddevice as sd
+    SOUNDDEVICE_AVAILABLE = True
+except (ImportError, OSError):  # OSError: the PortAudio library itself is missing
+    SOUNDDEVICE_AVAILABLE = False
+
+SAMPLE_WIDTH = 2  # 16-bit signed little-endian, as ElevenLabs sends pcm_* formats
+BLOCK_SECONDS = 0.02  # Writes are split into blocks this long, so an interrupt lands within one
+
+
+class AudioStream:
+    """
+    Audio for one speech chunk, filled by a synthesis worker while the playback
+    thread drains it. Iterating yields pieces as they arrive and ends once the
+    worker calls finish().
+    """
+
+    def __init__(self):
+        self._pieces: "queue.Queue[Optional[bytes]]" = queue.Queue()
+        self.received = 0
+
+    def feed(self, data: bytes):
+        if data:
+            self.received += len(data)
+            self._pieces.put(data)
+
+    def finish(self):
+        self._pieces.put(None)
+
+    def __iter__(self) -> Iterator[bytes]:
+        while True:
+            piece = self._pieces.get()
+            if piece is None:
+                return
+            yield piece
+
+
+class PCMOutput:
+    """
+    Persistent mono output stream that plays raw 16-bit PCM as soon as it is
+    written. Only the playback thread touches the stream: other threads call
+    interrupt(), and the playback thread drops the buffered audio itself at
+    its next block or drop_if_interrupted().
+    """
+
+    def __init__(self, sample_rate: int):
+        self.sample_rate = sample_rate
+        self._remainder = b""  # Odd trailing byte of a piece, completed by the next one
+        self._block_bytes = max(1, int(sample_rate * BLOCK_SECONDS)) * SAMPLE_WIDTH
+        self._interrupted = threading.Event()
+        self._stream = sd.RawOutputStream(samplerate=sample_rate, channels=1, dtype="int16")
+        self._stream.start()
+
+    @classmethod
+    def open(cls, sample_rate: int) -> Optional["PCMOutput"]:
+        """Returns an output stream, or None when streaming playback is unavailable here."""
+        if not SOUNDDEVICE_AVAILABLE:
+            log_info("sounddevice not installed; speech plays once each clip is fully synthesized.")
+            return None
+        try:
+            output = cls(sample_rate)
+        except Exception as e:
+            log_warning(f"Could not open audio output stream: {e}")
+            return None
+        log_info(f"Streaming audio output opened at {sample_rate} Hz.")
+        return output
+
+    def write(self, data: bytes):
+        """Blocks until the device has room, which paces playback. Playback thread only."""
+        if self.drop_if_interrupted():
+            return
+        data = self._remainder + data
+        usable = len(data) - len(data) % SAMPLE_WIDTH
+        self._remainder = data[usable:]
+        for start in range(0, usable, self._block_bytes):
+            if self.drop_if_interrupted():
+                return
+            self._stream.write(data[start:min(start + self._block_bytes, usable)])
+
+    def interrupt(self):
+        """Asks the playback thread to drop the audio buffered in the device; safe from any thread."""
+        self._interrupted.set()
+
+    def drop_if_interrupted(self) -> bool:
+        """Playback thread only: carries out a pending interrupt(). True if there was one."""
+        if not self._interrupted.is_set():
+            return False
+        self._interrupted.clear()
+        self._remainder = b""
+        self._stream.abort()
+        self._stream.start()
+        return True
+
+    def close(self):
+        self._stream.close()
@@ -0,0 +1,52 @@
+# batch_analysis.py
+import json
+import re
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+
+def chunked(items: Sequence[Any], size: int) -> Iterator[Sequence[Any]]:
+    """Yields consecutive slices of at most `size` items."""
+    size = max(1, size)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def format_command_list(commands: Sequence[str]) -> str:
+    """Numbers the commands for a batch prompt; the numbers come back as "index"."""
+    return "\n".join(f'{i}. {json.dumps(command, ensure_ascii=False)}' for i, command in enumerate(commands))
+
+
+BATCH_REPLY_FORMAT = (
+    'Respond with ONLY a JSON array containing one analysis object per command, in the same order. '
+    'Each object must include an integer "index" field matching the command number.'
+)
+
+
+def parse_batch_response(text: str, count: int) -> List[Optional[Dict[str, Any]]]:
+    """
+    Extracts one analysis per command from a batch reply. Items are matched by
+    their "index" field, falling back to position; anything missing, malformed
+    or without an intent/action comes back as None so the caller can analyze
+    that command on its own.
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * count
+    match = re.search(r'\[.*\]', text or "", re.DOTALL)
+    if not match:
+        return results
+    try:
+        items = json.loads(match.group(0))
+    except json.JSONDecodeError:
+        return results
+    if not isinstance(items, list):
+        return results
+
+    for position, item in enumerate(items):
+        if not isinstance(item, dict) or not item.get("intent") or not item.get("action"):
+            continue
+        index = item.pop("index", position)
+        if isinstance(index, str) and index.isdigit():
+            index = int(index)
+        if isinstance(index, int) and 0 <= index < count and results[index] is None:
+            item.setdefault("parameters", {})
+            results[index] = item
+    return results
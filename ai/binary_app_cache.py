@@ -0,0 +1,261 @@
+# binary_app_cache.py
+"""
+Compact binary form of apps_cache.json, read through mmap.
+
+Layout (little-endian, every array 4-byte aligned):
+
+    header          magic b"APPC", version, entry count N, string count S,
+                    size of the key blob
+    entries         N x (name string id, folder string id, file string id,
+                    priority), sorted by key; a record with "Aliases" has one
+                    entry per name, all pointing at its display name and path
+    key offsets     N + 1 offsets into the key blob
+    string offsets  S + 1 offsets into the string blob
+    key blob        each entry's lowercase name, UTF-8, followed by "\\n",
+                    in sorted order
+    string blob     interned UTF-8 names, folders and file names
+
+A path is stored as its folder plus its file name, so the few folders most
+apps live in (System32, a Python Scripts folder) are stored once. A display
+name that is already its own lowercase key gets the id NAME_IS_KEY instead
+of a second copy in the string blob. On a typical Windows cache this is
+about a fifth smaller than apps_cache.json.
+
+Readers answer exact and prefix lookups by binary search over the sorted keys
+and "*name*" lookups with one mmap.find pass over the key blob; records are
+only decoded for the entries that match, so opening a cache costs the same
+whatever its size.
+"""
+import mmap
+import os
+import struct
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from logger import log_warning
+
+MAGIC = b"APPC"
+VERSION = 3
+ENTRY_FIELDS = 4
+NAME_IS_KEY = 0xFFFFFFFF
+HEADER = struct.Struct("<4sIIII")
+
+
+def _key(name: str) -> bytes:
+    return name.lower().encode("utf-8")
+
+
+def _split_path(path: str) -> Tuple[str, str]:
+    """Folder (with its trailing separator) and file name; joined back by plain concatenation."""
+    cut = max(path.rfind("\\"), path.rfind("/")) + 1
+    return path[:cut], path[cut:]
+
+
+def encode_app_cache(apps: Iterable[Dict[str, str]]) -> bytes:
+    """
+    Serializes {"Name", "Path"} records (with optional "Aliases" and
+    "Priority"); records missing either field are dropped.
+    """
+    strings: Dict[str, int] = {}
+
+    def intern(text: str) -> int:
+        if text not in strings:
+            strings[text] = len(strings)
+        return strings[text]
+
+    rows = []
+    for app in apps:
+        name, path = app.get("Name"), app.get("Path")
+        if not name or not path:
+            continue
+        folder, file = _split_path(path)
+        folder_id, file_id, priority = intern(folder), intern(file), int(app.get("Priority") or 0)
+        aliases = app.get("Aliases") or []
+        name_id = NAME_IS_KEY if not aliases and _key(name) == name.encode("utf-8") else intern(name)
+        for alias in [name, *aliases]:
+            # Within a key, higher priority first, then cache order
+            rows.append((_key(alias), -priority, len(rows), name_id, folder_id, file_id, priority))
+    rows.sort()
+
+    entries: List[int] = []
+    key_offsets, keys = [0], bytearray()
+    for key, _, _, *fields in rows:
+        entries += fields
+        keys += key + b"\n"
+        key_offsets.append(len(keys))
+
+    string_offsets, blob = [0], bytearray()
+    for text in strings:
+        blob += text.encode("utf-8")
+        string_offsets.append(len(blob))
+
+    return b"".join((
+        HEADER.pack(MAGIC, VERSION, len(rows), len(strings), len(keys)),
+        struct.pack(f"<{len(entries)}I", *entries),
+        struct.pack(f"<{len(key_offsets)}I", *key_offsets),
+        struct.pack(f"<{len(string_offsets)}I", *string_offsets),
+        bytes(keys),
+        bytes(blob),
+    ))
+
+
+def write_app_cache(path: str, apps: Iterable[Dict[str, str]]):
+    """Writes the binary cache next to a temp file and swaps it in."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(encode_app_cache(apps))
+    os.replace(tmp_path, path)
+
+
+class MappedAppCache:
+    """
+    Read-only view of a binary app cache. Indices are positions in key order.
+    Close it (or use it as a context manager) before the file is rewritten:
+    Windows refuses to replace a file that is still mapped.
+    """
+
+    def __init__(self, path: str):
+        self.file_path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, count, string_count, keys_size = HEADER.unpack_from(self._map)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"'{path}' is not a version {VERSION} app cache")
+            lengths = (ENTRY_FIELDS * count, count + 1, string_count + 1)
+            if HEADER.size + 4 * sum(lengths) + keys_size > len(self._map):
+                raise ValueError(f"'{path}' is truncated")
+            offset = HEADER.size
+            sections = []
+            # The sections keep the map exported; the view itself is released so close() can run
+            with memoryview(self._map) as view:
+                for length in lengths:
+                    sections.append(view[offset:offset + 4 * length].cast("I"))
+                    offset += 4 * length
+            self._entries, self._key_offsets, self._string_offsets = sections
+            self._keys_start = offset
+            self._strings_start = offset + keys_size
+            if self._key_offsets[-1] != keys_size or self._strings_start + self._string_offsets[-1] > len(self._map):
+                raise ValueError(f"'{path}' is truncated")
+        except (struct.error, TypeError, ValueError):
+            self.close()
+            raise
+        self._count = count
+
+    def close(self):
+        for name in ("_entries", "_key_offsets", "_string_offsets"):
+            view = self.__dict__.pop(name, None)
+            if view is not None:
+                view.release()
+        if not self._map.closed:
+            self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        """Indexed names, aliases included."""
+        return self._count
+
+    # --- Decoding single entries ---
+    def _string(self, string_id: int) -> str:
+        start = self._strings_start + self._string_offsets[string_id]
+        end = self._strings_start + self._string_offsets[string_id + 1]
+        return self._map[start:end].decode("utf-8")
+
+    def key(self, index: int) -> bytes:
+        start = self._keys_start + self._key_offsets[index]
+        return self._map[start:self._keys_start + self._key_offsets[index + 1] - 1]
+
+    def name(self, index: int) -> str:
+        string_id = self._entries[ENTRY_FIELDS * index]
+        return self.key(index).decode("utf-8") if string_id == NAME_IS_KEY else self._string(string_id)
+
+    def path(self, index: int) -> str:
+        base = ENTRY_FIELDS * index
+        return self._string(self._entries[base + 1]) + self._string(self._entries[base + 2])
+
+    def priority(self, index: int) -> int:
+        return self._entries[ENTRY_FIELDS * index + 3]
+
+    def record(self, index: int) -> Dict[str, object]:
+        return {"Name": self.name(index), "Path": self.path(index), "Priority": self.priority(index)}
+
+    def __iter__(self) -> Iterator[Dict[str, object]]:
+        """One record per distinct (name, path); the other (lowercase) names it is indexed under are its Aliases."""
+        records: Dict[tuple, Dict[str, object]] = {}
+        for index in range(self._count):
+            # By decoded name: NAME_IS_KEY entries of different apps share one id
+            entry = (self.name(index), self._entries[ENTRY_FIELDS * index + 1], self._entries[ENTRY_FIELDS * index + 2])
+            record = records.get(entry)
+            if record is None:
+                record = records[entry] = dict(self.record(index), Aliases=[])
+            key = self.key(index).decode("utf-8")
+            if key != record["Name"].lower():
+                record["Aliases"].append(key)
+        return iter(records.values())
+
+    # --- Lookups ---
+    def _bisect(self, query: bytes, upper: bool, prefix: bool = False) -> int:
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            key = self.key(middle)
+            if prefix:
+                key = key[:len(query)]
+            if key < query or (upper and key == query):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def exact(self, name: str) -> range:
+        """Indices whose lowercase name equals name.lower()."""
+        query = _key(name)
+        return range(self._bisect(query, False), self._bisect(query, True))
+
+    def prefix(self, name: str) -> range:
+        """Indices whose lowercase name starts with name.lower(), in key order."""
+        query = _key(name)
+        return range(self._bisect(query, False, True), self._bisect(query, True, True))
+
+    def containing(self, name: str) -> Iterator[int]:
+        """Indices whose lowercase name contains name.lower(), in key order."""
+        query = _key(name)
+        if not query or b"\n" in query:
+            return
+        end = self._strings_start
+        position = self._map.find(query, self._keys_start, end)
+        index = 0
+        while position >= 0:
+            relative = position - self._keys_start
+            # Key offsets are sorted, so the entry holding the hit is found by searching forward
+            low, high = index, self._count
+            while low < high:
+                middle = (low + high) // 2
+                if self._key_offsets[middle + 1] <= relative:
+                    low = middle + 1
+                else:
+                    high = middle
+            index = low
+            yield index
+            # Continue after this key; one hit per entry
+            position = self._map.find(query, self._keys_start + self._key_offsets[index + 1], end)
+
+
+def read_app_cache(path: str) -> Optional[MappedAppCache]:
+    """Maps the cache at path; None if it is missing or not a readable cache."""
+    try:
+        return MappedAppCache(path)
+    except (OSError, ValueError, struct.error) as e:
+        if not isinstance(e, FileNotFoundError):
+            log_warning(f"Ignoring app cache '{path}': {e}")
+        return None
+
+
+def app_cache_to_json(path: str) -> List[Dict[str, str]]:
+    """The records of a binary cache, for tools that still read apps_cache.json."""
+    with MappedAppCache(path) as cache:
+        return list(cache)
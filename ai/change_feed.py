@@ -0,0 +1,424 @@
+# change_feed.py
+"""
+Filesystem change feed: created / modified / deleted events for everything
+under a set of root folders, delivered in batches to subscribers such as the
+filename index, the content index and the workspace listing.
+
+On Linux the feed uses inotify (through ctypes, one watch per folder), so
+changes arrive within a fraction of a second at no cost while nothing
+happens. Elsewhere, or when inotify is unavailable or out of watches, it
+polls: every poll_interval it takes an (mtime, size) snapshot of the tree
+with os.scandir and publishes the differences.
+
+Events for one path within a batch are coalesced (created then modified is
+still "created", created then deleted is dropped). A "rescan" event means
+events were lost (inotify queue overflow) and subscribers should refresh
+from disk.
+"""
+import ctypes
+import ctypes.util
+import errno
+import os
+import platform
+import select
+import stat
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from file_walker import IGNORE_PATTERNS, IgnoreRules
+from logger import log_info, log_warning
+
+CREATED, MODIFIED, DELETED, RESCAN = "created", "modified", "deleted", "rescan"
+# Batches are published once events stop arriving for DEBOUNCE_SECONDS, or after MAX_BATCH_DELAY_SECONDS
+DEBOUNCE_SECONDS = 0.1
+MAX_BATCH_DELAY_SECONDS = 1.0
+
+# inotify(7)
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_EXCL_UNLINK = 0x04000000
+IN_ISDIR = 0x40000000
+WATCH_MASK = (IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+              | IN_ONLYDIR | IN_DONT_FOLLOW | IN_EXCL_UNLINK)
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class ChangeEvent(NamedTuple):
+    kind: str
+    path: str
+    is_dir: bool
+
+
+Subscriber = Callable[[List[ChangeEvent]], None]
+
+
+def _merge(pending: Dict[str, ChangeEvent], event: ChangeEvent):
+    """Coalesces event into the pending batch, keyed by path."""
+    previous = pending.get(event.path)
+    if previous is None:
+        pending[event.path] = event
+    elif previous.kind == CREATED and event.kind == DELETED:
+        del pending[event.path]
+    elif previous.kind == CREATED and event.kind == MODIFIED:
+        return
+    elif previous.kind == DELETED and event.kind == CREATED:
+        pending[event.path] = ChangeEvent(MODIFIED, event.path, event.is_dir)
+    else:
+        pending[event.path] = event
+
+
+class _Inotify:
+    """Minimal ctypes binding: one non-blocking inotify descriptor."""
+
+    def __init__(self):
+        if platform.system() != "Linux":
+            raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def add_watch(self, path: str) -> int:
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            code = ctypes.get_errno()
+            raise OSError(code, os.strerror(code), path)
+        return wd
+
+    def rm_watch(self, wd: int):
+        self.libc.inotify_rm_watch(self.fd, wd)
+
+    def read(self) -> List[Tuple[int, int, str]]:
+        """(wd, mask, name) of the queued events."""
+        try:
+            data = os.read(self.fd, 256 * 1024)
+        except BlockingIOError:
+            return []
+        events, offset = [], 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            events.append((wd, mask, name))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class ChangeFeed:
+    """Watches root folders and publishes batches of ChangeEvents to subscribers."""
+
+    def __init__(self, roots: Iterable[Path], ignore: Iterable[str] = IGNORE_PATTERNS,
+                 exclude: Iterable[Path] = (), poll_interval: float = 2.0, use_inotify: bool = True):
+        self.roots = [os.path.abspath(str(root)) for root in roots]
+        self.ignored = ignore if isinstance(ignore, IgnoreRules) else IgnoreRules(ignore)
+        # Folders whose changes are never reported, e.g. where the indexes keep their databases
+        self.excluded = [os.path.abspath(str(path)) for path in exclude]
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.backend: Optional[str] = None
+        self._subscribers: List[Subscriber] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._wake: Optional[int] = None  # Write end of the pipe that interrupts the inotify select()
+
+    # --- Subscribers ---
+    def subscribe(self, callback: Subscriber):
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Subscriber):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def _publish(self, events: List[ChangeEvent]):
+        if not events:
+            return
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(events)
+            except Exception as e:
+                log_warning(f"Change feed subscriber {getattr(callback, '__qualname__', callback)} failed: {e}")
+
+    # --- Paths ---
+    @staticmethod
+    def _is_under(path: str, folder: str) -> bool:
+        return path == folder or path.startswith(folder.rstrip(os.sep) + os.sep)
+
+    def covers(self, path: str) -> bool:
+        """True when changes to path are reported by this feed."""
+        path = os.path.abspath(str(path))
+        return any(self._is_under(path, root) for root in self.roots) and not self._excluded(path)
+
+    def _excluded(self, path: str) -> bool:
+        return any(self._is_under(path, folder) for folder in self.excluded)
+
+    def _wanted(self, path: str) -> bool:
+        return not self.ignored(os.path.basename(path)) and not self._excluded(path)
+
+    # --- Lifecycle ---
+    def start(self) -> "ChangeFeed":
+        """Starts watching on a daemon thread (inotify when possible, else polling)."""
+        if self._thread is not None and self._thread.is_alive():
+            return self
+        self._stop.clear()
+        # Watches (or the first snapshot) are set up before returning, so changes made right after start() are reported
+        inotify = self._start_inotify() if self.use_inotify else None
+        if inotify is not None:
+            self.backend = "inotify"
+            self._thread = threading.Thread(target=self._run_inotify, args=inotify, name="change-feed", daemon=True)
+        else:
+            self.backend = "polling"
+            self._thread = threading.Thread(target=self._run_polling, args=(self.snapshot(),), name="change-feed",
+                                            daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        wake = self._wake
+        if wake is not None:
+            try:
+                os.write(wake, b"x")
+            except OSError:
+                pass
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        self._thread = None
+
+    # --- inotify backend ---
+    def _watch_tree(self, inotify: _Inotify, watches: Dict[int, str], folder: str,
+                    found: Optional[List[ChangeEvent]] = None):
+        """
+        Watches folder and its subfolders. Entries already inside are added to
+        found, since they may have been created before the watch existed.
+        """
+        pending = [folder]
+        while pending:
+            current = pending.pop()
+            try:
+                watches[inotify.add_watch(current)] = current
+                with os.scandir(current) as it:
+                    for entry in it:
+                        if not self._wanted(entry.path):
+                            continue
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                        if found is not None:
+                            found.append(ChangeEvent(CREATED, entry.path, is_dir))
+                        if is_dir:
+                            pending.append(entry.path)
+            except OSError as e:
+                if e.errno == errno.ENOSPC:
+                    raise
+                continue
+
+    def _unwatch_tree(self, inotify: _Inotify, watches: Dict[int, str], folder: str):
+        for wd, path in list(watches.items()):
+            if self._is_under(path, folder):
+                inotify.rm_watch(wd)
+                del watches[wd]
+
+    def _start_inotify(self) -> Optional[Tuple[_Inotify, Dict[int, str], int]]:
+        """(inotify, {wd: folder}, wake pipe read end) watching every root, or None to poll instead."""
+        try:
+            inotify = _Inotify()
+        except (OSError, AttributeError) as e:
+            log_info(f"inotify unavailable ({e}); the change feed will poll every {self.poll_interval:g}s.")
+            return None
+        watches: Dict[int, str] = {}
+        wake_read, self._wake = os.pipe()
+        try:
+            for root in self.roots:
+                if os.path.isdir(root):
+                    self._watch_tree(inotify, watches, root)
+        except OSError as e:
+            # Out of watches (fs.inotify.max_user_watches)
+            log_warning(f"inotify could not watch every folder ({e}); the change feed will poll instead.")
+            self._close_inotify(inotify, wake_read)
+            return None
+        log_info(f"Change feed watching {len(watches)} folders with inotify.")
+        return inotify, watches, wake_read
+
+    def _run_inotify(self, inotify: _Inotify, watches: Dict[int, str], wake_read: int):
+        pending: Dict[str, ChangeEvent] = {}
+        first_at = 0.0
+        try:
+            while not self._stop.is_set():
+                ready, _, _ = select.select([inotify.fd, wake_read], [], [], DEBOUNCE_SECONDS if pending else None)
+                if wake_read in ready:
+                    break
+                if inotify.fd in ready:
+                    if not pending:
+                        first_at = time.monotonic()
+                    for event in self._translate(inotify, watches, inotify.read()):
+                        _merge(pending, event)
+                if pending and (not ready or time.monotonic() - first_at >= MAX_BATCH_DELAY_SECONDS):
+                    batch, pending = list(pending.values()), {}
+                    self._publish(batch)
+        except OSError as e:
+            log_warning(f"Change feed stopped: {e}")
+        finally:
+            self._close_inotify(inotify, wake_read)
+
+    def _close_inotify(self, inotify: _Inotify, wake_read: int):
+        inotify.close()
+        os.close(wake_read)
+        os.close(self._wake)
+        self._wake = None
+
+    def _translate(self, inotify: _Inotify, watches: Dict[int, str],
+                   raw_events: List[Tuple[int, int, str]]) -> List[ChangeEvent]:
+        events = []
+        for wd, mask, name in raw_events:
+            if mask & IN_Q_OVERFLOW:
+                events += [ChangeEvent(RESCAN, root, True) for root in self.roots]
+                continue
+            if mask & IN_IGNORED:
+                watches.pop(wd, None)
+                continue
+            folder = watches.get(wd)
+            if folder is None or not name:
+                continue
+            path = os.path.join(folder, name)
+            if not self._wanted(path):
+                continue
+            is_dir = bool(mask & IN_ISDIR)
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                events.append(ChangeEvent(CREATED, path, is_dir))
+                if is_dir:
+                    try:
+                        self._watch_tree(inotify, watches, path, events)
+                    except OSError as e:
+                        log_warning(f"Could not watch {path}: {e}")
+                        events.append(ChangeEvent(RESCAN, path, True))
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                events.append(ChangeEvent(DELETED, path, is_dir))
+                if is_dir:
+                    self._unwatch_tree(inotify, watches, path)
+            elif mask & (IN_CLOSE_WRITE | IN_ATTRIB) and not is_dir:
+                events.append(ChangeEvent(MODIFIED, path, False))
+        return events
+
+    # --- Polling backend ---
+    def snapshot(self) -> Dict[str, Tuple[int, int, bool]]:
+        """{path: (mtime_ns, size, is_dir)} of everything under the roots."""
+        found = {}
+        pending = [root for root in self.roots if os.path.isdir(root)]
+        while pending:
+            folder = pending.pop()
+            try:
+                with os.scandir(folder) as it:
+                    for entry in it:
+                        if not self._wanted(entry.path):
+                            continue
+                        try:
+                            info = entry.stat(follow_symlinks=False)
+                            is_dir = entry.is_dir(follow_symlinks=False)
+                        except OSError:
+                            continue
+                        found[entry.path] = (info.st_mtime_ns, info.st_size, is_dir)
+                        if is_dir:
+                            pending.append(entry.path)
+            except OSError:
+                continue
+        return found
+
+    @staticmethod
+    def diff(before: Dict[str, Tuple[int, int, bool]], after: Dict[str, Tuple[int, int, bool]]) -> List[ChangeEvent]:
+        events = [ChangeEvent(DELETED, path, state[2]) for path, state in before.items() if path not in after]
+        for path, state in after.items():
+            old = before.get(path)
+            if old is None:
+                events.append(ChangeEvent(CREATED, path, state[2]))
+            elif old[2] != state[2]:
+                events += [ChangeEvent(DELETED, path, old[2]), ChangeEvent(CREATED, path, state[2])]
+            elif old != state and not state[2]:
+                events.append(ChangeEvent(MODIFIED, path, False))
+        return events
+
+    def _run_polling(self, previous: Dict[str, Tuple[int, int, bool]]):
+        log_info(f"Change feed polling {len(previous)} entries every {self.poll_interval:g}s.")
+        while not self._stop.wait(self.poll_interval):
+            current = self.snapshot()
+            self._publish(self.diff(previous, current))
+            previous = current
+
+
+class DirectoryListing:
+    """
+    The files directly inside one folder, with their size and mtime. Read once
+    with os.scandir, then kept current from a ChangeFeed's events, so a
+    listing costs no disk access.
+    """
+
+    def __init__(self, folder: Path, ignore: Iterable[str] = IGNORE_PATTERNS):
+        self.folder = os.path.abspath(str(folder))
+        self.ignored = ignore if isinstance(ignore, IgnoreRules) else IgnoreRules(ignore)
+        self._files: Dict[str, Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+        self.reload()
+
+    def reload(self):
+        files = {}
+        try:
+            with os.scandir(self.folder) as it:
+                for entry in it:
+                    if self.ignored(entry.name):
+                        continue
+                    try:
+                        if entry.is_file(follow_symlinks=False):
+                            info = entry.stat(follow_symlinks=False)
+                            files[entry.name] = (info.st_size, info.st_mtime)
+                    except OSError:
+                        continue
+        except OSError as e:
+            log_warning(f"Could not list {self.folder}: {e}")
+        with self._lock:
+            self._files = files
+
+    def apply_changes(self, events: List[ChangeEvent]):
+        """ChangeFeed subscriber: one stat() per changed file of this folder."""
+        if any(event.kind == RESCAN for event in events):
+            self.reload()
+            return
+        for event in events:
+            if not event.is_dir:
+                self.note_change(event.path)
+
+    def note_change(self, path: Path):
+        """Restats one file of this folder after it was written or deleted."""
+        path = os.path.abspath(str(path))
+        name = os.path.basename(path)
+        if os.path.dirname(path) != self.folder or self.ignored(name):
+            return
+        try:
+            info = os.stat(path, follow_symlinks=False)
+        except OSError:
+            info = None
+        with self._lock:
+            if info is None or not stat.S_ISREG(info.st_mode):
+                self._files.pop(name, None)
+            else:
+                self._files[name] = (info.st_size, info.st_mtime)
+
+    def files(self) -> List[Tuple[str, int, float]]:
+        """(name, size, mtime) of every file, sorted by name."""
+        with self._lock:
+            return sorted((name, size, mtime) for name, (size, mtime) in self._files.items())
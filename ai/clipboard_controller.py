@@ -1,4 +1,5 @@
 # clipboard_controller.py
+import asyncio
 import pyperclip
 from logger import log_info, log_error
 
@@ -26,4 +27,11 @@ class ClipboardController:
             return f"I have copied '{text}' to your clipboard."
         except Exception as e:
             log_error(f"Clipboard write error: {e}")
-            return "Sorry, I couldn't write to the clipboard."
\ No newline at end of file
+            return "Sorry, I couldn't write to the clipboard."
+
+    async def read_clipboard_async(self) -> str:
+        # pyperclip shells out to xclip/pbpaste on some platforms
+        return await asyncio.to_thread(self.read_clipboard)
+
+    async def write_to_clipboard_async(self, text: str) -> str:
+        return await asyncio.to_thread(self.write_to_clipboard, text)
\ No newline at end of file
@@ -7,10 +7,38 @@ class Config:
     WORKSPACE_DIR = Path.home() / "JARVIS_Workspace"
     LOG_FILE = "jarvis.log"
     HISTORY_FILE = "command_history.json"
+    ANALYSIS_CACHE_FILE = "analysis_cache.json"
+    INTENT_MODEL_FILE = "intent_model.json"
+    INTENT_TRAINING_LOG = "intent_training.jsonl"
     
     # AI and Search Settings
+    GEMINI_MODEL = "gemini-1.5-flash-latest"
+    STRUCTURED_OUTPUT = True  # Schema-constrained JSON replies for command analysis
     MAX_SEARCH_RESULTS = 10
+    FILE_INDEX_FILE = ".index/file_index.sqlite3"  # Filename index used by file searches (hidden from listings)
+    FILE_INDEX_MAX_AGE_SECONDS = 5 * 60  # Older indexes are refreshed in the background
+    CONTENT_INDEX_FILE = ".index/content_index.sqlite3"  # Full-text index of workspace documents
+    CHANGE_FEED_POLL_SECONDS = 2.0  # Snapshot interval where inotify is unavailable
+    FILE_SEARCH_IGNORE = [".*", "node_modules", "__pycache__", "site-packages", "venv", "env", "AppData", "Library"]  # Names file searches neither match nor enter
     MAX_HISTORY_ENTRIES = 100
+    ANALYSIS_BATCH_SIZE = 20  # Commands per Gemini call in analyze_many
+    
+    # LLM gateway (shared by every assistant)
+    LLM_DEADLINE_SECONDS = 30
+    LLM_HEDGE_AFTER_SECONDS = 2.5  # Only used where a second provider is configured
+    LLM_BREAKER_FAILURES = 5
+    LLM_BREAKER_RESET_SECONDS = 30
+    OLLAMA_URL = "http://localhost:11434"
+    
+    # Command analysis cache (repeated commands skip the Gemini round trip)
+    ANALYSIS_CACHE_MAX_ENTRIES = 256
+    ANALYSIS_CACHE_TTL_SECONDS = 24 * 60 * 60
+    
+    # Fast analysis tiers (answers at or above these confidences never wait for Gemini)
+    RULE_CONFIDENCE_BAR = 0.9
+    LOCAL_CLASSIFIER_THRESHOLD = 0.85
+    SPECULATIVE_ANALYSIS = True  # Start Gemini alongside the fast tiers when they run slow
+    SPECULATE_AFTER_MS = 20  # Fast-tier time without an answer before Gemini is started early
     
     # Supported file formats for creation
     SUPPORTED_FORMATS = ['docx', 'xlsx', 'pdf', 'txt', 'py', 'json', 'csv']
@@ -41,4 +69,23 @@ class Config:
 
     # ElevenLabs Voice Settings
     # Find your Voice ID on the ElevenLabs website -> Voices -> My Voices
-    ELEVENLABS_VOICE_ID = 'JBFqnCBsd6RMkjVDRZzb' # e.g., '21m00Tcm4TlvDq8ikWAM'
\ No newline at end of file
+    ELEVENLABS_VOICE_ID = 'JBFqnCBsd6RMkjVDRZzb' # e.g., '21m00Tcm4TlvDq8ikWAM'
+    ELEVENLABS_MODEL_ID = "eleven_turbo_v2"  # Faster model
+    ELEVENLABS_VOICE_SETTINGS = {
+        "stability": 0.5,
+        "similarity_boost": 0.5,
+        "style": 0.0,
+        "use_speaker_boost": False
+    }
+
+    # Speech cache (phrases already synthesized play without an ElevenLabs call)
+    TTS_CACHE_DIR = ".cache/tts"  # Inside the workspace, hidden from listings
+    TTS_CACHE_MAX_MB = 50
+    TTS_PREWARM = True  # Synthesize fixed replies (help, errors) in the background at startup
+    TTS_SYNTH_WORKERS = 2  # Chunks synthesized in parallel while earlier ones play
+    TTS_LOOKAHEAD_CHUNKS = 3  # How far synthesis may run ahead of playback
+    TTS_STREAMING = True  # Play raw PCM as it arrives (needs sounddevice); otherwise MP3 clips via pygame
+    TTS_PCM_SAMPLE_RATE = 22050  # Requested as ElevenLabs output format pcm_<rate>
+    TTS_MP3_FORMAT = "mp3_44100_128"
+    SPEECH_CHUNK_MIN_CHARS = 20  # Streamed replies are voiced in chunks of this many characters or more...
+    SPEECH_CHUNK_MAX_CHARS = 200  # ...and cut at a clause break when a sentence runs longer
\ No newline at end of file
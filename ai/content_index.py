@@ -0,0 +1,371 @@
+# content_index.py
+"""
+Full-text index of workspace documents, for commands like "find the document
+about solar panels".
+
+Text is extracted from plain-text files (.txt, .md, .py, .json, .csv), Word
+documents (python-docx), Excel workbooks (openpyxl) and PDFs (pypdf, or a
+small built-in reader for the text streams FPDF writes). Each document is
+tokenized into lowercase words with simple plural folding, and the term
+counts are stored as postings in SQLite. A search reads only the postings of
+its query terms and ranks the documents with BM25.
+
+update() is incremental: a file whose mtime and size are unchanged is not
+read again, so a refresh costs one stat() per document. note_change()
+re-indexes a single file right after FileManager writes or deletes it, and
+apply_changes() does the same for the events of a ChangeFeed.
+"""
+import heapq
+import json
+import math
+import os
+import re
+import sqlite3
+import time
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from change_feed import DELETED, RESCAN, ChangeEvent
+from file_index import SQLiteIndex
+from file_walker import IGNORE_PATTERNS, IgnoreRules
+from logger import log_info, log_warning
+
+try:
+    import docx
+    DOCX_AVAILABLE = True
+except ImportError:
+    DOCX_AVAILABLE = False
+
+try:
+    from openpyxl import load_workbook
+    EXCEL_AVAILABLE = True
+except ImportError:
+    EXCEL_AVAILABLE = False
+
+try:
+    from pypdf import PdfReader
+    PDF_READER_AVAILABLE = True
+except ImportError:
+    PDF_READER_AVAILABLE = False
+
+# BM25 parameters (the usual defaults)
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Generated files are named after their topic, so words in the file name count this many times
+NAME_WEIGHT = 3
+MAX_DOCUMENT_BYTES = 20 * 1024 * 1024
+MAX_TEXT_CHARS = 2_000_000
+MAX_TERM_LENGTH = 40
+
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+STOP_WORDS = frozenset(
+    "a an and are as at be but by for from has have he her his i in is it its me my of on or our she so "
+    "that the their them they this to was we were what when which who will with you your".split()
+)
+
+CONTENT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    length INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    doc_id INTEGER NOT NULL,
+    tf INTEGER NOT NULL,
+    PRIMARY KEY (term, doc_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_by_document ON postings (doc_id);
+"""
+
+
+def fold_plural(word: str) -> str:
+    """Folds simple English plurals, so "panels" finds "panel" and "batteries" finds "battery"."""
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """Index terms of text, in order; queries and documents go through the same steps."""
+    return [fold_plural(word) for word in TOKEN_PATTERN.findall(text.lower())
+            if len(word) > 1 and len(word) <= MAX_TERM_LENGTH and word not in STOP_WORDS]
+
+
+# --- Text extraction ---
+def _read_text(path: str) -> str:
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        return f.read(MAX_TEXT_CHARS)
+
+
+def _json_strings(value: Any) -> Iterable[str]:
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield str(key)
+            yield from _json_strings(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _json_strings(item)
+    elif value is not None:
+        yield str(value)
+
+
+def _read_json(path: str) -> str:
+    try:
+        with open(path, "r", encoding="utf-8-sig") as f:
+            return "\n".join(_json_strings(json.load(f)))
+    except ValueError:
+        return _read_text(path)
+
+
+def _read_docx(path: str) -> str:
+    document = docx.Document(path)
+    parts = [paragraph.text for paragraph in document.paragraphs]
+    for table in document.tables:
+        for row in table.rows:
+            parts += [cell.text for cell in row.cells]
+    return "\n".join(parts)
+
+
+def _read_xlsx(path: str) -> str:
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        parts = []
+        for sheet in workbook.worksheets:
+            parts.append(sheet.title)
+            for row in sheet.iter_rows(values_only=True):
+                parts += [str(value) for value in row if value is not None]
+        return "\n".join(parts)
+    finally:
+        workbook.close()
+
+
+PDF_STREAM = re.compile(rb"stream\r?\n(.*?)\r?\nendstream", re.S)
+PDF_SHOWN_TEXT = re.compile(rb"\((?:\\.|[^\\)])*\)\s*(?:Tj|')|\[(?:\\.|[^\]\\])*\]\s*TJ", re.S)
+PDF_STRING = re.compile(rb"\(((?:\\.|[^\\)])*)\)", re.S)
+PDF_ESCAPE = re.compile(rb"\\([0-7]{1,3}|.)", re.S)
+PDF_ESCAPES = {b"n": b"\n", b"r": b"\r", b"t": b"\t", b"b": b"\b", b"f": b"\f"}
+
+
+def _unescape_pdf_string(raw: bytes) -> bytes:
+    def replace(match):
+        code = match.group(1)
+        if code[:1].isdigit():
+            return bytes([int(code, 8) & 0xFF])
+        return PDF_ESCAPES.get(code, code)
+    return PDF_ESCAPE.sub(replace, raw)
+
+
+def _read_pdf_streams(path: str) -> str:
+    """
+    Text shown by the Tj/TJ operators of the (Flate or uncompressed) content
+    streams; enough for the single-font PDFs FPDF writes when pypdf is missing.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    lines = []
+    for stream in PDF_STREAM.finditer(data):
+        content = stream.group(1)
+        try:
+            content = zlib.decompress(content)
+        except zlib.error:
+            pass
+        if b"BT" not in content:
+            continue
+        for shown in PDF_SHOWN_TEXT.finditer(content):
+            text = b"".join(_unescape_pdf_string(raw) for raw in PDF_STRING.findall(shown.group(0)))
+            lines.append(text.decode("cp1252", errors="replace"))
+    return "\n".join(lines)
+
+
+def _read_pdf(path: str) -> str:
+    if not PDF_READER_AVAILABLE:
+        return _read_pdf_streams(path)
+    reader = PdfReader(path)
+    return "\n".join(page.extract_text() or "" for page in reader.pages)
+
+
+EXTRACTORS: Dict[str, Callable[[str], str]] = {
+    ".txt": _read_text,
+    ".md": _read_text,
+    ".py": _read_text,
+    ".csv": _read_text,
+    ".json": _read_json,
+    ".pdf": _read_pdf,
+}
+if DOCX_AVAILABLE:
+    EXTRACTORS[".docx"] = _read_docx
+if EXCEL_AVAILABLE:
+    EXTRACTORS[".xlsx"] = _read_xlsx
+
+
+def extract_text(path: str) -> str:
+    """Text of a supported document, or "" if its type is unsupported or it cannot be read."""
+    extractor = EXTRACTORS.get(os.path.splitext(path)[1].lower())
+    if extractor is None:
+        return ""
+    try:
+        return extractor(path)[:MAX_TEXT_CHARS]
+    except Exception as e:
+        log_warning(f"Could not extract text from {path}: {e}")
+        return ""
+
+
+class ContentIndex(SQLiteIndex):
+    """BM25-ranked full-text index of the documents under a set of root folders."""
+    SCHEMA = CONTENT_SCHEMA
+    NAME = "content index"
+
+    def __init__(self, db_path: Path, roots: Iterable[Path], ignore: Iterable[str] = IGNORE_PATTERNS):
+        super().__init__(db_path, roots)
+        self.ignored = IgnoreRules(ignore)
+
+    @staticmethod
+    def indexable(path: str) -> bool:
+        return os.path.splitext(path)[1].lower() in EXTRACTORS
+
+    # --- Building ---
+    def _documents_on_disk(self) -> Dict[str, Tuple[float, int]]:
+        """{path: (mtime, size)} of every indexable document under the roots."""
+        found = {}
+        for root in self.roots:
+            for folder, dirnames, filenames in os.walk(root):
+                dirnames[:] = [name for name in dirnames if not self.ignored(name)]
+                for name in filenames:
+                    path = os.path.join(folder, name)
+                    if self.ignored(name) or not self.indexable(path):
+                        continue
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    if stat.st_size <= MAX_DOCUMENT_BYTES:
+                        found[path] = (stat.st_mtime, stat.st_size)
+        return found
+
+    def _store_document(self, conn: sqlite3.Connection, path: str, mtime: float, size: int,
+                        doc_id: Optional[int]) -> int:
+        """(Re)indexes one document; returns its number of distinct terms."""
+        terms = Counter(tokenize(extract_text(path)))
+        for term in tokenize(Path(path).stem):
+            terms[term] += NAME_WEIGHT
+        length = sum(terms.values())
+        if doc_id is None:
+            doc_id = conn.execute("INSERT INTO documents (path, mtime, size, length) VALUES (?, ?, ?, ?)",
+                                  (path, mtime, size, length)).lastrowid
+        else:
+            conn.execute("UPDATE documents SET mtime = ?, size = ?, length = ? WHERE id = ?",
+                         (mtime, size, length, doc_id))
+            conn.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+        conn.executemany("INSERT INTO postings (term, doc_id, tf) VALUES (?, ?, ?)",
+                         [(term, doc_id, count) for term, count in terms.items()])
+        return len(terms)
+
+    def _forget_document(self, conn: sqlite3.Connection, doc_id: int):
+        conn.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+        conn.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
+
+    def update(self, full: bool = False) -> Dict[str, float]:
+        """
+        Brings the index up to date with the disk; full=True re-reads every
+        document. Returns counts of documents indexed, unchanged and removed,
+        and the time taken.
+        """
+        with self._update_lock:
+            start = time.perf_counter()
+            conn = self._connect()
+            known = {path: (doc_id, mtime, size) for doc_id, path, mtime, size in
+                     conn.execute("SELECT id, path, mtime, size FROM documents")}
+            on_disk = self._documents_on_disk()
+            report = {"indexed": 0, "unchanged": 0, "removed": 0, "terms": 0}
+            with conn:
+                for path, (mtime, size) in on_disk.items():
+                    doc_id, stored_mtime, stored_size = known.get(path, (None, None, None))
+                    if doc_id is not None and (stored_mtime, stored_size) == (mtime, size) and not full:
+                        report["unchanged"] += 1
+                        continue
+                    report["terms"] += self._store_document(conn, path, mtime, size, doc_id)
+                    report["indexed"] += 1
+                for path, (doc_id, _, _) in known.items():
+                    if path not in on_disk and self._under_roots(path):
+                        self._forget_document(conn, doc_id)
+                        report["removed"] += 1
+                self._mark_updated(conn)
+            report["seconds"] = round(time.perf_counter() - start, 4)
+            log_info(f"Content index updated in {report['seconds']:.2f}s: {report['indexed']} documents indexed, "
+                     f"{report['unchanged']} unchanged, {report['removed']} removed.")
+            return report
+
+    def note_change(self, path: Path):
+        """Re-indexes (or drops) one document after this process wrote or deleted it."""
+        path = os.path.abspath(str(path))
+        if not self.indexable(path) or not self._under_roots(path):
+            return
+        with self._update_lock:
+            conn = self._connect()
+            row = conn.execute("SELECT id, mtime, size FROM documents WHERE path = ?", (path,)).fetchone()
+            with conn:
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    if row:
+                        self._forget_document(conn, row[0])
+                    return
+                if row and (row[1], row[2]) == (stat.st_mtime, stat.st_size):
+                    return
+                if stat.st_size <= MAX_DOCUMENT_BYTES:
+                    self._store_document(conn, path, stat.st_mtime, stat.st_size, row[0] if row else None)
+
+    def apply_changes(self, events: List[ChangeEvent]):
+        """ChangeFeed subscriber: re-reads changed documents and drops deleted ones."""
+        if any(event.kind == RESCAN for event in events):
+            self.update_in_background()
+            return
+        for event in events:
+            if not event.is_dir:
+                self.note_change(event.path)
+            elif event.kind == DELETED:
+                with self._update_lock:
+                    conn = self._connect()
+                    with conn:
+                        for doc_id, _ in self._paths_under(conn, "documents", event.path):
+                            self._forget_document(conn, doc_id)
+
+    # --- Searching ---
+    def search(self, query: str, limit: int = 10) -> List[Tuple[Path, float]]:
+        """(path, BM25 score) of the documents best matching query, best first."""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        conn = self._connect()
+        count, total_length = conn.execute("SELECT COUNT(*), TOTAL(length) FROM documents").fetchone()
+        if not count:
+            return []
+        average_length = total_length / count or 1.0
+
+        placeholders = ", ".join("?" * len(terms))
+        postings = conn.execute(f"SELECT p.term, p.doc_id, p.tf, d.length FROM postings p "
+                                f"JOIN documents d ON d.id = p.doc_id WHERE p.term IN ({placeholders})",
+                                terms).fetchall()
+        frequency = Counter(term for term, _, _, _ in postings)
+        idf = {term: math.log(1 + (count - df + 0.5) / (df + 0.5)) for term, df in frequency.items()}
+        scores: Dict[int, float] = {}
+        for term, doc_id, tf, length in postings:
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+            scores[doc_id] = scores.get(doc_id, 0.0) + idf[term] * tf * (BM25_K1 + 1) / (tf + norm)
+
+        results = []
+        # A few spares in case files were deleted behind the index's back
+        for doc_id, score in heapq.nlargest(limit * 2, scores.items(), key=lambda item: item[1]):
+            row = conn.execute("SELECT path FROM documents WHERE id = ?", (doc_id,)).fetchone()
+            if row and self._under_roots(row[0]) and os.path.exists(row[0]):
+                results.append((Path(row[0]), round(score, 3)))
+                if len(results) >= limit:
+                    break
+        return results
@@ -0,0 +1,118 @@
+# event_loop.py
+"""
+An asyncio event loop running on its own daemon thread, next to the Tk main
+loop. The GUI hands coroutines to `submit()` and collects their results on the
+Tk thread through `poll()`, so it never blocks on network calls or sleeps and
+several commands can be in flight at once. `post()` delivers progress (e.g.
+search hits) to the Tk thread the same way, and `iterate_in_thread()` turns a
+blocking generator into an async iterator.
+"""
+import asyncio
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, AsyncIterator, Callable, Coroutine, Iterator, TypeVar
+
+from logger import log_info, log_error
+
+T = TypeVar("T")
+
+
+class BackgroundLoop:
+    """Runs coroutines on a dedicated event loop thread."""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name="jarvis-asyncio", daemon=True)
+        self._completed: "queue.Queue[tuple[Callable[[Any], None], Future]]" = queue.Queue()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def start(self) -> "BackgroundLoop":
+        self._thread.start()
+        log_info("Background event loop started.")
+        return self
+
+    def submit(self, coro: Coroutine, on_done: Callable[[Any], None] | None = None) -> Future:
+        """
+        Schedules the coroutine on the loop. `on_done(result)` is queued for the
+        caller's thread and runs on the next `poll()`.
+        """
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        if on_done is not None:
+            future.add_done_callback(lambda f: self._completed.put((on_done, f)))
+        return future
+
+    def post(self, callback: Callable[[Any], None], value: Any):
+        """Queues `callback(value)` for the next `poll()`; safe to call from any thread."""
+        future: Future = Future()
+        future.set_result(value)
+        self._completed.put((callback, future))
+
+    def poll(self):
+        """Runs the callbacks of finished coroutines; call this from the GUI thread."""
+        while True:
+            try:
+                on_done, future = self._completed.get_nowait()
+            except queue.Empty:
+                return
+            if future.cancelled():
+                continue
+            error = future.exception()
+            if error is not None:
+                log_error(f"Background task failed: {error}")
+                continue
+            on_done(future.result())
+
+    def stop(self, timeout: float = 2.0):
+        if not self.loop.is_running():
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+        log_info("Background event loop stopped.")
+
+
+async def iterate_in_thread(iterator: Iterator[T], cancel: threading.Event) -> AsyncIterator[T]:
+    """
+    Runs a blocking iterator on a worker thread and yields its items as they
+    arrive, without blocking the event loop. Leaving early (break, task
+    cancellation) sets cancel, which the iterator should watch to stop its work.
+    """
+    loop = asyncio.get_running_loop()
+    items: asyncio.Queue = asyncio.Queue()
+    finished = object()
+
+    def send(item, error=None):
+        try:
+            loop.call_soon_threadsafe(items.put_nowait, (item, error))
+        except RuntimeError:
+            cancel.set()  # The loop is gone; nobody is listening
+
+    def pump():
+        try:
+            for item in iterator:
+                if cancel.is_set():
+                    break
+                send(item)
+        except Exception as e:
+            send(finished, e)
+            return
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+        send(finished)
+
+    loop.run_in_executor(None, pump)
+    try:
+        while True:
+            item, error = await items.get()
+            if item is finished:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        cancel.set()
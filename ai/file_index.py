@@ -0,0 +1,365 @@
+# file_index.py
+"""
+Persistent filename index for file searches, stored in SQLite.
+
+Every directory under the indexed roots is a row with its mtime, and every
+entry a row with its name. File names are also kept in an FTS5 table with the
+trigram tokenizer, so "*report*" and glob queries are answered from the index
+instead of walking the disk (a plain LIKE scan is used where SQLite lacks
+FTS5).
+
+update() is incremental: a directory whose mtime has not changed keeps its
+stored listing, and only its subdirectories are visited, so a refresh costs
+one stat() per directory unless something was added, removed or renamed.
+Following a ChangeFeed (follow()) keeps it current without rescans.
+Names matching the ignore rules (hidden entries and bulky tool folders, see
+file_walker.IGNORE_PATTERNS) are not indexed.
+"""
+import fnmatch
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from change_feed import DELETED, RESCAN, ChangeEvent, ChangeFeed
+from file_walker import IGNORE_PATTERNS, IgnoreRules
+from logger import log_info, log_warning
+
+GLOB_CHARS = re.compile(r"[*?\[]")
+
+META_SCHEMA = "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);"
+FILE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirs (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    mtime REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    dir_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    is_dir INTEGER NOT NULL,
+    UNIQUE (dir_id, name)
+);
+"""
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS names USING fts5(name, content='files', content_rowid='id', tokenize='trigram');
+CREATE TRIGGER IF NOT EXISTS files_insert AFTER INSERT ON files BEGIN
+    INSERT INTO names (rowid, name) VALUES (new.id, new.name);
+END;
+CREATE TRIGGER IF NOT EXISTS files_delete AFTER DELETE ON files BEGIN
+    INSERT INTO names (names, rowid, name) VALUES ('delete', old.id, old.name);
+END;
+"""
+
+
+def glob_to_like(pattern: str) -> str:
+    """
+    LIKE pattern matching a superset of the glob; the exact match is checked
+    with fnmatch. A [...] class and literal % or _ become "_" (any one
+    character): an ESCAPE clause would keep FTS5 from using the trigram index.
+    """
+    like = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "*":
+            like.append("%")
+        elif char == "?":
+            like.append("_")
+        elif char == "[":
+            j = i + 1
+            if pattern[j:j + 1] == "!":
+                j += 1
+            if pattern[j:j + 1] == "]":
+                j += 1
+            end = pattern.find("]", j)
+            if end < 0:
+                like.append("[")
+            else:
+                like.append("_")
+                i = end
+        elif char in "%_":
+            like.append("_")
+        else:
+            like.append(char)
+        i += 1
+    return "".join(like)
+
+
+class SQLiteIndex:
+    """
+    Shared plumbing of the on-disk indexes: per-thread connections, the time
+    of the last update() per root set, background refreshes, and following a
+    ChangeFeed. Subclasses set SCHEMA and implement update() and
+    apply_changes().
+    """
+    SCHEMA = ""
+    NAME = "index"
+
+    def __init__(self, db_path: Path, roots: Iterable[Path]):
+        self.db_path = Path(db_path)
+        self.roots = [os.path.abspath(str(root)) for root in roots]
+        self._local = threading.local()
+        self._update_lock = threading.Lock()
+        self._update_thread: Optional[threading.Thread] = None
+        self._live = False  # A change feed reports every change under the roots
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        with conn:
+            conn.executescript(META_SCHEMA + self.SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        """One connection per thread; WAL lets searches run while update() writes."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _under_roots(self, path: str) -> bool:
+        return any(path == root or path.startswith(root.rstrip(os.sep) + os.sep) for root in self.roots)
+
+    @property
+    def updated_at(self) -> Optional[float]:
+        """When update() last completed for these roots, or None if it never has."""
+        row = self._connect().execute("SELECT value FROM meta WHERE key = ?", (self._meta_key(),)).fetchone()
+        return float(row[0]) if row else None
+
+    def _meta_key(self) -> str:
+        return "updated_at:" + os.pathsep.join(sorted(self.roots))
+
+    def _mark_updated(self, conn: sqlite3.Connection):
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (self._meta_key(), repr(time.time())))
+
+    def _paths_under(self, conn: sqlite3.Connection, table: str, folder: str) -> List[Tuple[int, str]]:
+        """(id, path) of the rows of table at or below folder."""
+        prefix = folder.rstrip(os.sep) + os.sep
+        return conn.execute(f"SELECT id, path FROM {table} WHERE path = ? OR (path >= ? AND path < ?)",
+                            (folder, prefix, prefix[:-1] + chr(ord(os.sep) + 1))).fetchall()
+
+    def update(self, full: bool = False) -> Dict[str, float]:
+        raise NotImplementedError
+
+    def apply_changes(self, events: List[ChangeEvent]):
+        raise NotImplementedError
+
+    def follow(self, feed: ChangeFeed):
+        """
+        Keeps the index current from feed's events. When the feed covers every
+        root, refresh_if_stale stops rescanning the disk.
+        """
+        feed.subscribe(self.apply_changes)
+        self._live = all(feed.covers(root) for root in self.roots)
+
+    def update_in_background(self) -> threading.Thread:
+        """Starts update() on a daemon thread unless one is already running."""
+        thread = self._update_thread
+        if thread is None or not thread.is_alive():
+            thread = threading.Thread(target=self._update_quietly, name=self.NAME.replace(" ", "-"), daemon=True)
+            self._update_thread = thread
+            thread.start()
+        return thread
+
+    def _update_quietly(self):
+        try:
+            self.update()
+        except Exception as e:
+            log_warning(f"{self.NAME.capitalize()} update failed: {e}")
+        finally:
+            self.close()
+
+    def refresh_if_stale(self, max_age_seconds: float) -> bool:
+        """
+        Starts a background update when the index is older than
+        max_age_seconds. Returns False while it has never been built, when
+        callers should fall back to walking the disk.
+        """
+        updated = self.updated_at
+        if updated is None or (not self._live and time.time() - updated > max_age_seconds):
+            self.update_in_background()
+        return updated is not None
+
+
+class FileIndex(SQLiteIndex):
+    """Filename index over a set of root folders, shared through one SQLite file."""
+    SCHEMA = FILE_SCHEMA
+    NAME = "file index"
+
+    def __init__(self, db_path: Path, roots: Iterable[Path], ignore: Iterable[str] = IGNORE_PATTERNS):
+        super().__init__(db_path, roots)
+        self.ignored = IgnoreRules(ignore)
+        # The database may sit under a root; its own files are not search results
+        self._own_files = {os.path.abspath(str(self.db_path)) + suffix for suffix in ("", "-wal", "-shm", "-journal")}
+        self.fts = True
+        conn = self._connect()
+        with conn:
+            try:
+                conn.executescript(FTS_SCHEMA)
+            except sqlite3.OperationalError as e:
+                log_warning(f"SQLite FTS5 unavailable ({e}); file searches will scan the index.")
+                self.fts = False
+
+    # --- Building ---
+    def _list_dir(self, folder: str) -> Optional[Dict[str, bool]]:
+        """{name: is_dir} of the entries worth indexing, or None if unreadable."""
+        entries = {}
+        try:
+            with os.scandir(folder) as it:
+                for entry in it:
+                    if self.ignored(entry.name) or entry.path in self._own_files:
+                        continue
+                    try:
+                        entries[entry.name] = entry.is_dir(follow_symlinks=False)
+                    except OSError:
+                        continue
+        except OSError:
+            return None
+        return entries
+
+    def _store_listing(self, conn: sqlite3.Connection, folder: str, mtime: float, dir_id: Optional[int],
+                       listing: Dict[str, bool]) -> Tuple[int, int, int]:
+        """Replaces a directory's stored entries with listing; returns (dir id, added, removed)."""
+        if dir_id is None:
+            dir_id = conn.execute("INSERT INTO dirs (path, mtime) VALUES (?, ?)", (folder, mtime)).lastrowid
+            stored = {}
+        else:
+            conn.execute("UPDATE dirs SET mtime = ? WHERE id = ?", (mtime, dir_id))
+            stored = {name: (file_id, bool(is_dir)) for file_id, name, is_dir in
+                      conn.execute("SELECT id, name, is_dir FROM files WHERE dir_id = ?", (dir_id,))}
+        removed = [(file_id,) for name, (file_id, is_dir) in stored.items() if listing.get(name) != is_dir]
+        added = [(dir_id, name, int(is_dir)) for name, is_dir in listing.items()
+                 if name not in stored or stored[name][1] != is_dir]
+        conn.executemany("DELETE FROM files WHERE id = ?", removed)
+        conn.executemany("INSERT INTO files (dir_id, name, is_dir) VALUES (?, ?, ?)", added)
+        return dir_id, len(added), len(removed)
+
+    def _forget_dir(self, conn: sqlite3.Connection, dir_id: int) -> int:
+        removed = conn.execute("DELETE FROM files WHERE dir_id = ?", (dir_id,)).rowcount
+        conn.execute("DELETE FROM dirs WHERE id = ?", (dir_id,))
+        return removed
+
+    def update(self, full: bool = False) -> Dict[str, float]:
+        """
+        Brings the index up to date with the disk; full=True relists every
+        directory. Returns counts of directories listed and kept, entries
+        added and removed, and the time taken.
+        """
+        with self._update_lock:
+            start = time.perf_counter()
+            conn = self._connect()
+            known = {path: (dir_id, mtime) for dir_id, path, mtime in conn.execute("SELECT id, path, mtime FROM dirs")}
+            report = {"listed": 0, "unchanged": 0, "added": 0, "removed": 0}
+            pending = [root for root in self.roots if os.path.isdir(root)]
+            seen = set()
+            with conn:
+                while pending:
+                    folder = pending.pop()
+                    if folder in seen:
+                        continue
+                    seen.add(folder)
+                    try:
+                        mtime = os.stat(folder).st_mtime
+                    except OSError:
+                        continue
+                    dir_id, stored_mtime = known.get(folder, (None, None))
+                    if dir_id is not None and stored_mtime == mtime and not full:
+                        report["unchanged"] += 1
+                        pending += [os.path.join(folder, name) for (name,) in
+                                    conn.execute("SELECT name FROM files WHERE dir_id = ? AND is_dir = 1", (dir_id,))]
+                        continue
+                    listing = self._list_dir(folder)
+                    if listing is None:
+                        continue
+                    _, added, removed = self._store_listing(conn, folder, mtime, dir_id, listing)
+                    report["listed"] += 1
+                    report["added"] += added
+                    report["removed"] += removed
+                    pending += [os.path.join(folder, name) for name, is_dir in listing.items() if is_dir]
+
+                # Directories that were deleted, renamed or are now skipped
+                for path, (dir_id, _) in known.items():
+                    if path not in seen and self._under_roots(path):
+                        report["removed"] += self._forget_dir(conn, dir_id)
+                self._mark_updated(conn)
+            report["seconds"] = round(time.perf_counter() - start, 4)
+            log_info(f"File index updated in {report['seconds']:.2f}s: {report['listed']} folders listed, "
+                     f"{report['unchanged']} unchanged, +{report['added']} -{report['removed']} entries.")
+            return report
+
+    def _relist(self, conn: sqlite3.Connection, folder: str):
+        """Stores folder's current listing unless its mtime shows it is unchanged."""
+        if not self._under_roots(folder):
+            return
+        try:
+            mtime = os.stat(folder).st_mtime
+        except OSError:
+            return
+        row = conn.execute("SELECT id, mtime FROM dirs WHERE path = ?", (folder,)).fetchone()
+        if row and row[1] == mtime:
+            return
+        listing = self._list_dir(folder)
+        if listing is not None:
+            self._store_listing(conn, folder, mtime, row[0] if row else None, listing)
+
+    def note_change(self, path: Path):
+        """Relists the folder holding path after this process created or deleted it."""
+        with self._update_lock:
+            conn = self._connect()
+            with conn:
+                self._relist(conn, os.path.dirname(os.path.abspath(str(path))))
+
+    def apply_changes(self, events: List[ChangeEvent]):
+        """ChangeFeed subscriber: relists each folder that gained or lost entries."""
+        if any(event.kind == RESCAN for event in events):
+            self.update_in_background()
+            return
+        with self._update_lock:
+            conn = self._connect()
+            with conn:
+                for event in events:
+                    if event.kind == DELETED and event.is_dir:
+                        for dir_id, _ in self._paths_under(conn, "dirs", event.path):
+                            self._forget_dir(conn, dir_id)
+                for folder in dict.fromkeys(os.path.dirname(event.path) for event in events):
+                    self._relist(conn, folder)
+
+    # --- Searching ---
+    def glob(self, pattern: str, limit: int = 10) -> List[Path]:
+        """Indexed paths whose name matches the glob pattern (case-insensitive), best match first."""
+        source = "names JOIN files f ON f.id = names.rowid" if self.fts else "files f"
+        column = "names.name" if self.fts else "f.name"
+        # Ranked in SQLite: exact name or stem, then names starting with the query text, then the rest
+        sql = (f"SELECT d.path, f.name FROM {source} JOIN dirs d ON d.id = f.dir_id WHERE {column} LIKE :like "
+               "ORDER BY CASE WHEN f.name LIKE :literal OR f.name LIKE :literal || '.%' THEN 0 "
+               "WHEN f.name LIKE :literal || '%' THEN 1 ELSE 2 END, length(d.path), f.name")
+        folded = pattern.lower()
+        literal = glob_to_like(GLOB_CHARS.sub("", pattern))
+        results = []
+        for folder, name in self._connect().execute(sql, {"like": glob_to_like(pattern), "literal": literal}):
+            if not self._under_roots(folder) or not fnmatch.fnmatchcase(name.lower(), folded):
+                continue
+            path = os.path.join(folder, name)
+            if os.path.lexists(path):
+                results.append(Path(path))
+                if len(results) >= limit:
+                    break
+        return results
+
+    def search(self, query: str, limit: int = 10) -> List[Path]:
+        """Paths whose name contains query, like rglob(f"*{query}*"); glob characters are honoured."""
+        query = query.strip()
+        if not query:
+            return []
+        return self.glob(f"*{query}*", limit)
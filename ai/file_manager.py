@@ -1,8 +1,9 @@
 # file_manager.py
 import re
 import json
+import threading
 from pathlib import Path
-from typing import List, Dict
+from typing import Dict, Iterator, List, Optional
 
 # Third-party imports with availability checks
 try:
@@ -24,6 +25,10 @@ except ImportError:
     PDF_AVAILABLE = False
 
 from config import Config
+from change_feed import ChangeFeed, DirectoryListing
+from content_index import ContentIndex
+from file_index import FileIndex
+from file_walker import iter_paths
 from security import SecurityValidator
 from logger import log_info, log_error, log_warning
 
@@ -33,6 +38,22 @@ class FileManager:
     def __init__(self):
         self.workspace_dir = Config.WORKSPACE_DIR
         self.workspace_dir.mkdir(exist_ok=True)
+        index_dir = (self.workspace_dir / Config.FILE_INDEX_FILE).parent
+        # Workspace changes reach the indexes and the listing as they happen; the indexes' own folder is excluded
+        self.change_feed = ChangeFeed([self.workspace_dir], Config.FILE_SEARCH_IGNORE, exclude=[index_dir],
+                                      poll_interval=Config.CHANGE_FEED_POLL_SECONDS)
+        self.workspace_listing = DirectoryListing(self.workspace_dir, Config.FILE_SEARCH_IGNORE)
+        self.file_index = FileIndex(self.workspace_dir / Config.FILE_INDEX_FILE, [self.workspace_dir],
+                                    Config.FILE_SEARCH_IGNORE)
+        self.content_index = ContentIndex(self.workspace_dir / Config.CONTENT_INDEX_FILE, [self.workspace_dir],
+                                          Config.FILE_SEARCH_IGNORE)
+        self.change_feed.subscribe(self.workspace_listing.apply_changes)
+        self.file_index.follow(self.change_feed)
+        self.content_index.follow(self.change_feed)
+        # Started before the catch-up updates, so nothing changed in between is missed
+        self.change_feed.start()
+        self.file_index.update_in_background()
+        self.content_index.update_in_background()
         log_info(f"File manager initialized. Workspace: {self.workspace_dir}")
 
     def create_file(self, filename: str, content: str, file_type: str) -> str:
@@ -57,6 +78,9 @@ class FileManager:
             else: # Default to text or specified type like .py, .txt
                 self._create_text_based_file(filepath, sanitized_content)
             
+            self.file_index.note_change(filepath)
+            self.content_index.note_change(filepath)
+            self.workspace_listing.note_change(filepath)
             log_info(f"Successfully created file: {filepath}")
             return f"Successfully created '{validated_filename}' in your workspace."
         except ValueError as ve:
@@ -68,12 +92,32 @@ class FileManager:
 
     def find_files(self, query: str) -> List[Path]:
         """Finds files in the workspace matching a query."""
+        return list(self.iter_files(query))
+
+    def iter_files(self, query: str, cancel: Optional[threading.Event] = None) -> Iterator[Path]:
+        """
+        Yields workspace files matching a query as they are found; setting
+        cancel (or closing the generator) stops the search.
+        """
         log_info(f"Searching for files with query: '{query}'")
         try:
-            # Use rglob for recursive search within the workspace
-            return list(self.workspace_dir.rglob(f"*{query}*"))
+            if self.file_index.refresh_if_stale(Config.FILE_INDEX_MAX_AGE_SECONDS):
+                yield from self.file_index.search(query, Config.MAX_SEARCH_RESULTS)
+                return
+            # The index is still being built for the first time
+            yield from iter_paths([self.workspace_dir], f"*{query}*", Config.MAX_SEARCH_RESULTS,
+                                  Config.FILE_SEARCH_IGNORE, cancel=cancel)
         except Exception as e:
             log_error(f"Error during file search: {e}")
+
+    def search_content(self, query: str) -> List[Path]:
+        """Finds workspace documents whose text best matches a query, best first."""
+        log_info(f"Searching document contents for: '{query}'")
+        try:
+            self.content_index.refresh_if_stale(Config.FILE_INDEX_MAX_AGE_SECONDS)
+            return [path for path, _ in self.content_index.search(query, Config.MAX_SEARCH_RESULTS)]
+        except Exception as e:
+            log_error(f"Error during content search: {e}")
             return []
 
     def delete_file(self, file_path: Path) -> str:
@@ -82,6 +126,9 @@ class FileManager:
             validated_path = SecurityValidator.validate_path(file_path)
             if validated_path.exists() and validated_path.is_file():
                 validated_path.unlink()
+                self.file_index.note_change(validated_path)
+                self.content_index.note_change(validated_path)
+                self.workspace_listing.note_change(validated_path)
                 log_info(f"Deleted file: {validated_path}")
                 return f"File '{validated_path.name}' has been deleted."
             else:
@@ -95,21 +142,9 @@ class FileManager:
             return f"An error occurred during file deletion: {e}"
 
     def list_workspace_files(self) -> List[Dict[str, str]]:
-        """Lists all files in the root of the workspace with their details."""
-        files_details = []
-        try:
-            for item in self.workspace_dir.iterdir():
-                if item.is_file():
-                    stat = item.stat()
-                    files_details.append({
-                        "name": item.name,
-                        "size": f"{stat.st_size / 1024:.2f} KB",
-                        "modified": str(item.stat().st_mtime)
-                    })
-            return files_details
-        except Exception as e:
-            log_error(f"Failed to list workspace files: {e}")
-            return []
+        """Lists all files in the root of the workspace with their details, from the in-memory listing."""
+        return [{"name": name, "size": f"{size / 1024:.2f} KB", "modified": str(mtime)}
+                for name, size, mtime in self.workspace_listing.files()]
 
     def _create_text_based_file(self, filepath: Path, content: str):
         filepath.write_text(content, encoding='utf-8')
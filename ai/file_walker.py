@@ -0,0 +1,138 @@
+# file_walker.py
+"""
+Parallel directory walk for file searches that cannot use the filename index.
+
+Folders are listed with os.scandir by tasks on a thread pool; each task walks
+a batch of folders and hands what it did not reach back to the pool, so
+sibling subtrees are read concurrently. Names matching the ignore rules
+(hidden entries, node_modules, virtualenvs, ...) are neither matched nor
+descended into, an unreadable folder is skipped on its own instead of ending
+the search of its root, and the walk stops as soon as enough matches are in.
+iter_paths() streams the matches as they are found and can be cancelled.
+"""
+import fnmatch
+import os
+import re
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+# Glob patterns, matched case-insensitively against single file and folder names
+IGNORE_PATTERNS = (".*", "node_modules", "__pycache__", "site-packages", "venv", "env", "AppData", "Library")
+# Folders one task lists before handing what is left back to the pool, and the size of those hand-backs
+FOLDERS_PER_TASK = 64
+SPLIT_SIZE = 8
+# How often a streaming walk looks at its cancel event while no task has finished
+CANCEL_CHECK_SECONDS = 0.05
+
+
+class IgnoreRules:
+    """Name filter built once from glob patterns; plain names are set lookups."""
+
+    def __init__(self, patterns: Iterable[str] = IGNORE_PATTERNS):
+        patterns = [pattern.lower() for pattern in patterns]
+        self.names = {pattern for pattern in patterns if not re.search(r"[*?\[]", pattern)}
+        globs = [fnmatch.translate(pattern) for pattern in patterns if pattern not in self.names]
+        self.regex = re.compile("|".join(globs)) if globs else None
+
+    def __call__(self, name: str) -> bool:
+        folded = name.lower()
+        return folded in self.names or bool(self.regex and self.regex.match(folded))
+
+
+def _scan(folders: List[Tuple[str, int]], matcher: "re.Pattern", ignored: IgnoreRules,
+          stop: threading.Event) -> Tuple[List[Tuple[int, str]], List[Tuple[str, int]]]:
+    """
+    Walks up to FOLDERS_PER_TASK folders depth-first from the given (folder,
+    depth) pairs, returning early after a folder with matches so they can be
+    reported; returns the (depth, path) matches and the folders left over for
+    other tasks.
+    """
+    matches = []
+    stack = list(folders)
+    for _ in range(FOLDERS_PER_TASK):
+        if not stack or stop.is_set():
+            break
+        folder, depth = stack.pop()
+        try:
+            with os.scandir(folder) as it:
+                for entry in it:
+                    if ignored(entry.name):
+                        continue
+                    if matcher.match(entry.name.lower()):
+                        matches.append((depth, entry.path))
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append((entry.path, depth + 1))
+                    except OSError:
+                        continue
+        except OSError:
+            # Unreadable folders are skipped one at a time
+            continue
+        if matches:
+            break
+    return matches, stack
+
+
+def _walk(roots: Iterable[Path], pattern: str, ignore: Iterable[str], max_workers: Optional[int],
+          cancel: Optional[threading.Event]) -> Iterator[List[Tuple[int, int, str]]]:
+    """
+    Yields the (root order, depth, path) matches of each finished task as soon
+    as it is in. Closing the generator, or setting cancel, stops the walk.
+    """
+    roots = [os.path.abspath(str(root)) for root in roots]
+    matcher = re.compile(fnmatch.translate(pattern.lower()))
+    ignored = ignore if isinstance(ignore, IgnoreRules) else IgnoreRules(ignore)
+    stop = threading.Event()
+    workers = max_workers or min(32, (os.cpu_count() or 1) * 4)
+
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="file-walk")
+    try:
+        pending = {pool.submit(_scan, [(root, 0)], matcher, ignored, stop): order
+                   for order, root in enumerate(roots) if os.path.isdir(root)}
+        while pending and not (cancel is not None and cancel.is_set()):
+            done, _ = wait(list(pending), timeout=CANCEL_CHECK_SECONDS, return_when=FIRST_COMPLETED)
+            for future in done:
+                order = pending.pop(future)
+                matches, left = future.result()
+                # Leftover folders are split so idle workers can take them
+                for i in range(0, len(left), SPLIT_SIZE):
+                    pending[pool.submit(_scan, left[i:i + SPLIT_SIZE], matcher, ignored, stop)] = order
+                if matches:
+                    yield [(order, depth, path) for depth, path in matches]
+    finally:
+        stop.set()
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def iter_paths(roots: Iterable[Path], pattern: str, max_results: int = 10, ignore: Iterable[str] = IGNORE_PATTERNS,
+               max_workers: Optional[int] = None, cancel: Optional[threading.Event] = None) -> Iterator[Path]:
+    """
+    Streaming find_paths: yields matches in the order they are found, so the
+    first one arrives long before the walk ends. Stops after max_results, when
+    cancel is set, or when the caller closes the generator.
+    """
+    remaining = max_results
+    for matches in _walk(roots, pattern, ignore, max_workers, cancel):
+        for _, _, path in sorted(matches)[:remaining]:
+            yield Path(path)
+        remaining -= len(matches)
+        if remaining <= 0:
+            return
+
+
+def find_paths(roots: Iterable[Path], pattern: str, max_results: int = 10,
+               ignore: Iterable[str] = IGNORE_PATTERNS, max_workers: Optional[int] = None) -> List[Path]:
+    """
+    Up to max_results paths under roots whose name matches the glob pattern
+    (case-insensitive), like rglob(pattern) but pruned. Earlier roots and
+    shallower paths come first.
+    """
+    found: List[Tuple[int, int, str]] = []
+    for matches in _walk(roots, pattern, ignore, max_workers, None):
+        found += matches
+        if len(found) >= max_results:
+            break
+    found.sort()
+    return [Path(path) for _, _, path in found[:max_results]]
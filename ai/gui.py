@@ -1,13 +1,18 @@
 # gui.py
 import customtkinter as ctk
+import asyncio
 from PIL import Image
 
+# How often (ms) the Tk loop collects results from the background event loop
+POLL_INTERVAL_MS = 50
+
 class App(ctk.CTk):
-    def __init__(self, jarvis, voice_io):
+    def __init__(self, jarvis, voice_io, background_loop):
         super().__init__()
 
         self.jarvis = jarvis
         self.voice_io = voice_io
+        self.background_loop = background_loop
 
         self.title("JARVIS AI Assistant")
         self.geometry("800x600")
@@ -35,11 +40,21 @@ class App(ctk.CTk):
         self.mic_button.grid(row=1, column=1, padx=(0, 10), pady=(0, 10), sticky="w")
         
         self.display_message("JARVIS: Hello! How can I assist you today?", "green")
+        self.after(POLL_INTERVAL_MS, self.poll_background_tasks)
+
+    def poll_background_tasks(self):
+        """Shows the results of finished commands; runs on the Tk thread."""
+        self.background_loop.poll()
+        self.after(POLL_INTERVAL_MS, self.poll_background_tasks)
 
     def display_message(self, message: str, color: str = "white"):
         """Displays a message in the chatbox."""
+        self.display_line(f"{message}\n")
+
+    def display_line(self, line: str):
+        """Appends one line to the chatbox, e.g. a search hit while the search is still running."""
         self.textbox.configure(state="normal")
-        self.textbox.insert("end", f"{message}\n\n")
+        self.textbox.insert("end", f"{line}\n")
         self.textbox.configure(state="disabled")
         self.textbox.see("end")
 
@@ -50,27 +65,34 @@ class App(ctk.CTk):
             return
         
         self.voice_io.stop_audio() # Interrupt previous speech
+        self.jarvis.cancel_search() # and a file search still streaming results
         self.display_message(f"You: {user_input}", "cyan")
         self.entry.delete(0, "end")
-        self.after(50, lambda: self.process_and_respond(user_input))
+        self.process_and_respond(user_input)
 
     def handle_mic_event(self):
         """Handles the microphone button click."""
         self.voice_io.stop_audio() # Interrupt previous speech
         self.display_message("JARVIS: Listening...", "yellow")
-        self.update_idletasks()
-        
-        command = self.voice_io.listen()
+        # Microphone capture blocks, so it runs off the Tk thread as well
+        self.background_loop.submit(asyncio.to_thread(self.voice_io.listen), self.handle_voice_command)
+
+    def handle_voice_command(self, command):
         if command:
             self.display_message(f"You (voice): {command}", "cyan")
-            self.after(50, lambda: self.process_and_respond(command))
+            self.process_and_respond(command)
         else:
             self.display_message("JARVIS: I didn't catch that. Please try again.", "orange")
 
     def process_and_respond(self, command: str):
         """
         Sends command to JARVIS core, which now handles speaking.
-        This method just displays the final text response.
+        The command runs on the background event loop; the response is
+        displayed when it finishes, without blocking the window. Partial
+        output (file search hits) is shown line by line as it arrives.
         """
-        response = self.jarvis.process_command(command)
+        on_progress = lambda line: self.background_loop.post(self.display_line, line)
+        self.background_loop.submit(self.jarvis.process_command_async(command, on_progress), self.display_response)
+
+    def display_response(self, response: str):
         self.display_message(f"JARVIS: {response}", "green")
\ No newline at end of file
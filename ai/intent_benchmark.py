@@ -0,0 +1,317 @@
+# intent_benchmark.py
+"""
+Replays a labelled command corpus through the command analyzers and reports
+latency per tier (p50/p95/p99), accuracy per intent and throughput.
+
+Targets:
+    ai_core     AI_Core (this directory): rules, local classifier, Gemini
+    ai4         CommandAnalyzer (pc-ai/ai4.py): rules, local classifier, Gemini
+    ai2_rules   the keyword rules of pc-ai/ai2.py
+
+Gemini is replaced by the local stub server in llm_stub.py, which answers with
+the corpus label after --latency-ms, so runs are repeatable and free. Each
+target runs against a temporary workspace (a copy of the trained intent model
+only), so the real analysis cache and training log are left alone.
+
+Corpus rows (JSON lines) look like
+    {"command": "open notepad", "label": "system_control/open_application",
+     "expected": {"ai2_rules": "system_control/open_notepad"}}
+"expected" overrides the label for targets with a different vocabulary; null
+skips the command for that target. Optional "parameters" are what the stub
+replies with, and an answer only counts as correct when every one of them it
+carries under the same name has that value. "instruction" (commands.jsonl) is read as
+"command", and a command_history.json list is accepted when its entries carry
+a "label" (or "intent" and "action").
+
+    python intent_benchmark.py [--corpus FILE] [--latency-ms 300] [--repeat 3]
+                               [--concurrency 8] [--output benchmark_results.json]
+"""
+import argparse
+import importlib.util
+import json
+import math
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from config import Config
+from llm_stub import StubLLMServer
+from logger import log_info, log_warning
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_CORPUS = Path(__file__).resolve().parent / "benchmark_corpus.jsonl"
+TARGET_NAMES = ("ai_core", "ai4", "ai2_rules")
+PERCENTILES = (0.50, 0.95, 0.99)
+
+
+# --- Corpus ---
+def _label_of(row: Dict[str, Any]) -> Optional[str]:
+    if row.get("label"):
+        return row["label"]
+    if row.get("intent") and row.get("action"):
+        return f"{row['intent']}/{row['action']}"
+    return None
+
+
+def load_corpus(path: Path) -> List[Dict[str, Any]]:
+    """Labelled commands from a JSON lines corpus or a command_history.json-style list."""
+    path = Path(path)
+    text = path.read_text(encoding="utf-8")
+    if path.suffix == ".json":
+        rows = json.loads(text)
+    else:
+        rows = [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    corpus, unlabelled = [], 0
+    for row in rows:
+        command = (row.get("command") or row.get("instruction") or "").strip()
+        label = _label_of(row)
+        if not command or not label:
+            unlabelled += 1
+            continue
+        corpus.append({"command": command, "label": label, "expected": row.get("expected", {}),
+                       "parameters": row.get("parameters", {})})
+    if unlabelled:
+        log_warning(f"Skipped {unlabelled} unlabelled corpus rows in {path}.")
+    return corpus
+
+
+def expected_label(row: Dict[str, Any], target: str) -> Optional[str]:
+    return row["expected"][target] if target in row["expected"] else row["label"]
+
+
+def stub_answers(corpus: List[Dict[str, Any]], target: str) -> Dict[str, Dict[str, Any]]:
+    """What the stub LLM replies for each command: the target's expected analysis."""
+    answers = {}
+    for row in corpus:
+        label = expected_label(row, target)
+        if label:
+            intent, _, action = label.partition("/")
+            answers[row["command"]] = {"intent": intent, "action": action, "parameters": row["parameters"],
+                                       "response": "OK." if intent == "conversation" else None}
+    return answers
+
+
+# --- Targets ---
+class BenchmarkTarget:
+    """One analyzer under test plus the pieces of it the report reads from."""
+
+    def __init__(self, name: str, analyze: Callable[[str], Dict[str, Any]], router=None, cache=None,
+                 token_ledger=None):
+        self.name = name
+        self.analyze = analyze
+        self.router = router
+        self.cache = cache
+        self.token_ledger = token_ledger
+
+
+def _load_module(name: str, path: Path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _prepare_workspace(workspace: Path, model_file: Path) -> Path:
+    workspace.mkdir(parents=True, exist_ok=True)
+    if model_file.exists():
+        shutil.copy(model_file, workspace / Config.INTENT_MODEL_FILE)
+    else:
+        log_warning(f"No trained intent model at {model_file}; the local tier will always defer.")
+    return workspace
+
+
+def build_target(name: str, workspace: Path, api_key: str) -> BenchmarkTarget:
+    if name == "ai_core":
+        Config.WORKSPACE_DIR = workspace
+        from ai_core import AI_Core
+
+        core = AI_Core(api_key)
+        return BenchmarkTarget(name, lambda command: core.analyze_command(command, []), core.router,
+                               core.analysis_cache, core.token_ledger)
+    if name == "ai4":
+        ai4 = _load_module("ai4", REPO_ROOT / "pc-ai" / "ai4.py")
+        ai4.Config.WORKSPACE_DIR = workspace
+        analyzer = ai4.CommandAnalyzer(ai4.AIContentGenerator(api_key))
+        return BenchmarkTarget(name, analyzer.analyze_command, analyzer.router, analyzer.analysis_cache,
+                               analyzer.token_ledger)
+    if name == "ai2_rules":
+        ai2 = _load_module("ai2", REPO_ROOT / "pc-ai" / "ai2.py")
+        return BenchmarkTarget(name, ai2.analyze_with_rules)
+    raise ValueError(f"Unknown benchmark target '{name}'")
+
+
+def point_gemini_at(url: str):
+    """Sends every Gemini call made from now on to the stub server."""
+    import google.generativeai as genai
+
+    genai.configure(api_key="benchmark", transport="rest", client_options={"api_endpoint": url})
+
+
+# --- Measurement ---
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = min(len(ordered), max(1, math.ceil(fraction * len(ordered))))
+    return round(ordered[rank - 1], 3)
+
+
+def latency_summary(values: List[float]) -> Dict[str, float]:
+    summary = {"count": len(values), "mean_ms": round(sum(values) / len(values), 3) if values else 0.0}
+    summary.update({f"p{int(p * 100)}_ms": percentile(values, p) for p in PERCENTILES})
+    summary["max_ms"] = round(max(values), 3) if values else 0.0
+    return summary
+
+
+def _matches(analysis: Dict[str, Any], label: str, parameters: Dict[str, Any]):
+    intent, _, action = label.partition("/")
+    intent_ok = str(analysis.get("intent", "")).casefold() == intent.casefold()
+    got = analysis.get("parameters") or {}
+    slots_ok = all(got[name] == value for name, value in parameters.items() if name in got)
+    return intent_ok, intent_ok and analysis.get("action") == action and slots_ok
+
+
+def run_target(target: BenchmarkTarget, corpus: List[Dict[str, Any]], repeat: int,
+               concurrency: int) -> Dict[str, Any]:
+    rows = [row for row in corpus if expected_label(row, target.name)]
+    samples: Dict[str, List[float]] = {"end_to_end": []}
+    answered_by: Counter = Counter()
+    per_intent: Dict[str, Dict[str, int]] = {}
+    misses = []
+
+    # Latency and accuracy: one command at a time, cache cleared so every command is analyzed
+    for _ in range(repeat):
+        for row in rows:
+            if target.cache is not None:
+                target.cache.clear()
+            start = time.perf_counter()
+            analysis = target.analyze(row["command"])
+            samples["end_to_end"].append((time.perf_counter() - start) * 1000)
+            if target.router is not None:
+                timings = target.router.timings[-1]
+                answered_by[timings.get("answered_by", "remote")] += 1
+                for tier, value in timings.items():
+                    if isinstance(value, float):
+                        samples.setdefault(tier, []).append(value)
+            else:
+                answered_by["rules"] += 1
+
+            label = expected_label(row, target.name)
+            intent_ok, action_ok = _matches(analysis, label, row["parameters"])
+            counts = per_intent.setdefault(label.partition("/")[0], {"total": 0, "intent_correct": 0, "action_correct": 0})
+            counts["total"] += 1
+            counts["intent_correct"] += intent_ok
+            counts["action_correct"] += action_ok
+            if not action_ok and len(misses) < 25:
+                misses.append({"command": row["command"], "expected": label,
+                               "got": f"{analysis.get('intent')}/{analysis.get('action')}",
+                               "parameters": analysis.get("parameters"),
+                               "tier": analysis.get("tier", "remote" if target.router else "rules")})
+
+    # Throughput: the whole corpus with `concurrency` commands in flight
+    if target.cache is not None:
+        target.cache.clear()
+    commands = [row["command"] for row in rows] * repeat
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(target.analyze, commands))
+    wall = time.perf_counter() - start
+
+    total = sum(c["total"] for c in per_intent.values())
+    result = {
+        "commands": len(rows),
+        "latency": {tier: latency_summary(values) for tier, values in samples.items()},
+        "answered_by": dict(answered_by),
+        "accuracy": {
+            "intent": round(sum(c["intent_correct"] for c in per_intent.values()) / total, 4) if total else 0.0,
+            "action": round(sum(c["action_correct"] for c in per_intent.values()) / total, 4) if total else 0.0,
+            "per_intent": {intent: dict(c, accuracy=round(c["intent_correct"] / c["total"], 4))
+                           for intent, c in sorted(per_intent.items())},
+        },
+        "throughput": {"commands": len(commands), "concurrency": concurrency, "seconds": round(wall, 3),
+                       "commands_per_second": round(len(commands) / wall, 2) if wall else 0.0},
+        "misses": misses,
+    }
+    if target.token_ledger is not None:
+        result["tokens"] = target.token_ledger.summary()
+    return result
+
+
+def print_report(results: Dict[str, Any]):
+    for name, result in results["targets"].items():
+        if "error" in result:
+            print(f"\n{name}: skipped ({result['error']})")
+            continue
+        accuracy = result["accuracy"]
+        print(f"\n{name}: {result['commands']} commands, intent accuracy {accuracy['intent']:.1%}, "
+              f"action accuracy {accuracy['action']:.1%}, "
+              f"{result['throughput']['commands_per_second']} commands/s at concurrency "
+              f"{result['throughput']['concurrency']}")
+        print(f"  answered by: {result['answered_by']}")
+        for tier, summary in result["latency"].items():
+            print(f"  {tier:<11} p50={summary['p50_ms']:>9.3f}ms  p95={summary['p95_ms']:>9.3f}ms  "
+                  f"p99={summary['p99_ms']:>9.3f}ms  (n={summary['count']})")
+        for intent, counts in accuracy["per_intent"].items():
+            print(f"  {intent:<22} {counts['intent_correct']}/{counts['total']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark command analysis latency and accuracy.")
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS)
+    parser.add_argument("--targets", default=",".join(TARGET_NAMES),
+                        help=f"Comma-separated subset of {', '.join(TARGET_NAMES)}")
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="Stub LLM latency")
+    parser.add_argument("--jitter-ms", type=float, default=50.0, help="Stub LLM latency jitter (uniform ±)")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the corpus")
+    parser.add_argument("--concurrency", type=int, default=8, help="Commands in flight in the throughput pass")
+    parser.add_argument("--output", type=Path, default=Path("benchmark_results.json"))
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    # Read before the ai_core target repoints Config.WORKSPACE_DIR at its scratch copy
+    model_file = Config.WORKSPACE_DIR / Config.INTENT_MODEL_FILE
+    results: Dict[str, Any] = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "settings": {"corpus": str(args.corpus), "corpus_size": len(corpus), "stub_latency_ms": args.latency_ms,
+                     "stub_jitter_ms": args.jitter_ms, "repeat": args.repeat, "concurrency": args.concurrency,
+                     "speculative_analysis": Config.SPECULATIVE_ANALYSIS},
+        "targets": {},
+    }
+
+    with StubLLMServer(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms) as stub, \
+            tempfile.TemporaryDirectory(prefix="jarvis_benchmark_") as scratch:
+        for name in [n.strip() for n in args.targets.split(",") if n.strip()]:
+            try:
+                target = build_target(name, _prepare_workspace(Path(scratch) / name, model_file), "benchmark")
+                if target.router is not None:
+                    point_gemini_at(stub.url)
+                stub.set_answers(stub_answers(corpus, name))
+            except Exception as e:
+                log_warning(f"Benchmark target '{name}' unavailable: {e}")
+                results["targets"][name] = {"error": str(e)}
+                continue
+            log_info(f"Benchmarking '{name}' on {len(corpus)} commands x {args.repeat}.")
+            results["targets"][name] = run_target(target, corpus, args.repeat, args.concurrency)
+            if target.router is not None:
+                target.router.shutdown()
+        results["stub_requests"] = stub.requests
+
+    from llm_gateway import get_gateway
+    results["gateway"] = get_gateway().stats()
+
+    args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    print_report(results)
+    print(f"\nResults written to {args.output}")
+    return 0 if all("error" not in r for r in results["targets"].values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
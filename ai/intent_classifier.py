@@ -0,0 +1,326 @@
+# intent_classifier.py
+"""
+Local intent classifier that sits between the keyword rules and the cloud LLM.
+
+Commands are turned into hashed word/bigram/character-trigram features and
+scored by a multinomial logistic regression over "intent/action" labels. The
+model is trained offline (run this file) and stored as sparse JSON, so loading
+it takes a few milliseconds and a prediction a few microseconds. Each
+assistant has its own rules and label space, so each trains and loads its own
+model (`--assistant ai4` trains pc-ai/ai4.py's).
+"""
+import argparse
+import json
+import math
+import random
+import re
+import sys
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from analysis_cache import refers_to_context
+from config import Config
+from logger import log_info, log_warning
+
+FEATURE_DIM = 1 << 16
+WORD_PATTERN = re.compile(r"[a-z0-9.']+")
+
+# Labelled examples taken from the analysis prompt, so a fresh install has a usable model
+SEED_EXAMPLES = [
+    ("create word doc", "file_creation/create_word"),
+    ("create a word document about solar panels", "file_creation/create_word"),
+    ("make an excel spreadsheet of monthly expenses", "file_creation/create_excel"),
+    ("create a pdf report on the history of AI", "file_creation/create_pdf"),
+    ("write a python script for a timer", "file_creation/create_python"),
+    ("create a text file about my goals", "file_creation/create_text"),
+    ("list files", "file_management/list_files"),
+    ("show me my files", "file_management/list_files"),
+    ("find my_report.docx", "file_management/find_file"),
+    ("locate the budget spreadsheet", "file_management/find_file"),
+    ("find the document about solar panels", "file_management/search_content"),
+    ("which file mentions the quarterly budget", "file_management/search_content"),
+    ("delete old_notes.txt", "file_management/delete_file"),
+    ("open chrome", "system_control/open_application"),
+    ("launch visual studio code", "system_control/open_application"),
+    ("take a screenshot", "system_control/take_screenshot"),
+    ("what is my cpu usage", "system_control/get_system_status"),
+    ("how much ram am i using", "system_control/get_system_status"),
+    ("search for AI", "web_browse/web_search"),
+    ("search for news about AI", "web_browse/web_search"),
+    ("what is the weather in Paris", "weather_inquiry/get_weather"),
+    ("what is the weather like in New York", "weather_inquiry/get_weather"),
+    ("tell me about Jupiter", "knowledge_inquiry/get_summary"),
+    ("tell me about the Roman Empire", "knowledge_inquiry/get_summary"),
+    ("read my clipboard", "clipboard_management/read_clipboard"),
+    ("copy 'hello' to clipboard", "clipboard_management/write_clipboard"),
+    ("help", "help/show_help"),
+    ("what can you do", "help/show_help"),
+    ("hi how are you", "conversation/chat"),
+    ("tell me a joke", "conversation/chat"),
+    ("thanks", "conversation/chat"),
+    # Sentences that share words with the commands above without asking for them
+    ("i want to open a bank account", "conversation/chat"),
+    ("the shop opens at nine", "conversation/chat"),
+    ("how do i open a stuck jar", "conversation/chat"),
+    ("my sister started a new job", "conversation/chat"),
+    ("should i start learning the piano", "conversation/chat"),
+    ("i could not find my keys this morning", "conversation/chat"),
+    ("i deleted a photo by accident yesterday", "conversation/chat"),
+    ("the weather was lovely at the beach", "conversation/chat"),
+    ("why do people search for meaning", "conversation/chat"),
+    ("what is the meaning of life", "conversation/chat"),
+    ("i wrote a poem for my mother", "conversation/chat"),
+    ("my computer feels slow today", "conversation/chat"),
+]
+
+
+def extract_features(text: str, dim: int = FEATURE_DIM) -> Dict[int, float]:
+    """Hashed, L2-normalized bag of words, word bigrams and character trigrams."""
+    words = WORD_PATTERN.findall(text.lower())
+    tokens = [f"w:{w}" for w in words]
+    tokens += [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+    for word in words:
+        padded = f"#{word}#"
+        tokens += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+
+    features: Dict[int, float] = {}
+    for token in tokens:
+        index = zlib.crc32(token.encode("utf-8")) % dim
+        features[index] = features.get(index, 0.0) + 1.0
+    norm = math.sqrt(sum(v * v for v in features.values())) or 1.0
+    return {i: v / norm for i, v in features.items()}
+
+
+def _softmax(scores: List[float]) -> List[float]:
+    top = max(scores)
+    exps = [math.exp(s - top) for s in scores]
+    total = sum(exps)
+    return [e / total for e in exps]
+
+
+class IntentClassifier:
+    """Multinomial logistic regression over hashed n-gram features."""
+
+    def __init__(self, labels: Optional[List[str]] = None, dim: int = FEATURE_DIM):
+        self.labels = labels or []
+        self.dim = dim
+        self.bias = [0.0] * len(self.labels)
+        self.weights: Dict[int, List[float]] = {}
+
+    @property
+    def is_trained(self) -> bool:
+        return bool(self.labels and self.weights)
+
+    # --- Inference ---
+    def predict(self, command: str) -> Optional[Tuple[str, float]]:
+        """
+        Returns (label, confidence). Confidence is the class probability scaled
+        by how many of the command's features the model has ever seen, so
+        commands made of unknown words never look confident.
+        """
+        if not self.is_trained:
+            return None
+        features = extract_features(command, self.dim)
+        if not features:
+            return None
+        scores = list(self.bias)
+        known = 0
+        for index, value in features.items():
+            row = self.weights.get(index)
+            if row is None:
+                continue
+            known += 1
+            for k, weight in enumerate(row):
+                scores[k] += weight * value
+        probabilities = _softmax(scores)
+        best = max(range(len(probabilities)), key=probabilities.__getitem__)
+        coverage = known / len(features)
+        return self.labels[best], probabilities[best] * coverage
+
+    def analyze(self, command: str, matcher, allowed_intents: Optional[Iterable[str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Builds a full analysis from the predicted label, with parameters taken
+        from the analyzer's own rule table. Returns None (defer to the LLM) for
+        commands that lean on the conversation ("open it again"), for
+        conversation, for intents the analyzer does not support, and when the
+        rule table cannot fill the action's slots from this command.
+        """
+        if refers_to_context(command):
+            return None
+        prediction = self.predict(command)
+        if prediction is None:
+            return None
+        label, confidence = prediction
+        intent, _, action = label.partition("/")
+        if intent == "conversation" or (allowed_intents is not None and intent not in allowed_intents):
+            return None
+        parameters = matcher.slots_for(command, intent, action)
+        if parameters is None:
+            return None
+        # No boost when the rules agree: most training labels come from those same rules
+        return {"intent": intent, "action": action, "parameters": parameters, "confidence": round(confidence, 3)}
+
+    # --- Training ---
+    def fit(self, examples: List[Tuple[str, str]], epochs: int = 40, learning_rate: float = 0.5,
+            l2: float = 1e-4, seed: int = 0):
+        """Trains with plain SGD on the softmax cross-entropy loss."""
+        self.labels = sorted({label for _, label in examples})
+        self.bias = [0.0] * len(self.labels)
+        self.weights = {}
+        label_index = {label: i for i, label in enumerate(self.labels)}
+        data = [(extract_features(text, self.dim), label_index[label]) for text, label in examples]
+        rng = random.Random(seed)
+
+        for epoch in range(epochs):
+            rng.shuffle(data)
+            rate = learning_rate / (1 + epoch * 0.1)
+            for features, target in data:
+                scores = list(self.bias)
+                for index, value in features.items():
+                    row = self.weights.get(index)
+                    if row:
+                        for k, weight in enumerate(row):
+                            scores[k] += weight * value
+                probabilities = _softmax(scores)
+                for k, p in enumerate(probabilities):
+                    gradient = p - (1.0 if k == target else 0.0)
+                    self.bias[k] -= rate * gradient
+                    for index, value in features.items():
+                        row = self.weights.setdefault(index, [0.0] * len(self.labels))
+                        row[k] -= rate * (gradient * value + l2 * row[k])
+
+    # --- Persistence ---
+    def save(self, path: Path):
+        payload = {
+            "version": 1,
+            "dim": self.dim,
+            "labels": self.labels,
+            "bias": [round(b, 5) for b in self.bias],
+            "weights": {str(i): [round(w, 5) for w in row] for i, row in self.weights.items()
+                        if any(abs(w) > 1e-5 for w in row)},
+        }
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(payload, separators=(",", ":")), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: Path) -> "IntentClassifier":
+        """Loads a trained model; returns an untrained (always deferring) one if missing."""
+        path = Path(path)
+        if not path.exists():
+            log_info(f"No local intent model at {path}; every command goes to the remote analyzer.")
+            return cls()
+        try:
+            start = time.perf_counter()
+            data = json.loads(path.read_text(encoding="utf-8"))
+            model = cls(data["labels"], data.get("dim", FEATURE_DIM))
+            model.bias = data["bias"]
+            model.weights = {int(i): row for i, row in data["weights"].items()}
+            log_info(f"Local intent model loaded in {(time.perf_counter() - start) * 1000:.1f} ms "
+                     f"({len(model.labels)} labels).")
+            return model
+        except Exception as e:
+            log_warning(f"Could not load local intent model: {e}")
+            return cls()
+
+    @staticmethod
+    def log_example(log_file: Path, command: str, analysis: Dict[str, Any]):
+        """Appends an LLM-labelled command to the training log for the next offline training run."""
+        intent, action = analysis.get("intent"), analysis.get("action")
+        if not intent or not action:
+            return
+        try:
+            with open(log_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"command": command, "label": f"{intent}/{action}"}, ensure_ascii=False) + "\n")
+        except Exception as e:
+            log_warning(f"Could not record training example: {e}")
+
+
+# --- Offline training ---
+def _read_jsonl(path: Path) -> List[Dict[str, Any]]:
+    if not path.exists():
+        return []
+    rows = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if line:
+            try:
+                rows.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return rows
+
+
+def collect_training_examples(labeler: Callable[[str], Optional[Dict[str, Any]]],
+                              commands_file: Path, history_file: Path, training_log: Path,
+                              seeds: Iterable[Tuple[str, str]] = SEED_EXAMPLES) -> List[Tuple[str, str]]:
+    """
+    Gathers (command, label) pairs. LLM-labelled commands from the training log
+    are used as-is; commands from commands.jsonl and command_history.json are
+    labelled by the keyword rules, with unmatched commands treated as chat.
+    """
+    examples = dict((text.lower(), label) for text, label in seeds)
+
+    unlabelled = [row.get("instruction", "") for row in _read_jsonl(commands_file)]
+    if history_file.exists():
+        try:
+            history = json.loads(history_file.read_text(encoding="utf-8"))
+            unlabelled += [entry.get("command", "") for entry in history if entry.get("success", True)]
+        except (json.JSONDecodeError, AttributeError) as e:
+            log_warning(f"Skipping unreadable command history {history_file}: {e}")
+    for command in filter(None, (c.strip() for c in unlabelled)):
+        analysis = labeler(command)
+        label = f"{analysis['intent']}/{analysis['action']}" if analysis else "conversation/chat"
+        examples.setdefault(command.lower(), label)
+
+    # LLM labels win over rule labels for the same command
+    for row in _read_jsonl(training_log):
+        if row.get("command") and row.get("label"):
+            examples[row["command"].strip().lower()] = row["label"]
+    return list(examples.items())
+
+
+def main():
+    repo_root = Path(__file__).resolve().parent.parent
+    parser = argparse.ArgumentParser(description="Train the local intent classifier")
+    parser.add_argument("commands_file", nargs="?", type=Path, default=repo_root / "ai-agent" / "commands.jsonl")
+    parser.add_argument("--assistant", choices=("ai", "ai4"), default="ai",
+                        help="Whose keyword rules, label space and model files to use")
+    args = parser.parse_args()
+
+    if args.assistant == "ai4":
+        sys.path.append(str(repo_root / "pc-ai"))
+        from ai4 import COMMAND_RULES as rules, Config as settings
+        # SEED_EXAMPLES carry ai/'s labels; relabel their commands with ai4's own rules
+        seeds = []
+        for text, label in SEED_EXAMPLES:
+            analysis = None if label == "conversation/chat" else rules.match(text)
+            if analysis:
+                seeds.append((text, f"{analysis['intent']}/{analysis['action']}"))
+            elif label == "conversation/chat":
+                seeds.append((text, label))
+    else:
+        from ai_core import RULE_MATCHER as rules
+        settings, seeds = Config, SEED_EXAMPLES
+
+    examples = collect_training_examples(
+        rules.match,
+        args.commands_file,
+        settings.WORKSPACE_DIR / settings.HISTORY_FILE,
+        settings.WORKSPACE_DIR / settings.INTENT_TRAINING_LOG,
+        seeds,
+    )
+    start = time.perf_counter()
+    model = IntentClassifier()
+    model.fit(examples)
+    output = settings.WORKSPACE_DIR / settings.INTENT_MODEL_FILE
+    model.save(output)
+    correct = sum(1 for text, label in examples if (model.predict(text) or ("",))[0] == label)
+    print(f"Trained on {len(examples)} examples in {time.perf_counter() - start:.2f}s "
+          f"({len(model.labels)} labels, {correct}/{len(examples)} training accuracy). Saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
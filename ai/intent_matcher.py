@@ -0,0 +1,247 @@
+# intent_matcher.py
+"""
+Single-pass keyword matching for the rule-based command analyzers.
+
+Every analyzer declares its rules once at import time. The keywords of all
+rules are compiled into one Aho-Corasick automaton, so analyzing a command is
+a single linear scan followed by cheap set lookups, instead of one substring
+search per keyword.
+"""
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Openers skipped before checking where a command starts ("please help", "jarvis, read my clipboard")
+COURTESY_PREFIXES = ("please", "jarvis", "hey", "ok", "okay", "can you", "could you", "would you", "kindly")
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton over a fixed set of lowercase keywords."""
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords: List[str] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+
+        for keyword in dict.fromkeys(k.lower() for k in keywords if k):
+            self._add(keyword)
+        self._build_failure_links()
+
+    def _add(self, keyword: str):
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = next_state
+        self._out[state].append(len(self.keywords))
+        self.keywords.append(keyword)
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._out[next_state] = self._out[next_state] + self._out[self._fail[next_state]]
+
+    def find_all(self, text: str) -> List[Tuple[int, int, str]]:
+        """Returns (start, end, keyword) for every keyword occurrence in text."""
+        hits = []
+        state = 0
+        goto, fail, out, keywords = self._goto, self._fail, self._out, self.keywords
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for keyword_id in out[state]:
+                keyword = keywords[keyword_id]
+                hits.append((index + 1 - len(keyword), index + 1, keyword))
+        return hits
+
+
+def _is_word_boundary(text: str, start: int, end: int) -> bool:
+    before = text[start - 1] if start > 0 else " "
+    after = text[end] if end < len(text) else " "
+    return not (before.isalnum() or before == "_") and not (after.isalnum() or after == "_")
+
+
+def _command_span(text: str) -> Tuple[int, int]:
+    """Start and end of the command proper: after courtesy openers, before trailing punctuation."""
+    start = 0
+    while True:
+        for prefix in COURTESY_PREFIXES:
+            end = start + len(prefix)
+            if text.startswith(prefix, start) and _is_word_boundary(text, start, end):
+                start = end
+                while start < len(text) and text[start] in " ,":
+                    start += 1
+                break
+        else:
+            return start, len(text.rstrip(" .!?,"))
+
+
+class KeywordMatch:
+    """The keywords found in one command, with helpers for slot extraction."""
+
+    def __init__(self, command: str, text: str, hits: List[Tuple[int, int, str]]):
+        self.command = command
+        self.text = text
+        self.hits = hits
+        self.found = {keyword for _, _, keyword in hits}
+        self.words = {keyword for start, end, keyword in hits if _is_word_boundary(text, start, end)}
+        self.start, self.end = _command_span(text)
+
+    def has_any(self, keywords: Sequence[str], whole_words: bool = False) -> bool:
+        found = self.words if whole_words else self.found
+        return any(keyword in found for keyword in keywords)
+
+    def starts_with(self, keywords: Sequence[str]) -> bool:
+        """True when the command, after any courtesy opener, begins with one of the keywords as whole words."""
+        return any(start == self.start and keyword in keywords and _is_word_boundary(self.text, start, end)
+                   for start, end, keyword in self.hits)
+
+    def is_exactly(self, keywords: Sequence[str]) -> bool:
+        """True when the command, apart from courtesy openers and trailing punctuation, is one of the keywords."""
+        return any(start == self.start and end == self.end and keyword in keywords for start, end, keyword in self.hits)
+
+    def first(self, keywords: Sequence[str], whole_words: bool = False) -> Optional[Tuple[int, int, str]]:
+        """Returns the earliest occurrence of any of the keywords after the courtesy openers."""
+        for start, end, keyword in sorted(self.hits):
+            if start < self.start:
+                continue
+            if keyword in keywords and (not whole_words or _is_word_boundary(self.text, start, end)):
+                return start, end, keyword
+        return None
+
+    def after(self, keywords: Sequence[str], whole_words: bool = False) -> str:
+        """Returns the command text following the first matching keyword, up to any trailing punctuation."""
+        hit = self.first(keywords, whole_words)
+        if hit is None:
+            return ""
+        return self.command[hit[1]:max(hit[1], self.end)].strip()
+
+    def without(self, keywords: Sequence[str], whole_words: bool = True) -> str:
+        """Returns the lowercased command, without courtesy openers, with every occurrence of the keywords removed."""
+        spans = sorted(
+            (start, end) for start, end, keyword in self.hits
+            if keyword in keywords and self.start <= start and end <= self.end
+            and (not whole_words or _is_word_boundary(self.text, start, end))
+        )
+        pieces, cursor = [], self.start
+        for start, end in spans:
+            if start < cursor:
+                cursor = max(cursor, end)
+                continue
+            pieces.append(self.text[cursor:start])
+            cursor = end
+        pieces.append(self.text[cursor:self.end])
+        return " ".join("".join(pieces).split())
+
+
+class IntentRule:
+    """
+    One analyzer rule. The rule fires when every keyword group has at least one
+    hit; `build` turns the match into the analysis parameters. `slot_words` are
+    extra keywords `build` needs positions for (e.g. "about" before a topic);
+    they are compiled into the automaton but never trigger the rule.
+    `anchored` rules fire only when the command begins with a keyword of the
+    first group ("read my clipboard", not "what is a clipboard");
+    `whole_command` rules only when the command is one of those keywords.
+    """
+
+    def __init__(self, intent: str, action: str, groups: Sequence[Sequence[str]],
+                 confidence: float = 0.8, build: Optional[Callable[[KeywordMatch], Dict[str, Any]]] = None,
+                 whole_words: bool = False, slot_words: Sequence[str] = (), anchored: bool = False,
+                 whole_command: bool = False):
+        self.intent = intent
+        self.action = action
+        self.groups = [tuple(k.lower() for k in group) for group in groups]
+        self.confidence = confidence
+        self.build = build
+        self.whole_words = whole_words
+        self.slot_words = tuple(k.lower() for k in slot_words)
+        self.anchored = anchored
+        self.whole_command = whole_command
+
+    def matches(self, match: KeywordMatch) -> bool:
+        if self.whole_command and not match.is_exactly(self.groups[0]):
+            return False
+        if self.anchored and not match.starts_with(self.groups[0]):
+            return False
+        return all(match.has_any(group, self.whole_words) for group in self.groups)
+
+
+def _slots_filled(match: KeywordMatch, rule: IntentRule, parameters: Dict[str, Any]) -> bool:
+    """Every text slot has a value of its own: not empty, not the whole command, no words from before the trigger."""
+    hit = match.first(rule.groups[0], rule.whole_words)
+    before = set(match.text[match.start:hit[0]].split()) if hit else set()
+    whole = match.text[match.start:match.end]
+    for value in parameters.values():
+        if not isinstance(value, str):
+            continue
+        value = value.lower().strip()
+        if not value or value == whole or not before.isdisjoint(value.split()):
+            return False
+    return True
+
+
+class IntentMatcher:
+    """Evaluates an ordered rule table against a command in one automaton pass."""
+
+    def __init__(self, rules: List[IntentRule]):
+        self.rules = rules
+        self.automaton = KeywordAutomaton(
+            k for rule in rules for group in rule.groups + [rule.slot_words] for k in group
+        )
+
+    def scan(self, command: str) -> KeywordMatch:
+        text = command.lower().strip()
+        return KeywordMatch(command.strip(), text, self.automaton.find_all(text))
+
+    def match(self, command: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns {"intent", "action", "parameters", "confidence"} for the first
+        rule that fires, or None when no rule matches.
+        """
+        keyword_match = self.scan(command)
+        for rule in self.rules:
+            if rule.matches(keyword_match):
+                parameters = rule.build(keyword_match) if rule.build else {}
+                if parameters is None:
+                    continue
+                return {
+                    "intent": rule.intent,
+                    "action": rule.action,
+                    "parameters": parameters,
+                    "confidence": rule.confidence,
+                }
+        return None
+
+    def slots_for(self, command: str, intent: str, action: str) -> Optional[Dict[str, Any]]:
+        """
+        Extracts parameters for an intent/action decided elsewhere (e.g. by the
+        local classifier), using the first rule declared for that pair. Returns
+        None when this rule table has no such action, or when a text slot comes
+        out empty or is just the rest of the sentence ("i want to open a bank
+        account" is not a request to open "i want to a bank account").
+        """
+        keyword_match = None
+        for rule in self.rules:
+            if rule.intent != intent or rule.action != action:
+                continue
+            if not rule.build:
+                return {}
+            keyword_match = keyword_match or self.scan(command)
+            parameters = rule.build(keyword_match)
+            if parameters is not None:
+                return parameters if _slots_filled(keyword_match, rule, parameters) else None
+        return None
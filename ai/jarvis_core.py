@@ -1,6 +1,12 @@
 # jarvis_core.py
+import asyncio
 import os
+import threading
+from typing import Callable, Optional
+
 from ai_core import AI_Core
+from config import Config
+from event_loop import iterate_in_thread
 from file_manager import FileManager
 from system_controller import SystemController
 from web_controller import WebController
@@ -9,6 +15,19 @@ from clipboard_controller import ClipboardController
 from weather_controller import WeatherController
 from logger import log_info, log_error
 
+GREETING_REPLY = "How can I help you?"
+ERROR_REPLY = "I'm sorry, an unexpected error occurred."
+FALLBACK_REPLY = "I'm not sure how to do that. Try asking in a different way."
+# Replies that never change, synthesized ahead of time so they play instantly
+FIXED_REPLIES = [
+    GREETING_REPLY,
+    ERROR_REPLY,
+    FALLBACK_REPLY,
+    "Your workspace is empty.",
+    "Please specify a filename or search term.",
+    "Please specify a topic for the file content.",
+]
+
 class JarvisCore:
     """The core logic engine for the JARVIS AI assistant."""
 
@@ -24,87 +43,126 @@ class JarvisCore:
         self.weather_controller = WeatherController()
         self.voice_io = voice_io
         self.conversation_history = [] # For contextual memory
+        self._search_cancel: Optional[threading.Event] = None # Stops the file search in progress
+        if Config.TTS_PREWARM:
+            self.voice_io.prewarm(FIXED_REPLIES + [self._get_help_text()])
         log_info("JARVIS Core initialized.")
 
     def process_command(self, command: str) -> str:
         """
         Analyzes a command, executes the action, and speaks the response.
+        Blocking wrapper around process_command_async for callers without an event loop.
+        """
+        return asyncio.run(self.process_command_async(command))
+
+    async def process_command_async(self, command: str,
+                                    on_progress: Optional[Callable[[str], None]] = None) -> str:
+        """
+        Async pipeline behind process_command. Analysis, network lookups and
+        file work are awaited, so several commands can be in flight on one
+        event loop without blocking it. on_progress, if given, receives
+        partial output (file search hits) before the final response.
         """
         log_info(f"Processing command: '{command}'")
         if not command:
-            return "How can I help you?"
+            return GREETING_REPLY
 
         try:
             # Pass the command and history to the AI core for analysis
-            analysis = self.ai_core.analyze_command(command, self.conversation_history)
-            
-            response = "" # Initialize response string
+            analysis = await self.ai_core.analyze_command_async(command, self.conversation_history)
 
             # If AI provided a direct conversational response
             if analysis.get("response"):
                 response = analysis["response"]
             # Otherwise, execute the identified task
             else:
-                intent = analysis.get("intent", "conversation")
-                action = analysis.get("action", "chat")
-                params = analysis.get("parameters", {})
-
-                # CLEANED UP: Main logic router for all intents
-                if intent == "file_creation":
-                    response = self._handle_file_creation(action, params)
-                elif intent == "file_management":
-                    response = self._handle_file_management(action, params)
-                elif intent == "web_browse":
-                    response = self.web_controller.search_web(params.get("query", ""))
-                elif intent == "knowledge_inquiry":
-                    response = self.knowledge_controller.get_wikipedia_summary(params.get("topic", ""))
-                elif intent == "weather_inquiry":
-                    response = self.weather_controller.get_weather(params.get("city", ""))
-                elif intent == "clipboard_management":
-                    if action == "read_clipboard":
-                        response = self.clipboard_controller.read_clipboard()
-                    elif action == "write_clipboard":
-                        response = self.clipboard_controller.write_to_clipboard(params.get("text", ""))
-                elif intent == "system_control":
-                    if action == "take_screenshot":
-                        response = self.system_controller.take_screenshot()
-                    elif action == "get_system_status":
-                        response = self.system_controller.get_system_status(params.get("status_type", ""))
-                    elif action == "open_application":
-                        response = self.system_controller.open_application(params.get("application_name", ""))
-                elif intent == "help":
-                    response = self._get_help_text()
-                else: # Fallback to conversation
-                    response = "I'm not sure how to do that. Try asking in a different way."
+                response = await self._execute(analysis.get("intent", "conversation"),
+                                               analysis.get("action", "chat"),
+                                               analysis.get("parameters", {}), on_progress)
 
             # Update conversation history
             self.conversation_history.append({"role": "user", "content": command})
             self.conversation_history.append({"role": "assistant", "content": response})
             # Keep the history to the last 3 exchanges (6 items)
             self.conversation_history = self.conversation_history[-6:]
-            
-            # Speak the final response
+
+            # Speak the final response (speak() only queues the audio)
             self.voice_io.speak(response)
-            
+
             # Return the text for the GUI
             return response
 
         except Exception as e:
             log_error(f"Error processing command '{command}': {e}", exc_info=True)
-            error_message = "I'm sorry, an unexpected error occurred."
-            self.voice_io.speak(error_message)
-            return error_message
+            self.voice_io.speak(ERROR_REPLY)
+            return ERROR_REPLY
+
+    async def _execute(self, intent: str, action: str, params: dict,
+                       on_progress: Optional[Callable[[str], None]] = None) -> str:
+        """Main logic router for all intents."""
+        response = ""
+        if intent == "file_creation":
+            response = await self._handle_file_creation(action, params)
+        elif intent == "file_management":
+            if action == "find_file" and on_progress is not None and params.get("query"):
+                response = await self._stream_file_search(params["query"], on_progress)
+            else:
+                response = await asyncio.to_thread(self._handle_file_management, action, params)
+        elif intent == "web_browse":
+            response = await self.web_controller.search_web_async(params.get("query", ""))
+        elif intent == "knowledge_inquiry":
+            response = await self.knowledge_controller.get_wikipedia_summary_async(params.get("topic", ""))
+        elif intent == "weather_inquiry":
+            response = await self.weather_controller.get_weather_async(params.get("city", ""))
+        elif intent == "clipboard_management":
+            if action == "read_clipboard":
+                response = await self.clipboard_controller.read_clipboard_async()
+            elif action == "write_clipboard":
+                response = await self.clipboard_controller.write_to_clipboard_async(params.get("text", ""))
+        elif intent == "system_control":
+            if action == "take_screenshot":
+                response = await asyncio.to_thread(self.system_controller.take_screenshot)
+            elif action == "get_system_status":
+                response = await self.system_controller.get_system_status_async(params.get("status_type", ""))
+            elif action == "open_application":
+                response = await self.system_controller.open_application_async(params.get("application_name", ""))
+        elif intent == "help":
+            response = self._get_help_text()
+        else: # Fallback to conversation
+            response = FALLBACK_REPLY
+        return response
     
     # --- Helper methods (_handle_file_creation, etc.) are unchanged ---
-    def _handle_file_creation(self, action: str, params: dict) -> str:
+    async def _handle_file_creation(self, action: str, params: dict) -> str:
         topic = params.get("content_topic")
         if not topic:
             return "Please specify a topic for the file content."
         file_type_map = {'create_word': 'docx', 'create_excel': 'xlsx', 'create_pdf': 'pdf', 'create_python': 'py', 'create_text': 'txt'}
         file_type = file_type_map.get(action, 'txt')
         filename = f"{topic.replace(' ', '_').replace('.', '')[:30]}.{file_type}"
-        content = self.ai_core.generate_file_content(topic, file_type)
-        return self.file_manager.create_file(filename, content, file_type)
+        content = await self.ai_core.generate_file_content_async(topic, file_type)
+        return await asyncio.to_thread(self.file_manager.create_file, filename, content, file_type)
+
+    def cancel_search(self):
+        """Stops the file search in progress, if any."""
+        if self._search_cancel is not None:
+            self._search_cancel.set()
+
+    async def _stream_file_search(self, query: str, on_progress: Callable[[str], None]) -> str:
+        """
+        find_file with every match passed to on_progress as soon as it is
+        found. A newer search, or cancel_search(), stops this one.
+        """
+        self.cancel_search()
+        cancel = self._search_cancel = threading.Event()
+        on_progress(f"Searching for files matching '{query}':")
+        count = 0
+        async for path in iterate_in_thread(self.file_manager.iter_files(query, cancel), cancel):
+            count += 1
+            on_progress(f"- {path.name}")
+        if not count:
+            return f"No files found matching '{query}'."
+        return f"Found {count} file{'s' if count != 1 else ''} matching '{query}'."
 
     def _handle_file_management(self, action: str, params: dict) -> str:
         query = params.get("query")
@@ -120,6 +178,11 @@ class JarvisCore:
             if not results:
                 return f"No files found matching '{query}'."
             return "Found these files:\n" + "\n".join([f"- {r.name}" for r in results])
+        if action == "search_content":
+            results = self.file_manager.search_content(query)
+            if not results:
+                return f"No documents found about '{query}'."
+            return "These documents match best:\n" + "\n".join([f"- {r.name}" for r in results])
         if action == "delete_file":
             results = self.file_manager.find_files(query)
             if not results:
@@ -133,6 +196,7 @@ class JarvisCore:
         Here are some things I can do:
         - Create Files: "Create a python script for a timer"
         - Manage Files: "List files" or "Find my_report.docx"
+        - Search Documents: "Find the document about solar panels"
         - Open Apps: "Launch visual studio code"
         - Search Web: "Search for news about AI"
         - Get Info: "Tell me about the Roman Empire"
@@ -1,4 +1,5 @@
 # knowledge_controller.py
+import asyncio
 import wikipedia
 from logger import log_info, log_error
 
@@ -20,4 +21,8 @@ class KnowledgeController:
             return f"Sorry, I couldn't find a Wikipedia page for '{topic}'."
         except Exception as e:
             log_error(f"Wikipedia error: {e}")
-            return "Sorry, I had trouble connecting to Wikipedia."
\ No newline at end of file
+            return "Sorry, I had trouble connecting to Wikipedia."
+
+    async def get_wikipedia_summary_async(self, topic: str) -> str:
+        """Async variant; the wikipedia client is blocking, so it runs on a worker thread."""
+        return await asyncio.to_thread(self.get_wikipedia_summary, topic)
\ No newline at end of file
@@ -0,0 +1,361 @@
+# llm_gateway.py
+"""
+Single entry point for every LLM call made by the assistants (Gemini, OpenAI
+and Ollama).
+
+The gateway owns the connections (a keep-alive requests.Session pool for
+Ollama's HTTP API and one shared OpenAI client per key), puts a deadline on
+every call, trips a per-provider circuit breaker after repeated failures,
+can hedge a slow call by starting the same request on a second provider, and
+keeps a latency histogram per provider and model.
+"""
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from logger import log_info, log_warning
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (25, 50, 100, 200, 400, 800, 1600, 3200, 6400, 12800, 25600)
+
+# (provider, model, zero-argument callable) for a hedged request
+Attempt = Tuple[str, str, Callable[[], Any]]
+
+
+class LLMGatewayError(Exception):
+    """Base class for errors raised by the gateway itself."""
+
+
+class DeadlineExceeded(LLMGatewayError):
+    pass
+
+
+class CircuitOpenError(LLMGatewayError):
+    pass
+
+
+class TimedStream:
+    """
+    A streamed reply whose latency and outcome are recorded when the consumer
+    is done with the body (read to the end, failed, ran past the deadline, or
+    finish() called after an early stop), not when the stream was opened.
+    Other attributes (.text, .usage_metadata) are those of the wrapped reply.
+    """
+
+    def __init__(self, gateway: "LLMGateway", provider: str, model: str, response: Any, started_at: float,
+                 deadline: float):
+        self._gateway = gateway
+        self._provider = provider
+        self._model = model
+        self._response = response
+        self._started_at = started_at
+        self._deadline = deadline
+        self._recorded = False
+
+    def __iter__(self):
+        try:
+            for chunk in self._response:
+                if time.perf_counter() - self._started_at > self._deadline:
+                    raise DeadlineExceeded(f"{self._provider} stream ran past {self._deadline:.1f}s")
+                yield chunk
+        except Exception:
+            self._record(ok=False)
+            raise
+        self._record(ok=True)
+
+    def finish(self):
+        """Marks the stream done when the consumer stops reading early; no-op once recorded."""
+        self._record(ok=True)
+
+    def _record(self, ok: bool):
+        if not self._recorded:
+            self._recorded = True
+            self._gateway._observe(self._provider, self._model, self._started_at, ok)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._response, name)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with approximate percentiles."""
+
+    def __init__(self, buckets_ms=LATENCY_BUCKETS_MS):
+        self.buckets_ms = buckets_ms
+        self.counts = [0] * (len(buckets_ms) + 1)
+        self.total = 0
+        self.errors = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, elapsed_ms: float, ok: bool = True):
+        index = next((i for i, bound in enumerate(self.buckets_ms) if elapsed_ms <= bound), len(self.buckets_ms))
+        self.counts[index] += 1
+        self.total += 1
+        self.errors += 0 if ok else 1
+        self.sum_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound of the bucket holding the given fraction of calls."""
+        if not self.total:
+            return 0.0
+        target = fraction * self.total
+        running = 0
+        for index, count in enumerate(self.counts):
+            running += count
+            if running >= target:
+                return float(self.buckets_ms[index]) if index < len(self.buckets_ms) else self.max_ms
+        return self.max_ms
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "calls": self.total,
+            "errors": self.errors,
+            "mean_ms": round(self.sum_ms / self.total, 1) if self.total else 0.0,
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": round(self.max_ms, 1),
+            "buckets": dict(zip([f"<={b}" for b in self.buckets_ms] + ["inf"], self.counts)),
+        }
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls for
+    `reset_timeout` seconds; then lets one trial call through (half-open) and
+    closes again if it succeeds.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.reset_timeout else "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record(self, ok: bool):
+        with self._lock:
+            self._trial_in_flight = False
+            if ok:
+                self.failures = 0
+                self.opened_at = None
+                return
+            self.failures += 1
+            if self.failures >= self.failure_threshold or self.opened_at is not None:
+                self.opened_at = time.monotonic()
+
+
+class LLMGateway:
+    """Pooled, deadline-bound, breaker-protected access to the LLM providers."""
+
+    def __init__(self, deadline: float = 30.0, hedge_after: Optional[float] = None,
+                 breaker_failures: int = 5, breaker_reset: float = 30.0, pool_size: int = 10,
+                 ollama_url: str = "http://localhost:11434"):
+        self.deadline = deadline
+        self.hedge_after = hedge_after
+        self.ollama_url = ollama_url.rstrip("/")
+        self._breaker_args = (breaker_failures, breaker_reset)
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self._openai_clients: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=pool_size * 2, thread_name_prefix="llm")
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    # --- Core call path ---
+    def breaker(self, provider: str) -> CircuitBreaker:
+        with self._lock:
+            if provider not in self.breakers:
+                self.breakers[provider] = CircuitBreaker(*self._breaker_args)
+            return self.breakers[provider]
+
+    def _observe(self, provider: str, model: str, started_at: float, ok: bool):
+        elapsed_ms = (time.perf_counter() - started_at) * 1000
+        with self._lock:
+            histogram = self.histograms.setdefault((provider, model), LatencyHistogram())
+            histogram.observe(elapsed_ms, ok)
+        breaker = self.breaker(provider)
+        was_open = breaker.opened_at is not None
+        breaker.record(ok)
+        if not was_open and breaker.opened_at is not None:
+            log_warning(f"{provider} circuit opened after {breaker.failures} consecutive failures.")
+
+    def _run(self, provider: str, model: str, fn: Callable[[], Any]) -> Any:
+        if not self.breaker(provider).allow():
+            raise CircuitOpenError(f"{provider} circuit is open after repeated failures")
+        started_at = time.perf_counter()
+        try:
+            result = fn()
+        except Exception:
+            self._observe(provider, model, started_at, ok=False)
+            raise
+        self._observe(provider, model, started_at, ok=True)
+        return result
+
+    def call(self, provider: str, model: str, fn: Callable[[], Any], deadline: Optional[float] = None,
+             hedge: Optional[Attempt] = None, hedge_after: Optional[float] = None) -> Any:
+        """
+        Runs fn() under the provider's breaker and the deadline (seconds). With
+        `hedge`, the alternative attempt is started once the primary has taken
+        `hedge_after` seconds (or immediately if the primary fails) and the
+        first successful result wins.
+        """
+        alternate = None
+        if hedge is not None:
+            hedge_provider, hedge_model, hedge_fn = hedge
+            alternate = (hedge_provider, lambda: self._run(hedge_provider, hedge_model, hedge_fn))
+        return self._race((provider, lambda: self._run(provider, model, fn)), alternate, deadline, hedge_after)
+
+    def hedged(self, primary: Tuple[str, Callable[[], Any]], alternate: Tuple[str, Callable[[], Any]],
+               deadline: Optional[float] = None, hedge_after: Optional[float] = None) -> Any:
+        """
+        Races two (name, callable) operations that already go through the
+        gateway themselves, e.g. the same analysis on two providers.
+        """
+        return self._race(primary, alternate, deadline, hedge_after)
+
+    def stream(self, provider: str, model: str, fn: Callable[[], Any], deadline: Optional[float] = None) -> TimedStream:
+        """
+        Opens a streamed reply under the provider's breaker and the deadline. The
+        breaker and latency histogram are updated once the body has been
+        consumed (see TimedStream), so they cover the whole response.
+        """
+        deadline = self.deadline if deadline is None else deadline
+        if not self.breaker(provider).allow():
+            raise CircuitOpenError(f"{provider} circuit is open after repeated failures")
+        started_at = time.perf_counter()
+        try:
+            response = self._race((provider, fn), None, deadline, None)
+        except Exception:
+            self._observe(provider, model, started_at, ok=False)
+            raise
+        return TimedStream(self, provider, model, response, started_at, deadline)
+
+    def _race(self, primary: Tuple[str, Callable[[], Any]], alternate: Optional[Tuple[str, Callable[[], Any]]],
+              deadline: Optional[float], hedge_after: Optional[float]) -> Any:
+        deadline = self.deadline if deadline is None else deadline
+        hedge_after = self.hedge_after if hedge_after is None else hedge_after
+        now = time.monotonic()
+        end = now + deadline
+        hedge_at = now + (hedge_after or 0)
+        futures = {self._executor.submit(primary[1]): primary[0]}
+        hedge_started = alternate is None or hedge_after is None
+        errors: List[BaseException] = []
+
+        while futures:
+            now = time.monotonic()
+            if now >= end:
+                break
+            timeout = end - now if hedge_started else min(end, hedge_at) - now
+            done, _ = wait(list(futures), timeout=max(0.0, timeout), return_when=FIRST_COMPLETED)
+            for future in done:
+                winner = futures.pop(future)
+                if future.exception() is None:
+                    if alternate is not None and hedge_started:
+                        log_info(f"Hedged LLM call answered by {winner}.")
+                    return future.result()
+                errors.append(future.exception())
+            if not hedge_started and (time.monotonic() >= hedge_at or not futures):
+                log_info(f"Hedging {primary[0]} with {alternate[0]}.")
+                futures[self._executor.submit(alternate[1])] = alternate[0]
+                hedge_started = True
+
+        if futures:
+            raise DeadlineExceeded(f"{primary[0]} did not answer within {deadline:.1f}s")
+        raise errors[-1]
+
+    # --- Providers ---
+    def gemini(self, model_obj: Any, prompt: Any, model_name: str, deadline: Optional[float] = None,
+               **kwargs) -> Any:
+        """
+        generate_content with the deadline also passed down as the transport
+        timeout. With stream=True the reply is a TimedStream; consumers that
+        stop reading early call finish() on it.
+        """
+        deadline = self.deadline if deadline is None else deadline
+        kwargs.setdefault("request_options", {"timeout": deadline})
+        generate = lambda: model_obj.generate_content(prompt, **kwargs)
+        if kwargs.get("stream"):
+            return self.stream("gemini", model_name, generate, deadline)
+        return self.call("gemini", model_name, generate, deadline)
+
+    def openai_client(self, api_key: str):
+        """One shared client (and so one httpx connection pool) per API key."""
+        from openai import OpenAI
+
+        with self._lock:
+            if api_key not in self._openai_clients:
+                self._openai_clients[api_key] = OpenAI(api_key=api_key, timeout=self.deadline, max_retries=0)
+            return self._openai_clients[api_key]
+
+    def openai_chat(self, client: Any, deadline: Optional[float] = None, hedge: Optional[Attempt] = None,
+                    **kwargs) -> Any:
+        deadline = self.deadline if deadline is None else deadline
+        model = kwargs.get("model", "unknown")
+        return self.call("openai", model, lambda: client.chat.completions.create(timeout=deadline, **kwargs),
+                         deadline, hedge=hedge)
+
+    def ollama_generate(self, model: str, prompt: str, deadline: Optional[float] = None, **options) -> str:
+        """Non-streaming /api/generate over the pooled session; returns the response text."""
+        deadline = self.deadline if deadline is None else deadline
+        payload = {"model": model, "prompt": prompt, "stream": False, **options}
+
+        def request():
+            response = self.session.post(f"{self.ollama_url}/api/generate", json=payload, timeout=deadline)
+            response.raise_for_status()
+            return response.json().get("response", "")
+
+        return self.call("ollama", model, request, deadline)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            latency = {f"{provider}/{model}": h.summary() for (provider, model), h in self.histograms.items()}
+            breakers = {provider: b.state for provider, b in self.breakers.items()}
+        return {"latency": latency, "breakers": breakers}
+
+
+_gateway: Optional[LLMGateway] = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway() -> LLMGateway:
+    """The process-wide gateway, created on first use from the Config settings."""
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            from config import Config
+
+            _gateway = LLMGateway(
+                deadline=Config.LLM_DEADLINE_SECONDS,
+                hedge_after=Config.LLM_HEDGE_AFTER_SECONDS,
+                breaker_failures=Config.LLM_BREAKER_FAILURES,
+                breaker_reset=Config.LLM_BREAKER_RESET_SECONDS,
+                ollama_url=Config.OLLAMA_URL,
+            )
+        return _gateway
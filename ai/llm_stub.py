@@ -0,0 +1,214 @@
+# llm_stub.py
+"""
+A local stand-in for the LLM providers, used by the benchmark harness.
+
+It speaks just enough of the Gemini REST API (generateContent and
+streamGenerateContent), the OpenAI chat completions API and Ollama's
+/api/generate for the assistants' clients, and answers after a configurable
+latency. Replies come from an answer table keyed by command: the stub finds the
+known command that appears last in the request's user text and returns its
+analysis as JSON, or a plain chat analysis when none matches.
+
+Run it on its own to point an assistant at it by hand:
+    python llm_stub.py --port 8765 --latency-ms 400
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+from logger import log_info
+
+CHAT_ANALYSIS = {"intent": "conversation", "action": "chat", "parameters": {}, "response": "OK."}
+
+
+class StubLLMServer:
+    """Threaded HTTP server that imitates the LLM providers with a fixed latency."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 300.0,
+                 jitter_ms: float = 0.0, stream_chunks: int = 3, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.stream_chunks = max(1, stream_chunks)
+        self.answers: Dict[str, Dict[str, Any]] = {}
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubLLMServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="llm-stub", daemon=True)
+        self._thread.start()
+        log_info(f"Stub LLM server listening on {self.url} ({self.latency_ms:.0f}ms ± {self.jitter_ms:.0f}ms).")
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def set_answers(self, answers: Dict[str, Dict[str, Any]]):
+        """Replaces the answer table; keys are commands, matched case-insensitively."""
+        with self._lock:
+            self.answers = {command.lower(): analysis for command, analysis in answers.items()}
+
+    def answer_for(self, text: str) -> Dict[str, Any]:
+        """The analysis of the known command that appears last (longest on ties) in text."""
+        lowered = text.lower()
+        with self._lock:
+            best, best_key = None, (-1, 0)
+            for command, analysis in self.answers.items():
+                position = lowered.rfind(command)
+                if position >= 0 and (position + len(command), len(command)) > best_key:
+                    best, best_key = analysis, (position + len(command), len(command))
+        return dict(best) if best is not None else dict(CHAT_ANALYSIS)
+
+    def delay(self) -> float:
+        with self._lock:
+            self.requests += 1
+            jitter = self._random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        return max(0.0, self.latency_ms + jitter) / 1000
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    body = json.loads(self.rfile.read(length) or b"{}")
+                except json.JSONDecodeError:
+                    body = {}
+                path = self.path.split("?")[0]
+                if ":streamGenerateContent" in path:
+                    self._gemini_stream(body)
+                elif ":generateContent" in path:
+                    time.sleep(stub.delay())
+                    self._send_json(_gemini_reply(_reply_text(stub, _gemini_user_text(body))))
+                elif path.endswith("/chat/completions"):
+                    time.sleep(stub.delay())
+                    self._send_json(_openai_reply(_reply_text(stub, _openai_user_text(body)), body.get("model", "")))
+                elif path.endswith("/api/generate"):
+                    time.sleep(stub.delay())
+                    self._send_json({"model": body.get("model", ""), "done": True,
+                                     "response": _reply_text(stub, str(body.get("prompt", "")))})
+                else:
+                    self._send_json({"error": {"message": f"Unknown stub endpoint {path}"}}, status=404)
+
+            def do_GET(self):
+                # OpenAI clients probe /models on start-up
+                self._send_json({"object": "list", "data": []})
+
+            def _gemini_stream(self, body):
+                """The reply split into chunks; the first arrives after the latency, the rest just after."""
+                text = _reply_text(stub, _gemini_user_text(body))
+                size = -(-len(text) // stub.stream_chunks)
+                pieces = [text[i:i + size] for i in range(0, len(text), size)] or [""]
+                sse = "alt=sse" in self.path
+                time.sleep(stub.delay())
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream" if sse else "application/json")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                if not sse:
+                    self._write_chunk("[")
+                for i, piece in enumerate(pieces):
+                    payload = json.dumps(_gemini_reply(piece, final=i == len(pieces) - 1))
+                    self._write_chunk(f"data: {payload}\r\n\r\n" if sse else ("," if i else "") + payload)
+                if not sse:
+                    self._write_chunk("]")
+                self.wfile.write(b"0\r\n\r\n")
+
+            def _write_chunk(self, text: str):
+                data = text.encode("utf-8")
+                self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+
+            def _send_json(self, payload, status: int = 200):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+
+def _reply_text(stub: StubLLMServer, user_text: str) -> str:
+    return json.dumps(stub.answer_for(user_text), ensure_ascii=False)
+
+
+def _gemini_user_text(body: Dict[str, Any]) -> str:
+    contents = body.get("contents") or [{}]
+    return " ".join(part.get("text", "") for part in contents[-1].get("parts", []))
+
+
+def _openai_user_text(body: Dict[str, Any]) -> str:
+    messages = [m for m in body.get("messages", []) if m.get("role") == "user"]
+    return str(messages[-1].get("content", "")) if messages else ""
+
+
+def _gemini_reply(text: str, final: bool = True) -> Dict[str, Any]:
+    candidate = {"content": {"parts": [{"text": text}], "role": "model"}, "index": 0}
+    reply = {"candidates": [candidate]}
+    if final:
+        candidate["finishReason"] = "STOP"
+        reply["usageMetadata"] = {"promptTokenCount": 0, "candidatesTokenCount": len(text) // 4,
+                                  "totalTokenCount": len(text) // 4}
+    return reply
+
+
+def _openai_reply(text: str, model: str) -> Dict[str, Any]:
+    return {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 0, "completion_tokens": len(text) // 4, "total_tokens": len(text) // 4},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Gemini, OpenAI and Ollama APIs.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--answers", help="JSON file mapping commands to the analysis to return")
+    args = parser.parse_args()
+
+    server = StubLLMServer(port=args.port, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms)
+    if args.answers:
+        with open(args.answers, encoding="utf-8") as f:
+            server.set_answers(json.load(f))
+    server.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
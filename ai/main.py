@@ -9,6 +9,7 @@ import pygame
 from jarvis_core import JarvisCore
 from voice_io import VoiceIO
 from gui import App
+from event_loop import BackgroundLoop
 from logger import log_info, log_error
 
 def main():
@@ -41,11 +42,13 @@ def main():
         pygame.quit()
         sys.exit(1)
 
-    # Launch the GUI
-    app = App(jarvis=jarvis_brain, voice_io=voice_interface)
+    # Launch the GUI, with commands running on a background event loop
+    background_loop = BackgroundLoop().start()
+    app = App(jarvis=jarvis_brain, voice_io=voice_interface, background_loop=background_loop)
     app.mainloop()
     
     # Clean up
+    background_loop.stop()
     pygame.quit()
     log_info("Application shutting down.")
 
@@ -0,0 +1,100 @@
+# prompt_compiler.py
+"""
+Prompt assembly for the command analyzers.
+
+Each prompt is split once, at import, into a static system part (role,
+intent/action tables, output format) and a small per-call part (history and
+the command). The static part is dedented and formatted once and handed to
+the provider as the system instruction of a model built once; it is still
+sent with every request, but byte-identical, so it forms a stable leading
+prefix that providers with automatic prefix caching (OpenAI) can reuse. Every
+call records its token usage, system part included.
+"""
+import textwrap
+import threading
+import time
+from typing import Any, Dict, List, Sequence, Union
+
+from logger import log_info
+
+
+class PromptTemplate:
+    """A prompt compiled into a static system part and a dynamic user part."""
+
+    def __init__(self, name: str, system: Union[str, Sequence[str]], user: str):
+        parts = [system] if isinstance(system, str) else list(system)
+        self.name = name
+        self.system = "\n\n".join(textwrap.dedent(part).strip() for part in parts if part.strip())
+        self.user_template = textwrap.dedent(user).strip()
+
+    def render(self, **values: Any) -> str:
+        """Fills in the per-call part; values are inserted verbatim."""
+        return self.user_template.format(**values)
+
+    def inline(self, **values: Any) -> str:
+        """System and user parts as one string, for providers without system instructions."""
+        return f"{self.system}\n\n{self.render(**values)}"
+
+    def openai_messages(self, **values: Any) -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": self.system},
+            {"role": "user", "content": self.render(**values)},
+        ]
+
+
+def usage_from_response(response: Any) -> Dict[str, int]:
+    """Reads token counts from a Gemini (usage_metadata) or OpenAI (usage) response."""
+    usage: Dict[str, int] = {}
+    try:
+        metadata = getattr(response, "usage_metadata", None)
+    except Exception:
+        # A stream abandoned early has no usage yet
+        return usage
+    if metadata is not None:
+        fields = {"prompt_tokens": "prompt_token_count", "completion_tokens": "candidates_token_count",
+                  "cached_tokens": "cached_content_token_count", "total_tokens": "total_token_count"}
+    else:
+        metadata = getattr(response, "usage", None)
+        fields = {"prompt_tokens": "prompt_tokens", "completion_tokens": "completion_tokens",
+                  "total_tokens": "total_tokens"}
+    if metadata is None:
+        return usage
+    for key, attribute in fields.items():
+        value = getattr(metadata, attribute, None)
+        if isinstance(value, int):
+            usage[key] = value
+    cached = getattr(getattr(metadata, "prompt_tokens_details", None), "cached_tokens", None)
+    if isinstance(cached, int):
+        usage["cached_tokens"] = cached
+    return usage
+
+
+class TokenLedger:
+    """Per-call and cumulative token, byte and latency accounting."""
+
+    def __init__(self):
+        self.calls: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, sent_text: str, response: Any, started_at: float) -> Dict[str, Any]:
+        """Records one call; started_at is the time.perf_counter() value taken before the request."""
+        entry = usage_from_response(response)
+        entry["request_bytes"] = len(sent_text.encode("utf-8"))
+        entry["latency_ms"] = round((time.perf_counter() - started_at) * 1000, 1)
+        with self._lock:
+            totals = self.calls.setdefault(name, {"calls": 0})
+            totals["calls"] += 1
+            for key, value in entry.items():
+                totals[key] = totals.get(key, 0) + value
+        log_info(f"LLM call '{name}': " + ", ".join(f"{k}={v}" for k, v in entry.items()))
+        return entry
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Per prompt: call count, summed counters and the mean latency."""
+        with self._lock:
+            result = {}
+            for name, totals in self.calls.items():
+                result[name] = dict(totals)
+                result[name]["mean_latency_ms"] = round(totals.get("latency_ms", 0) / totals["calls"], 1)
+            return result
+
@@ -0,0 +1,102 @@
+# sentence_segmenter.py
+from typing import List, Optional
+
+TERMINATORS = ".!?…"
+CLOSERS = "\"')]}”’"
+CLAUSE_BREAKS = ",;:—"
+# Words whose trailing period does not end a sentence ("Dr. Smith", "e.g. this")
+ABBREVIATIONS = {
+    "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "mt", "vs", "etc", "e.g", "i.e", "cf",
+    "approx", "fig", "inc", "ltd", "co", "corp", "dept", "est", "min", "max", "avg", "jan", "feb",
+    "mar", "apr", "jun", "jul", "aug", "sep", "sept", "oct", "nov", "dec", "u.s", "u.k", "a.m", "p.m",
+}
+
+
+class SentenceSegmenter:
+    """
+    Splits streamed text into speakable chunks as it arrives.
+
+    Text is scanned once, from a cursor that only moves forward, so each token
+    costs the same however long the stream gets. A chunk ends at a sentence
+    terminator followed by whitespace (skipping abbreviations, initials,
+    decimals and list numbers) or at a line break, once it is at least
+    min_chars long; text that runs past max_chars without one is cut at the
+    last clause break or space. Every boundary is emitted exactly once.
+    """
+
+    def __init__(self, min_chars: int = 20, max_chars: int = 200):
+        self.min_chars = min_chars
+        self.max_chars = max(max_chars, min_chars + 1)
+        self._buffer = ""  # Text not yet emitted
+        self._cursor = 0   # _buffer[:_cursor] holds no usable boundary
+
+    def feed(self, text: str) -> List[str]:
+        """Adds streamed text and returns the chunks it completed."""
+        self._buffer += text
+        chunks = []
+        while True:
+            end = self._next_boundary()
+            if end is None:
+                return chunks
+            chunk = self._buffer[:end].strip()
+            self._buffer = self._buffer[end:]
+            self._cursor = 0
+            if chunk:
+                chunks.append(chunk)
+
+    def flush(self) -> List[str]:
+        """Returns whatever is left once the stream ends."""
+        rest = self._buffer.strip()
+        self._buffer = ""
+        self._cursor = 0
+        return [rest] if rest else []
+
+    def _next_boundary(self) -> Optional[int]:
+        buffer = self._buffer
+        i = self._cursor
+        while i < len(buffer):
+            if i >= self.max_chars:
+                return self._forced_split()
+            char = buffer[i]
+            end = None
+            if char == "\n":
+                end = i + 1
+            elif char in TERMINATORS:
+                j = i + 1
+                while j < len(buffer) and (buffer[j] in TERMINATORS or buffer[j] in CLOSERS):
+                    j += 1
+                if j == len(buffer):
+                    # Can't tell "3." from "3.5" or "U." from "U.S." yet
+                    self._cursor = i
+                    return None
+                if buffer[j].isspace() and not (char == "." and self._is_abbreviation(i)):
+                    end = j
+                i = j - 1
+            if end is not None and len(buffer[:end].strip()) >= self.min_chars:
+                return end
+            i += 1
+        self._cursor = i
+        return None
+
+    def _is_abbreviation(self, period: int) -> bool:
+        """True when the period at this index closes an abbreviation, an initial or a list number."""
+        start = period
+        while start > 0 and not self._buffer[start - 1].isspace():
+            start -= 1
+        word = self._buffer[start:period].lstrip("(\"'“‘").lower()
+        if word in ABBREVIATIONS or (len(word) == 1 and word.isalpha()):
+            return True
+        if word.isdigit():
+            # "1. First step" at the start of a line is a list marker, not a sentence
+            before = self._buffer[:start].rstrip(" \t")
+            return not before or before.endswith("\n")
+        return False
+
+    def _forced_split(self) -> int:
+        """Cut an overlong run at the last clause break, else the last space, before max_chars."""
+        window = self._buffer[:self.max_chars]
+        for separators in (CLAUSE_BREAKS, " \t"):
+            cut = max(window.rfind(sep) for sep in separators)
+            if cut + 1 >= self.min_chars:
+                return cut + 1
+        return self.max_chars
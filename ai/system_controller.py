@@ -1,10 +1,16 @@
 # system_controller.py
+import asyncio
 import os
 import subprocess
 import platform
+import shutil
+import threading
+import time
 import psutil
 
 from config import Config
+from app_catalog import scan_catalog
+from app_matcher import AppMatcher, confident
 from logger import log_info, log_error
 
 class SystemController:
@@ -12,12 +18,47 @@ class SystemController:
 
     def __init__(self):
         self.system = platform.system().lower()
+        self._app_matcher = None # Built from the scanned apps on first use
+        self._scan_lock = threading.Lock()
         log_info(f"System controller initialized for OS: {self.system}")
 
+    def _get_app_matcher(self) -> AppMatcher:
+        with self._scan_lock:
+            if self._app_matcher is None:
+                start = time.perf_counter()
+                self._app_matcher = AppMatcher(scan_catalog(), Config.APP_ALIASES)
+                log_info(f"Indexed {len(self._app_matcher.entries)} installed apps and aliases "
+                         f"in {time.perf_counter() - start:.2f}s.")
+        return self._app_matcher
+
+    def _find_installed_app(self, app_name: str) -> tuple[str | None, list[str]]:
+        """
+        Looks app_name up among the installed apps (Start Menu, .desktop
+        entries, PATH), tolerating speech-recognition typos such as "fire fox".
+        Returns (path or alias command, []) when one app matches confidently,
+        otherwise (None, names of the closest apps) to offer instead of
+        launching a guess.
+        """
+        matches = self._get_app_matcher().search(app_name, limit=3)
+        if not matches:
+            return None, []
+        log_info(f"App matches for '{app_name}': " + ", ".join(f"{name} ({score:.2f})" for score, name, _ in matches))
+        best = confident(matches)
+        if best:
+            return best[2], []
+        return None, [name for _, name, _ in matches]
+
     def open_application(self, app_name: str) -> str:
         """Opens an application using its name or alias."""
         app_name_lower = app_name.lower()
         command = Config.APP_ALIASES.get(app_name_lower, app_name_lower)
+        # Apps that are not on PATH are looked up in the scanned Start Menu / .desktop entries
+        if self.system != "darwin" and not shutil.which(command):
+            found, suggestions = self._find_installed_app(app_name_lower)
+            if suggestions:
+                options = suggestions[0] if len(suggestions) == 1 else ", ".join(suggestions[:-1]) + " or " + suggestions[-1]
+                return f"I couldn't find an app called '{app_name}'. Did you mean {options}?"
+            command = found or command
         
         try:
             log_info(f"Attempting to open '{app_name}' with command '{command}'")
@@ -27,6 +68,8 @@ class SystemController:
                 subprocess.run(["open", "-a", command], check=True)
             else: # Linux
                 subprocess.Popen([command], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            if self._app_matcher is not None:
+                self._app_matcher.record_launch(command)
             
             return f"Successfully launched {app_name}."
         except FileNotFoundError:
@@ -41,6 +84,7 @@ class SystemController:
         """
         Gets a specific system status metric.
         """
+        status_type = (status_type or "").lower()
         if "cpu" in status_type:
             cpu_percent = psutil.cpu_percent(interval=1)
             return f"Current CPU usage is at {cpu_percent}%."
@@ -49,4 +93,22 @@ class SystemController:
             memory_percent = memory.percent
             memory_gb = round(memory.used / (1024**3), 2)
             return f"Current RAM usage is at {memory_percent}%, which is {memory_gb} gigabytes."
-        return "I'm not sure which system status you mean. Try 'CPU' or 'RAM'."
\ No newline at end of file
+        return "I'm not sure which system status you mean. Try 'CPU' or 'RAM'."
+
+    async def open_application_async(self, app_name: str) -> str:
+        return await asyncio.to_thread(self.open_application, app_name)
+
+    async def get_system_status_async(self, status_type: str) -> str:
+        """
+        Async variant of get_system_status. The one-second CPU sample is taken
+        with an awaited sleep between two non-blocking readings instead of
+        psutil's blocking interval. status_type may be None: every analysis
+        parameter is nullable in the structured reply schema.
+        """
+        status_type = (status_type or "").lower()
+        if "cpu" in status_type:
+            psutil.cpu_percent(interval=None)
+            await asyncio.sleep(1)
+            cpu_percent = psutil.cpu_percent(interval=None)
+            return f"Current CPU usage is at {cpu_percent}%."
+        return self.get_system_status(status_type)
\ No newline at end of file
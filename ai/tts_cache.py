@@ -0,0 +1,125 @@
+# tts_cache.py
+import hashlib
+import json
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from logger import log_info, log_warning
+
+
+class TTSCache:
+    """
+    Content-addressed, size-capped disk cache of synthesized speech.
+
+    Each clip is stored as ``<sha256>.audio`` where the hash covers the voice id,
+    model id, output format, voice settings and normalized text, so changing
+    any of them simply misses instead of replaying stale audio. File
+    modification times double as the LRU clock: hits touch the file, and the
+    least recently used clips are deleted once the folder grows past
+    ``max_bytes``.
+    """
+
+    SUFFIX = ".audio"
+
+    def __init__(self, folder: Path, max_bytes: int = 50 * 1024 * 1024):
+        self.folder = Path(folder)
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[str, int]" = OrderedDict()  # key -> size, least recently used first
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Unicode-normalizes the text and collapses whitespace; case and punctuation shape speech, so they stay."""
+        return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", text)).strip()
+
+    def key(self, voice_id: str, model_id: str, output_format: str,
+            voice_settings: Optional[Dict[str, Any]], text: str) -> str:
+        payload = json.dumps([voice_id, model_id, output_format, voice_settings or {}, self.normalize(text)],
+                             sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.folder / f"{key}{self.SUFFIX}"
+
+    def _load(self):
+        try:
+            self.folder.mkdir(parents=True, exist_ok=True)
+            clips = []
+            for entry in os.scandir(self.folder):
+                if entry.name.endswith(self.SUFFIX) and entry.is_file():
+                    stat = entry.stat()
+                    clips.append((stat.st_mtime, entry.name[:-len(self.SUFFIX)], stat.st_size))
+        except OSError as e:
+            log_warning(f"Could not read TTS cache folder {self.folder}: {e}")
+            return
+        for _, key, size in sorted(clips):
+            self.entries[key] = size
+            self.total_bytes += size
+        if clips:
+            log_info(f"Loaded {len(clips)} cached speech clips ({self.total_bytes // 1024} KB).")
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self.entries
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            if key not in self.entries:
+                self.misses += 1
+                return None
+            path = self._path(key)
+            try:
+                audio = path.read_bytes()
+                os.utime(path)
+            except OSError:
+                self.total_bytes -= self.entries.pop(key)
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return audio
+
+    def put(self, key: str, audio: bytes):
+        if not audio or len(audio) > self.max_bytes:
+            return
+        path = self._path(key)
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        try:
+            tmp.write_bytes(audio)
+            os.replace(tmp, path)
+        except OSError as e:
+            log_warning(f"Could not write TTS cache entry: {e}")
+            tmp.unlink(missing_ok=True)
+            return
+        with self._lock:
+            self.total_bytes += len(audio) - self.entries.pop(key, 0)
+            self.entries[key] = len(audio)
+            self._evict()
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and self.entries:
+            key, size = self.entries.popitem(last=False)
+            self.total_bytes -= size
+            self.evictions += 1
+            self._path(key).unlink(missing_ok=True)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "bytes": self.total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -7,8 +7,13 @@ import threading
 import queue
 import time
 import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from audio_output import AudioStream, PCMOutput
 from config import Config
+from sentence_segmenter import SentenceSegmenter
 from logger import log_info, log_error, log_warning
+from tts_cache import TTSCache
 
 class VoiceIO:
     def __init__(self, api_key: str):
@@ -19,8 +24,16 @@ class VoiceIO:
         # Audio queue for faster processing
         self.audio_queue = queue.Queue()
         self.audio_thread = None
+        self.playback_thread = None
+        self.synth_pool = ThreadPoolExecutor(max_workers=Config.TTS_SYNTH_WORKERS, thread_name_prefix="tts")
+        # Bounded, so synthesis runs at most TTS_LOOKAHEAD_CHUNKS ahead of playback
+        self.playback_queue = queue.Queue(maxsize=Config.TTS_LOOKAHEAD_CHUNKS)
         self.is_playing = False
         self.current_audio_id = 0
+        self._session_started = None  # (audio_id, perf_counter) until the session's first audio plays
+        self.ttfa_samples = deque(maxlen=50)  # Recent time-to-first-audio measurements, in seconds
+        self.tts_cache = TTSCache(Config.WORKSPACE_DIR / Config.TTS_CACHE_DIR,
+                                  max_bytes=Config.TTS_CACHE_MAX_MB * 1024 * 1024)
         
         # Initialize pygame mixer for audio playback
         try:
@@ -29,6 +42,10 @@ class VoiceIO:
             log_info("Pygame mixer initialized for audio playback.")
         except Exception as e:
             log_error(f"Failed to initialize pygame mixer: {e}")
+
+        # Raw PCM output stream, so speech starts on the first buffer instead of after the whole clip
+        self.pcm_output = PCMOutput.open(Config.TTS_PCM_SAMPLE_RATE) if Config.TTS_STREAMING else None
+        self.output_format = f"pcm_{Config.TTS_PCM_SAMPLE_RATE}" if self.pcm_output else Config.TTS_MP3_FORMAT
             
         if api_key:
             try:
@@ -79,8 +96,7 @@ class VoiceIO:
         chunks = self._split_text_into_chunks(text)
         
         # Generate audio ID for this speech session
-        audio_id = self.current_audio_id
-        self.current_audio_id += 1
+        audio_id = self._begin_session()
         
         # Add chunks to queue with audio ID
         for chunk in chunks:
@@ -96,8 +112,7 @@ class VoiceIO:
         self.clear_audio_queue()
         
         # Generate audio ID for this speech session
-        audio_id = self.current_audio_id
-        self.current_audio_id += 1
+        audio_id = self._begin_session()
         
         # Start a thread to process streaming text
         threading.Thread(
@@ -108,38 +123,18 @@ class VoiceIO:
 
     def _process_streaming_text(self, text_generator, audio_id):
         """Process streaming text and convert to audio chunks."""
-        accumulated_text = ""
+        segmenter = SentenceSegmenter(Config.SPEECH_CHUNK_MIN_CHARS, Config.SPEECH_CHUNK_MAX_CHARS)
         
         for text_chunk in text_generator:
-            accumulated_text += text_chunk
-            
-            # Check if we have a complete sentence or phrase
-            sentences = self._extract_complete_sentences(accumulated_text)
-            
-            for sentence in sentences:
-                if sentence.strip():
-                    self.audio_queue.put((sentence.strip(), audio_id))
-                    accumulated_text = accumulated_text.replace(sentence, "", 1)
+            # Stop reading the stream once newer speech has replaced it
+            if self._is_stale(audio_id):
+                return
+            for sentence in segmenter.feed(text_chunk):
+                self.audio_queue.put((sentence, audio_id))
         
         # Add any remaining text
-        if accumulated_text.strip():
-            self.audio_queue.put((accumulated_text.strip(), audio_id))
-
-    def _extract_complete_sentences(self, text):
-        """Extract complete sentences from text."""
-        # Split by sentence endings, but keep some for context
-        sentences = []
-        
-        # Look for sentence endings
-        sentence_endings = re.findall(r'[^.!?]*[.!?]+', text)
-        
-        # Also split on natural pauses (commas, semicolons) for faster speech
-        if not sentence_endings:
-            clause_endings = re.findall(r'[^,;]*[,;]+', text)
-            if clause_endings:
-                return clause_endings[:1]  # Return first clause
-        
-        return sentence_endings
+        for sentence in segmenter.flush():
+            self.audio_queue.put((sentence, audio_id))
 
     def _split_text_into_chunks(self, text, max_chunk_size=200):
         """Split text into manageable chunks for faster processing."""
@@ -164,78 +159,169 @@ class VoiceIO:
         return chunks
 
     def _start_audio_thread(self):
-        """Start the background audio processing thread."""
+        """Start the synthesis dispatcher and the ordered playback thread."""
         self.audio_thread = threading.Thread(target=self._process_audio_queue, daemon=True)
         self.audio_thread.start()
+        self.playback_thread = threading.Thread(target=self._process_playback_queue, daemon=True)
+        self.playback_thread.start()
+
+    def _begin_session(self) -> int:
+        audio_id = self.current_audio_id
+        self.current_audio_id += 1
+        self._session_started = (audio_id, time.perf_counter())
+        return audio_id
+
+    def _note_first_audio(self, audio_id):
+        """Records time-to-first-audio the first time a session produces sound."""
+        started = self._session_started
+        if started is None or started[0] != audio_id:
+            return
+        self._session_started = None
+        ttfa = time.perf_counter() - started[1]
+        self.ttfa_samples.append(ttfa)
+        log_info(f"Time to first audio: {ttfa * 1000:.0f} ms")
+
+    def latency_stats(self) -> dict:
+        """Time-to-first-audio over recent speech sessions, in milliseconds."""
+        samples = sorted(self.ttfa_samples)
+        if not samples:
+            return {"sessions": 0, "last_ttfa_ms": None, "median_ttfa_ms": None}
+        return {
+            "sessions": len(samples),
+            "last_ttfa_ms": self.ttfa_samples[-1] * 1000,
+            "median_ttfa_ms": samples[len(samples) // 2] * 1000,
+        }
+
+    def _is_stale(self, audio_id) -> bool:
+        """Chunks from an interrupted speech session are never played."""
+        return audio_id != self.current_audio_id - 1
 
     def _process_audio_queue(self):
-        """Process audio generation in background thread."""
-        current_session_id = None
-        
+        """Hand queued chunks to the synthesis pool in order, so the next ones are ready when playback gets to them."""
         while True:
+            text, audio_id = self.audio_queue.get()
             try:
-                item = self.audio_queue.get(timeout=1)
-                text, audio_id = item
-                
-                # Skip if this is from an old session
-                if current_session_id is not None and audio_id != current_session_id:
-                    current_session_id = audio_id
+                if not text or self._is_stale(audio_id):
+                    self.audio_queue.task_done()
                     continue
-                
-                current_session_id = audio_id
-                
-                if text:
-                    self._generate_and_play_audio(text)
-                self.audio_queue.task_done()
-            except queue.Empty:
-                continue
+                stream = AudioStream()
+                future = self.synth_pool.submit(self._fetch_audio, text, stream)
+                # Blocks while playback is TTS_LOOKAHEAD_CHUNKS behind
+                self.playback_queue.put((future, stream, audio_id))
             except Exception as e:
                 log_error(f"Error in audio processing thread: {e}")
+                self.audio_queue.task_done()
 
-    def _generate_and_play_audio(self, text: str):
-        """Generate and play audio synchronously."""
-        try:
-            self.is_playing = True
-            log_info(f"Generating audio for: '{text[:30]}...'")
+    def _process_playback_queue(self):
+        """Play synthesized chunks back to back, in the order they were queued."""
+        while True:
+            future, stream, audio_id = self.playback_queue.get()
+            try:
+                if self._is_stale(audio_id):
+                    future.cancel()
+                    continue
+                if self.pcm_output:
+                    self._play_pcm_stream(stream, audio_id)
+                    continue
+                audio_bytes = b"".join(stream)
+                if audio_bytes and not self._is_stale(audio_id):
+                    self.is_playing = True
+                    self._note_first_audio(audio_id)
+                    self._play_audio_with_pygame(audio_bytes)
+            except Exception as e:
+                log_error(f"Error in audio playback thread: {e}")
+            finally:
+                self.is_playing = False
+                self.audio_queue.task_done()
 
-            # Use turbo model for faster generation
-            audio_generator = self.eleven_client.text_to_speech.convert(
-                voice_id=Config.ELEVENLABS_VOICE_ID,
-                text=text,
-                model_id="eleven_turbo_v2",  # Faster model
-                voice_settings={
-                    "stability": 0.5,
-                    "similarity_boost": 0.5,
-                    "style": 0.0,
-                    "use_speaker_boost": False
-                }
-            )
+    def prewarm(self, phrases):
+        """Synthesize fixed phrases missing from the speech cache in a background thread."""
+        if not self.eleven_client:
+            return
+        threading.Thread(target=self._prewarm, args=(list(phrases),), daemon=True).start()
 
-            # Convert generator to bytes
-            audio_bytes = b"".join(audio_generator)
-            
-            log_info("Playing audio...")
-            self._play_audio_with_pygame(audio_bytes)
-            
-        except Exception as e:
-            log_error(f"ElevenLabs error during audio generation: {e}")
-            
-            # Try alternative method
+    def _prewarm(self, phrases):
+        # Chunk exactly as speak() does so the cached clips match what gets queued
+        chunks = [chunk for phrase in phrases for chunk in self._split_text_into_chunks(phrase) if chunk.strip()]
+        missing = [chunk for chunk in chunks if self._cache_key(chunk) not in self.tts_cache]
+        for chunk in missing:
             try:
-                response = self.eleven_client.text_to_speech.convert_as_stream(
-                    voice_id=Config.ELEVENLABS_VOICE_ID,
-                    text=text,
-                    model_id="eleven_turbo_v2"
-                )
-                
-                audio_bytes = b"".join(response)
-                log_info("Playing audio with alternative method...")
-                self._play_audio_with_pygame(audio_bytes)
+                self._synthesize(chunk)
+            except Exception as e:
+                log_warning(f"Speech cache pre-warm stopped: {e}")
+                return
+        if missing:
+            log_info(f"Pre-warmed speech cache with {len(missing)} phrases.")
+
+    def _cache_key(self, text: str) -> str:
+        return self.tts_cache.key(Config.ELEVENLABS_VOICE_ID, Config.ELEVENLABS_MODEL_ID, self.output_format,
+                                  Config.ELEVENLABS_VOICE_SETTINGS, text)
+
+    def _synthesize(self, text: str, stream: AudioStream = None) -> bytes:
+        """Generate audio with ElevenLabs, feeding it to stream as it arrives, and store it in the speech cache."""
+        # Use turbo model for faster generation
+        audio_generator = self.eleven_client.text_to_speech.convert(
+            voice_id=Config.ELEVENLABS_VOICE_ID,
+            text=text,
+            model_id=Config.ELEVENLABS_MODEL_ID,
+            output_format=self.output_format,
+            voice_settings=Config.ELEVENLABS_VOICE_SETTINGS
+        )
+
+        pieces = []
+        for piece in audio_generator:
+            pieces.append(piece)
+            if stream is not None:
+                stream.feed(piece)
+        audio_bytes = b"".join(pieces)
+        self.tts_cache.put(self._cache_key(text), audio_bytes)
+        return audio_bytes
+
+    def _fetch_audio(self, text: str, stream: AudioStream):
+        """Fill stream with audio for one chunk (cached or generated as it arrives). Runs on the synthesis pool."""
+        try:
+            audio_bytes = self.tts_cache.get(self._cache_key(text))
+            if audio_bytes is not None:
+                log_info(f"Using cached audio for: '{text[:30]}...'")
+                stream.feed(audio_bytes)
+                return
+
+            try:
+                log_info(f"Generating audio for: '{text[:30]}...'")
+                self._synthesize(text, stream)
+            except Exception as e:
+                log_error(f"ElevenLabs error during audio generation: {e}")
+                if stream.received:
+                    return  # Part of the chunk is already playing; don't start it over
                 
-            except Exception as fallback_error:
-                log_error(f"Fallback audio generation also failed: {fallback_error}")
+                # Try alternative method
+                try:
+                    response = self.eleven_client.text_to_speech.convert_as_stream(
+                        voice_id=Config.ELEVENLABS_VOICE_ID,
+                        text=text,
+                        model_id=Config.ELEVENLABS_MODEL_ID,
+                        output_format=self.output_format
+                    )
+                    
+                    log_info("Streaming audio with alternative method...")
+                    for piece in response:
+                        stream.feed(piece)
+                    
+                except Exception as fallback_error:
+                    log_error(f"Fallback audio generation also failed: {fallback_error}")
         finally:
-            self.is_playing = False
+            stream.finish()
+
+    def _play_pcm_stream(self, stream: AudioStream, audio_id):
+        """Write PCM to the output stream piece by piece, starting on the first buffer."""
+        for piece in stream:
+            if self._is_stale(audio_id):
+                # stop_audio() only flags the interrupt; the stream is flushed here, on its own thread
+                self.pcm_output.drop_if_interrupted()
+                break
+            self.is_playing = True
+            self._note_first_audio(audio_id)
+            self.pcm_output.write(piece)
 
     def _play_audio_with_pygame(self, audio_bytes: bytes):
         """Play audio using pygame mixer with optimizations."""
@@ -265,14 +351,27 @@ class VoiceIO:
         while not self.audio_queue.empty():
             try:
                 self.audio_queue.get_nowait()
+                self.audio_queue.task_done()
+            except queue.Empty:
+                break
+        # Drop chunks already handed to the synthesis pool
+        while not self.playback_queue.empty():
+            try:
+                future, _, _ = self.playback_queue.get_nowait()
+                future.cancel()
+                self.audio_queue.task_done()
             except queue.Empty:
                 break
 
     def stop_audio(self):
         """Stop any currently playing audio."""
         try:
+            # End the current session so chunks still being synthesized are skipped
+            self.current_audio_id += 1
             if pygame.mixer.music.get_busy():
                 pygame.mixer.music.stop()
+            if self.pcm_output:
+                self.pcm_output.interrupt()
             self.clear_audio_queue()
         except Exception as e:
             log_error(f"Error stopping audio: {e}")
@@ -1,4 +1,5 @@
 # weather_controller.py
+import asyncio
 import os
 import requests
 from logger import log_info, log_error
@@ -39,4 +40,8 @@ class WeatherController:
             return f"Sorry, there was an error with the weather service: {e}"
         except Exception as e:
             log_error(f"Weather fetch error: {e}")
-            return "Sorry, I was unable to fetch the weather data."
\ No newline at end of file
+            return "Sorry, I was unable to fetch the weather data."
+
+    async def get_weather_async(self, city: str) -> str:
+        """Async variant of get_weather; the HTTP request runs on a worker thread."""
+        return await asyncio.to_thread(self.get_weather, city)
\ No newline at end of file
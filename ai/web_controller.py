@@ -1,4 +1,5 @@
 # web_controller.py
+import asyncio
 import webbrowser
 from logger import log_info, log_error
 
@@ -17,4 +18,7 @@ class WebController:
             return f"Searching the web for: '{query}'"
         except Exception as e:
             log_error(f"Web search failed: {e}")
-            return "An error occurred while trying to open your web browser."
\ No newline at end of file
+            return "An error occurred while trying to open your web browser."
+
+    async def search_web_async(self, query: str) -> str:
+        return await asyncio.to_thread(self.search_web, query)
\ No newline at end of file
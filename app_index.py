@@ -0,0 +1,229 @@
+import json
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+
+from update_apps import BINARY_CACHE_FILE, CACHE_FILE, print_report, refresh_apps_cache, update_apps_cache
+# update_apps puts ./ai on sys.path
+from app_matcher import AppMatcher, confident
+from binary_app_cache import MappedAppCache, write_app_cache
+
+
+class AppIndex:
+    """
+    Index of the installed apps listed in apps_cache.json.
+
+    Loaded once at startup by memory-mapping apps_cache.bin (converted from the
+    JSON cache when missing or older): exact and prefix lookups are binary
+    searches and no per-app objects are built up front. An index given a list
+    of records keeps them in memory instead. Lookups never touch PowerShell.
+
+    Matching follows apppath.ps1 (case-insensitive "*name*"), but an exact name
+    beats a prefix, and a prefix beats a match in the middle of a name. Names
+    that match nothing that way ("fire fox", "vs cold") fall back to a
+    typo-tolerant ranked match. Call refresh() to pick up installed or removed apps;
+    lookups on other threads keep answering from the previous index meanwhile.
+    """
+
+    def __init__(self, apps=None, cache_file=CACHE_FILE, binary_file=BINARY_CACHE_FILE):
+        self.cache_file = cache_file
+        self.binary_file = binary_file
+        self.loaded_at = None
+        self._current = None  # (records, index), replaced whole on every (re)load
+        self._matcher = None  # (index, AppMatcher) once suggest() has run
+        self._lock = threading.Lock()
+        self._readers = 0     # Lookups running right now
+        self._retired = []    # Replaced states whose map closes once no lookup is running
+        self._set_apps(apps or [])
+
+    def _set_apps(self, apps):
+        """Indexes a list of records, or serves lookups straight from a MappedAppCache."""
+        if isinstance(apps, MappedAppCache):
+            index = apps
+        else:
+            entries = []
+            by_name = {}
+            for app in apps:
+                name, path = app.get("Name"), app.get("Path")
+                if not name or not path:
+                    continue
+                priority = app.get("Priority") or 0
+                for alias in [name, *(app.get("Aliases") or [])]:
+                    key = alias.lower()
+                    entries.append((key, priority, path))
+                    by_name.setdefault(key, []).append((priority, path))
+            # Key order, as in the binary cache, so both indexes rank ties the same way
+            entries.sort(key=lambda entry: entry[0])
+            index = (entries, by_name)
+        with self._lock:
+            # A lookup already running keeps the state it started with, so the old map
+            # is only closed once the last such lookup has finished
+            previous, self._current = self._current, (apps, index)
+            self.loaded_at = time.time()
+            if self._readers:
+                self._retired.append(previous)
+                previous = None
+        self._release(previous)
+
+    @contextmanager
+    def _reading(self):
+        """The current (records, index), kept open until the caller is done with it."""
+        with self._lock:
+            self._readers += 1
+            current = self._current
+        try:
+            yield current
+        finally:
+            with self._lock:
+                self._readers -= 1
+                retired = [] if self._readers else self._retired
+                if not self._readers:
+                    self._retired = []
+            for state in retired:
+                self._release(state)
+
+    def _release(self, state):
+        apps = state[0] if state else None
+        if isinstance(apps, MappedAppCache):
+            apps.close()
+            if apps.file_path != self.binary_file:
+                # A staged copy that could not be renamed over the cache (Windows)
+                try:
+                    os.remove(apps.file_path)
+                except OSError:
+                    pass
+
+    def _reload(self):
+        """Maps the binary cache, regenerating it from the JSON cache if that is newer or unreadable."""
+        try:
+            if not os.path.exists(self.binary_file) or \
+                    os.path.getmtime(self.cache_file) > os.path.getmtime(self.binary_file):
+                self._rebuild()
+            try:
+                mapped = MappedAppCache(self.binary_file)
+            except (ValueError, struct.error) as e:
+                print(f"⚠️ '{self.binary_file}' is damaged ({e}); rebuilding it from '{self.cache_file}'.")
+                self._rebuild()
+                mapped = MappedAppCache(self.binary_file)
+            self._set_apps(mapped)
+            return True
+        except (OSError, ValueError, AttributeError, struct.error) as e:
+            print(f"⚠️ Could not read '{self.binary_file}': {e}")
+            return False
+
+    def _rebuild(self):
+        with open(self.cache_file, "r", encoding="utf-8-sig") as f:
+            write_app_cache(self.binary_file, json.load(f))
+
+    @classmethod
+    def load(cls, cache_file=CACHE_FILE, binary_file=BINARY_CACHE_FILE):
+        """Maps the cache file; builds it with a full scan only if it does not exist yet."""
+        index = cls(cache_file=cache_file, binary_file=binary_file)
+        if not os.path.exists(cache_file):
+            print(f"⚠️ '{cache_file}' not found. Scanning installed apps once...")
+            index.refresh()
+            return index
+        start = time.perf_counter()
+        if index._reload():
+            print(f"📇 Loaded {len(index)} apps from {binary_file} in {(time.perf_counter() - start) * 1000:.1f} ms.")
+        return index
+
+    def refresh(self, full=False):
+        """
+        Rescans the roots that changed since the last refresh (every root with
+        full=True), then swaps in the new index. The old one keeps serving
+        lookups until then.
+        """
+        # The rescan writes a new file rather than the one that is mapped, which
+        # Windows would refuse to replace
+        staged = f"{self.binary_file}.{time.time_ns()}"
+        if full:
+            refreshed = update_apps_cache(binary_file=staged)
+        else:
+            report = refresh_apps_cache(binary_file=staged)
+            print_report(report)
+            refreshed = report is not None
+        if not os.path.exists(staged):
+            # Nothing changed or the scan failed: a mapped index stays as it is
+            if isinstance(self._current[0], MappedAppCache):
+                return refreshed
+            return self._reload() and refreshed
+        try:
+            self._set_apps(MappedAppCache(staged))
+        except (OSError, ValueError, struct.error) as e:
+            print(f"⚠️ Could not read '{staged}': {e}")
+            try:
+                os.remove(staged)
+            except OSError:
+                pass
+            return False
+        try:
+            # POSIX: the map follows the renamed file. Windows keeps the staged file
+            # until the map closes; apps_cache.bin is then regenerated on the next load
+            os.replace(staged, self.binary_file)
+        except OSError:
+            pass
+        return refreshed
+
+    def __len__(self):
+        with self._reading() as (_, index):
+            return len(index) if isinstance(index, MappedAppCache) else len(index[0])
+
+    def _tiers(self, index, query):
+        """(priority, path) lists for exact, prefix and inner matches."""
+        if isinstance(index, MappedAppCache):
+            exact, prefix = index.exact(query), index.prefix(query)
+            yield [(index.priority(i), index.path(i)) for i in exact]
+            yield [(index.priority(i), index.path(i)) for i in prefix if i not in exact]
+            yield [(index.priority(i), index.path(i)) for i in index.containing(query) if i not in prefix]
+            return
+        entries, by_name = index
+        yield by_name.get(query, [])
+        starts, inner = [], []
+        for key, priority, path in entries:
+            if key == query or query not in key:
+                continue
+            (starts if key.startswith(query) else inner).append((priority, path))
+        yield starts
+        yield inner
+
+    def _candidates(self, app_name):
+        query = app_name.lower().strip()
+        if not query:
+            return
+        with self._reading() as (_, index):
+            # Decoded before the index is let go, so a refresh can close it afterwards
+            tiers = list(self._tiers(index, query))
+        seen = set()
+        for tier in tiers:
+            # Within a tier, higher launch priority first (catalog Priority; 0 for older caches)
+            for _, path in sorted(tier, key=lambda match: -match[0]):
+                if path not in seen:
+                    seen.add(path)
+                    yield path
+
+    def matches(self, app_name):
+        """Paths of every app whose name or alias contains app_name, best match first."""
+        return list(self._candidates(app_name))
+
+    def suggest(self, app_name, limit=5):
+        """Typo-tolerant ranked (score, name, path) matches, best first."""
+        with self._reading() as (apps, index):
+            cached = self._matcher
+            if cached is not None and cached[0] is index:
+                matcher = cached[1]
+            else:
+                # Rebuilt from the current records on the first use after a (re)load
+                matcher = AppMatcher(apps)
+                self._matcher = (index, matcher)
+        return matcher.search(app_name, limit)
+
+    def find(self, app_name):
+        """Best matching path that still exists on disk, or None. Typo matches count only when unambiguous."""
+        for path in self._candidates(app_name):
+            if os.path.exists(path):
+                return path
+        match = confident([m for m in self.suggest(app_name) if os.path.exists(m[2])])
+        return match[2] if match else None
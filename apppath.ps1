@@ -3,6 +3,21 @@
 $ErrorActionPreference = "SilentlyContinue"
 $ProgressPreference = "SilentlyContinue"
 
+function Get-ShortcutApps([string]$path) {
+    if (Test-Path $path) {
+        $shell = New-Object -ComObject WScript.Shell
+        Get-ChildItem -Path $path -Recurse -Include *.lnk | ForEach-Object {
+            $shortcut = $shell.CreateShortcut($_.FullName)
+            if ($shortcut.TargetPath -and (Test-Path $shortcut.TargetPath)) {
+                [PSCustomObject]@{
+                    Name = $_.BaseName
+                    Path = $shortcut.TargetPath
+                }
+            }
+        }
+    }
+}
+
 function Get-AllApps {
     $apps = @()
 
@@ -13,18 +28,7 @@ function Get-AllApps {
     )
 
     foreach ($path in $startMenuPaths) {
-        if (Test-Path $path) {
-            Get-ChildItem -Path $path -Recurse -Include *.lnk | ForEach-Object {
-                $shell = New-Object -ComObject WScript.Shell
-                $shortcut = $shell.CreateShortcut($_.FullName)
-                if ($shortcut.TargetPath -and (Test-Path $shortcut.TargetPath)) {
-                    [PSCustomObject]@{
-                        Name = $_.BaseName
-                        Path = $shortcut.TargetPath
-                    }
-                }
-            }
-        }
+        Get-ShortcutApps $path
     }
 
     $env:Path.Split(";") | Where-Object { $_ -and $_.Trim() -ne "" } | ForEach-Object {
@@ -11,7 +11,9 @@ class FileManager:
     
     def list_files(self):
         """List all files in the workspace"""
-        files = os.listdir(self.workspace_dir)
+        # One scandir pass; each entry is stat()ed once for both size and mtime
+        with os.scandir(self.workspace_dir) as entries:
+            files = [(entry.name, entry.stat()) for entry in entries]
         
         if not files:
             return "📭 Workspace is empty. Create some files first!"
@@ -19,13 +21,11 @@ class FileManager:
         print("📁 Workspace Files:")
         print("=" * 40)
         
-        for file in files:
-            filepath = os.path.join(self.workspace_dir, file)
-            size = os.path.getsize(filepath)
-            modified = datetime.fromtimestamp(os.path.getmtime(filepath))
+        for file, stat in files:
+            modified = datetime.fromtimestamp(stat.st_mtime)
             
             print(f"📄 {file}")
-            print(f"   Size: {size} bytes")
+            print(f"   Size: {stat.st_size} bytes")
             print(f"   Modified: {modified.strftime('%Y-%m-%d %H:%M:%S')}")
             print()
         
@@ -1,61 +1,34 @@
 import subprocess
-import json
 import sys
 import os
 
-# The PowerShell script is expected to be in the same directory
-POWERSHELL_SCRIPT = "apppath.ps1"
+from app_index import AppIndex
+
+# Loaded once; lookups are answered from memory instead of running apppath.ps1
+APP_INDEX = AppIndex.load()
 
 def find_app_path(app_name):
     """
-    Runs the PowerShell script to find the full path of an application.
+    Looks up the full path of an application in the in-memory app index.
     """
     print(f"🤖 Searching for '{app_name}'...")
 
-    if not os.path.exists(POWERSHELL_SCRIPT):
-        print(f"⚠️ Error: The script '{POWERSHELL_SCRIPT}' was not found.")
-        return None
-
-    try:
-        # Command to execute the PowerShell script with the app name as an argument
-        ps_command = [
-            "powershell.exe",
-            "-ExecutionPolicy", "Bypass",
-            "-File", POWERSHELL_SCRIPT,
-            "-AppName", app_name
-        ]
-
-        # We use Popen and communicate to avoid potential deadlocks with stdout/stderr
-        process = subprocess.Popen(ps_command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-        stdout, stderr = process.communicate()
+    app_path = APP_INDEX.find(app_name)
+    if app_path:
+        print(f"✅ Found it! Path is: {app_path}")
+        return app_path
 
-        # Handle PowerShell errors
-        if process.returncode != 0 or "NOT_FOUND" in stdout:
-            print(f"😞 Sorry, I couldn't find an application matching '{app_name}'.")
-            if stderr:
-                print(f"   Error details: {stderr.strip()}")
-            return None
-
-        # The PowerShell script should return the path directly
-        app_path = stdout.strip()
-        if os.path.exists(app_path):
-            print(f"✅ Found it! Path is: {app_path}")
-            return app_path
-        else:
-            print(f"🤔 The script returned a path, but it doesn't seem valid: {app_path}")
-            return None
-
-    except FileNotFoundError:
-        print("❌ Error: 'powershell.exe' is not installed or not in your system's PATH.")
-        return None
-    except Exception as e:
-        print(f"An unexpected error occurred: {e}")
-        return None
+    print(f"😞 Sorry, I couldn't find an application matching '{app_name}'.")
+    suggestions = APP_INDEX.suggest(app_name, 3)
+    if suggestions:
+        print(f"   Did you mean: {', '.join(name for _, name, _ in suggestions)}?")
+    print("   Run 'python main.py --refresh' if it was installed recently.")
+    return None
 
 def open_application(app_path):
     """
     Opens the application at the given path.
-    The .exe is already part of the path returned by the PowerShell script.
+    The .exe is already part of the path stored in the app index.
     """
     if not app_path:
         return
@@ -70,7 +43,10 @@ def open_application(app_path):
 
 if __name__ == "__main__":
     # Get the application name from the command line arguments
-    if len(sys.argv) > 1:
+    if len(sys.argv) > 1 and sys.argv[1] in ("--refresh", "--full-refresh"):
+        if APP_INDEX.refresh(full=sys.argv[1] == "--full-refresh"):
+            print(f"✅ App index refreshed ({len(APP_INDEX)} apps).")
+    elif len(sys.argv) > 1:
         app_to_find = sys.argv[1]
         path = find_app_path(app_to_find)
         if path:
@@ -14,10 +14,33 @@ import pyttsx3
 from pathlib import Path
 from datetime import datetime
 import requests
-import openai
 from transformers import pipeline, AutoTokenizer, AutoModelForCausalLM
 import torch
 
+# Shared analysis modules live with the modular assistant in ../ai
+sys.path.append(str(Path(__file__).resolve().parent.parent / "ai"))
+from intent_matcher import IntentMatcher, IntentRule
+from llm_gateway import get_gateway
+
+CREATE_WORDS = ['create', 'make', 'new', 'write']
+OPEN_WORDS = ['open', 'launch', 'start']
+
+# Compiled once at import so the rule fallback scans each command a single time
+RULE_MATCHER = IntentMatcher([
+    IntentRule("file_creation", "create_website", [CREATE_WORDS, ['website', 'html']],
+               build=lambda m: {"type": "website"}),
+    IntentRule("file_creation", "create_code", [CREATE_WORDS, ['code', 'python']],
+               build=lambda m: {"type": "python"}),
+    IntentRule("file_creation", "create_text", [CREATE_WORDS, ['text', 'note']],
+               build=lambda m: {"type": "text"}),
+    IntentRule("system_control", "open_calculator", [OPEN_WORDS, ['calculator']], confidence=0.9,
+               build=lambda m: {"application": "calculator"}),
+    IntentRule("system_control", "open_notepad", [OPEN_WORDS, ['notepad']], confidence=0.9,
+               build=lambda m: {"application": "notepad"}),
+    IntentRule("web_browsing", "web_search", [['search', 'google', 'browse']], confidence=0.7,
+               build=lambda m: {"query": m.without(['search', 'google'], whole_words=False)}),
+])
+
 class JarvisAI:
     def __init__(self):
         self.system = platform.system().lower()
@@ -63,7 +86,7 @@ class JarvisAI:
             # Setup OpenAI if API key available
             openai_key = os.getenv('OPENAI_API_KEY')
             if openai_key:
-                self.openai_client = openai.OpenAI(api_key=openai_key)
+                self.openai_client = get_gateway().openai_client(openai_key)
                 print("✅ OpenAI API connected")
             
             # Try loading local model
@@ -147,7 +170,8 @@ class JarvisAI:
         """
         
         try:
-            response = self.openai_client.chat.completions.create(
+            response = get_gateway().openai_chat(
+                self.openai_client,
                 model="gpt-3.5-turbo",
                 messages=[{"role": "user", "content": prompt}],
                 max_tokens=200
@@ -188,65 +212,16 @@ class JarvisAI:
     
     def _analyze_with_rules(self, command):
         """Fallback rule-based analysis"""
-        command_lower = command.lower()
-        
-        # File creation patterns
-        if any(word in command_lower for word in ['create', 'make', 'new', 'write']):
-            if 'website' in command_lower or 'html' in command_lower:
-                return {
-                    "intent": "file_creation",
-                    "action": "create_website",
-                    "parameters": {"type": "website"},
-                    "confidence": 0.8
-                }
-            elif 'code' in command_lower or 'python' in command_lower:
-                return {
-                    "intent": "file_creation", 
-                    "action": "create_code",
-                    "parameters": {"type": "python"},
-                    "confidence": 0.8
-                }
-            elif 'text' in command_lower or 'note' in command_lower:
-                return {
-                    "intent": "file_creation",
-                    "action": "create_text",
-                    "parameters": {"type": "text"},
-                    "confidence": 0.8
-                }
-        
-        # System control patterns
-        elif any(word in command_lower for word in ['open', 'launch', 'start']):
-            if 'calculator' in command_lower:
-                return {
-                    "intent": "system_control",
-                    "action": "open_calculator", 
-                    "parameters": {"application": "calculator"},
-                    "confidence": 0.9
-                }
-            elif 'notepad' in command_lower:
-                return {
-                    "intent": "system_control",
-                    "action": "open_notepad",
-                    "parameters": {"application": "notepad"},
-                    "confidence": 0.9
-                }
-        
-        # Web browsing patterns
-        elif any(word in command_lower for word in ['search', 'google', 'browse']):
+        analysis = RULE_MATCHER.match(command)
+        if analysis is None:
+            # Default conversation
             return {
-                "intent": "web_browsing",
-                "action": "web_search",
-                "parameters": {"query": command_lower.replace('search', '').replace('google', '').strip()},
-                "confidence": 0.7
+                "intent": "conversation",
+                "action": "chat",
+                "parameters": {"message": command},
+                "confidence": 0.5
             }
-        
-        # Default conversation
-        return {
-            "intent": "conversation",
-            "action": "chat",
-            "parameters": {"message": command},
-            "confidence": 0.5
-        }
+        return analysis
     
     def _extract_action(self, command, intent):
         """Extract specific action from command"""
@@ -419,7 +394,8 @@ if __name__ == "__main__":
         """Handle information requests"""
         if self.openai_client:
             try:
-                response = self.openai_client.chat.completions.create(
+                response = get_gateway().openai_chat(
+                    self.openai_client,
                     model="gpt-3.5-turbo",
                     messages=[{"role": "user", "content": params.get("message", "")}],
                     max_tokens=150
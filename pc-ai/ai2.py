@@ -12,10 +12,89 @@ import requests # For fetching image from URL if you implement vision model
 import openai
 import google.generativeai as genai # Import the Gemini library
 from google.api_core.exceptions import GoogleAPIError # For specific Gemini errors
-from openai import OpenAI # Specific import for OpenAI client
 from dotenv import load_dotenv # For loading environment variables from a .env file
 import shutil # For robust app opening on Linux
 
+# Shared analysis modules live with the modular assistant in ../ai
+sys.path.append(str(Path(__file__).resolve().parent.parent / "ai"))
+from intent_matcher import IntentMatcher, IntentRule
+from analysis_router import CascadingRouter
+from llm_gateway import LLMGatewayError, get_gateway
+
+CREATE_WORDS = ['create', 'make', 'new', 'write', 'generate']
+OPEN_WORDS = ['open', 'launch', 'start']
+WEB_SEARCH_PHRASES = ['search for', 'google', 'browse', 'go to website', 'find on web', 'search']
+PARAMETER_KEYS = ["filename", "content", "search_query", "application", "url", "message"]
+# Rule answers at or above this confidence are acted on without waiting for the LLM
+RULE_CONFIDENCE_BAR = 0.9
+GEMINI_MODEL = 'gemini-1.5-flash'
+OPENAI_MODEL = "gpt-3.5-turbo-0125"
+# Power actions are never taken on a keyword match alone
+LLM_CONFIRMED_ACTIONS = {"shutdown_system", "restart_system"}
+
+
+def _web_search_query(match):
+    """Everything after the last search phrase, minus a trailing 'in google'/'on the web'."""
+    suffixes = [(start, end) for start, end, keyword in match.hits if keyword in ("in google", "on the web")]
+    hits = [end for start, end, keyword in match.hits
+            if keyword in WEB_SEARCH_PHRASES and not any(s <= start and end <= e for s, e in suffixes)]
+    query_part = match.text[max(hits):].strip() if hits else match.text
+    for suffix in ("in google", "on the web"):
+        if query_part.endswith(suffix):
+            query_part = query_part[:-len(suffix)].strip()
+    return {"search_query": query_part if query_part and query_part != 'the' else None}
+
+
+def _website_url(match):
+    url_part = match.without(['open website'], whole_words=False)
+    return {"url": url_part} if "." in url_part else None
+
+
+# Compiled once at import so the rule fallback scans each command a single time
+RULE_MATCHER = IntentMatcher([
+    IntentRule("file_creation", "create_website", [CREATE_WORDS, ['website', 'html']],
+               build=lambda m: {"type": "website", "filename": "jarvis_website.html"}),
+    IntentRule("file_creation", "create_code", [CREATE_WORDS, ['code', 'python']],
+               build=lambda m: {"type": "python", "filename": "jarvis_script.py"}),
+    IntentRule("file_creation", "create_text", [CREATE_WORDS, ['text', 'note']],
+               build=lambda m: {"type": "text", "filename": "jarvis_note.txt"}),
+    IntentRule("system_control", "open_calculator", [OPEN_WORDS, ['calculator']], confidence=0.9,
+               build=lambda m: {"application": "calculator"}),
+    IntentRule("system_control", "open_notepad", [OPEN_WORDS, ['notepad', 'text editor']], confidence=0.9,
+               build=lambda m: {"application": "notepad"}),
+    IntentRule("system_control", "open_app", [OPEN_WORDS, ['settings']], confidence=0.7,
+               build=lambda m: {"application": "settings"}),
+    IntentRule("system_control", "open_app", [OPEN_WORDS, ['chrome', 'google chrome']],
+               build=lambda m: {"application": "Google Chrome"}),
+    IntentRule("system_control", "open_app", [OPEN_WORDS, ['opera']],
+               build=lambda m: {"application": "Opera"}),
+    IntentRule("system_control", "shutdown_system", [['shutdown']], confidence=0.95),
+    IntentRule("system_control", "restart_system", [['restart']], confidence=0.95),
+    IntentRule("web_Browse", "web_search", [WEB_SEARCH_PHRASES], confidence=0.7, build=_web_search_query,
+               slot_words=['in google', 'on the web']),
+    IntentRule("web_Browse", "open_url", [['open'], ['website']], build=_website_url,
+               slot_words=['open website']),
+    IntentRule("file_management", "list_files", [['list files', 'show files']], confidence=0.85),
+    IntentRule("file_management", "open_file", [['open file']], confidence=0.7,
+               build=lambda m: {"filename": m.after(['open file']).lower() or None}),
+    IntentRule("information", "general_query",
+               [['what is', 'how to', 'tell me about', 'explain', 'who is', 'define', 'how is the weather']],
+               confidence=0.6, build=lambda m: {"message": m.command}),
+])
+
+def analyze_with_rules(command):
+    """Rule-based analysis; also what ai/intent_benchmark.py replays for this assistant."""
+    analysis = RULE_MATCHER.match(command)
+    if analysis is None:
+        analysis = {"intent": "conversation", "action": "chat", "parameters": {"message": command}, "confidence": 0.5}
+
+    # Downstream handlers expect every parameter key to be present
+    parameters = dict.fromkeys(PARAMETER_KEYS)
+    parameters.update(analysis["parameters"])
+    analysis["parameters"] = parameters
+    return analysis
+
+
 class JarvisAI:
     def __init__(self):
         # Load environment variables from .env file (if it exists)
@@ -35,6 +114,7 @@ class JarvisAI:
         # AI Model configurations
         self.openai_client = None
         self.gemini_client = None # New attribute for Gemini client
+        self.gateway = get_gateway() # Pooled, deadline-bound access to every provider
         # Removed local_gen_model and nlp_classifier as per request
 
         # Command categories and their associated actions
@@ -48,6 +128,12 @@ class JarvisAI:
         }
 
         self.setup_ai_models()
+        # A confident rule answer never reaches the LLM
+        self.router = CascadingRouter(
+            [("rules", self._analyze_with_fast_rules, RULE_CONFIDENCE_BAR)],
+            self._analyze_with_llm,
+            speculative=True,
+        )
         print(f"🤖 JARVIS AI Assistant initialized")
         print(f"💻 System: {platform.system()}")
         print(f"🏠 Workspace: {self.workspace_dir}")
@@ -60,7 +146,7 @@ class JarvisAI:
         openai_key = os.getenv('OPENAI_API_KEY')
         if openai_key:
             try:
-                self.openai_client = OpenAI(api_key=openai_key)
+                self.openai_client = self.gateway.openai_client(openai_key)
                 # Test connection (optional, but good for early feedback)
                 self.openai_client.models.list() 
                 print("✅ OpenAI API connected")
@@ -76,12 +162,12 @@ class JarvisAI:
             try:
                 genai.configure(api_key=gemini_key)
                 # Using 'gemini-1.5-flash' as requested
-                self.gemini_client = genai.GenerativeModel('gemini-1.5-flash') 
+                self.gemini_client = genai.GenerativeModel(GEMINI_MODEL)
                 # Test connection (optional)
                 # A small generate_content call helps verify the key and model exist
-                self.gemini_client.generate_content("ping", stream=True)
+                self.gateway.gemini(self.gemini_client, "ping", GEMINI_MODEL, stream=True).finish()
                 print("✅ Gemini API connected using gemini-1.5-flash")
-            except GoogleAPIError as e:
+            except (GoogleAPIError, LLMGatewayError) as e:
                 print(f"⚠️ Gemini API connection error: {e}")
                 self.gemini_client = None # Ensure client is None if connection fails
         else:
@@ -128,20 +214,34 @@ class JarvisAI:
 
     def analyze_command_with_ai(self, command):
         """Use AI to understand the command intent and extract parameters."""
-        # Prioritize Gemini if available for robust intent analysis
+        # Fallback to rule-based if no external APIs are configured
+        if not (self.gemini_client or self.openai_client):
+            return self._analyze_with_rules(command)
         try:
-            if self.gemini_client:
-                return self._analyze_with_gemini(command)
-            elif self.openai_client:
-                return self._analyze_with_openai(command)
-            else:
-                # Fallback to rule-based if no external APIs are configured
-                return self._analyze_with_rules(command)
+            return self.router.route(command)
         except Exception as e:
             print(f"❌ AI analysis error: {e}")
             # Fallback to rules if AI analysis fails for any reason
             return self._analyze_with_rules(command)
 
+    def _analyze_with_llm(self, command):
+        """Slow tier of the router: Gemini if available, otherwise OpenAI."""
+        if self.gemini_client and self.openai_client:
+            # Hedge a slow Gemini analysis with the same request to OpenAI
+            return self.gateway.hedged(
+                ("gemini", lambda: self._analyze_with_gemini(command)),
+                ("openai", lambda: self._analyze_with_openai(command)),
+            )
+        # Prioritize Gemini if available for robust intent analysis
+        if self.gemini_client:
+            return self._analyze_with_gemini(command)
+        return self._analyze_with_openai(command)
+
+    def _analyze_with_fast_rules(self, command):
+        """Fast tier of the router; power actions always wait for the LLM."""
+        analysis = self._analyze_with_rules(command)
+        return None if analysis["action"] in LLM_CONFIRMED_ACTIONS else analysis
+
     def _analyze_with_gemini(self, command):
         """Analyze command using Gemini API for intent and parameters."""
         prompt = f"""
@@ -234,8 +334,10 @@ class JarvisAI:
         Now, analyze the following command: "{command}"
         """
         try:
-            response = self.gemini_client.generate_content(
+            response = self.gateway.gemini(
+                self.gemini_client,
                 prompt,
+                GEMINI_MODEL,
                 generation_config=genai.types.GenerationConfig(
                     response_mime_type="application/json",
                     temperature=0.2, # Lower temperature for more factual parsing
@@ -252,16 +354,18 @@ class JarvisAI:
             if isinstance(result.get("confidence"), (int, str)):
                 result["confidence"] = float(result["confidence"])
             return result
+        # Failures propagate so a hedged OpenAI call can still answer and the gateway records them;
+        # analyze_command_with_ai applies the rules fallback once
         except GoogleAPIError as e:
             print(f"Gemini API error during analysis: {e}")
-            return self._analyze_with_rules(command)
+            raise
         except json.JSONDecodeError as e:
             print(f"JSON decoding error from Gemini response: {e}")
             print(f"Raw Gemini response (if available): {response.text}") # Print raw response to debug
-            return self._analyze_with_rules(command)
+            raise
         except Exception as e:
             print(f"Unexpected error in Gemini analysis: {e}")
-            return self._analyze_with_rules(command)
+            raise
 
     def _analyze_with_openai(self, command):
         """Analyze command using OpenAI."""
@@ -323,8 +427,9 @@ class JarvisAI:
         Now, analyze the following command: "{command}"
         """
         try:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-3.5-turbo-0125", # Use a recent, stable model
+            response = self.gateway.openai_chat(
+                self.openai_client,
+                model=OPENAI_MODEL, # Use a recent, stable model
                 messages=[
                     {"role": "system", "content": "You are a helpful assistant designed to extract intent and parameters from user commands and return them as a JSON object. Ensure the JSON is always valid and contains only the object."},
                     {"role": "user", "content": prompt}
@@ -339,161 +444,18 @@ class JarvisAI:
             return result
         except openai.APIError as e:
             print(f"OpenAI API error during analysis: {e}")
-            return self._analyze_with_rules(command)
+            raise
         except json.JSONDecodeError as e:
             print(f"JSON decoding error from OpenAI response: {e}")
             print(f"Raw OpenAI response (if available): {response.choices[0].message.content}")
-            return self._analyze_with_rules(command)
+            raise
         except Exception as e:
             print(f"Unexpected error in OpenAI analysis: {e}")
-            return self._analyze_with_rules(command)
+            raise
             
     def _analyze_with_rules(self, command):
         """Fallback rule-based analysis for basic commands."""
-        command_lower = command.lower()
-
-        # File creation patterns
-        if any(word in command_lower for word in ['create', 'make', 'new', 'write', 'generate']):
-            if 'website' in command_lower or 'html' in command_lower:
-                return {
-                    "intent": "file_creation",
-                    "action": "create_website",
-                    "parameters": {"type": "website", "filename": "jarvis_website.html", "content": None, "search_query": None, "application": None, "url": None, "message": None},
-                    "confidence": 0.8
-                }
-            elif 'code' in command_lower or 'python' in command_lower:
-                return {
-                    "intent": "file_creation",
-                    "action": "create_code",
-                    "parameters": {"type": "python", "filename": "jarvis_script.py", "content": None, "search_query": None, "application": None, "url": None, "message": None},
-                    "confidence": 0.8
-                }
-            elif 'text' in command_lower or 'note' in command_lower:
-                return {
-                    "intent": "file_creation",
-                    "action": "create_text",
-                    "parameters": {"type": "text", "filename": "jarvis_note.txt", "content": None, "search_query": None, "application": None, "url": None, "message": None},
-                    "confidence": 0.8
-                }
-
-        # System control patterns
-        elif any(word in command_lower for word in ['open', 'launch', 'start']):
-            if 'calculator' in command_lower:
-                return {
-                    "intent": "system_control",
-                    "action": "open_calculator",
-                    "parameters": {"application": "calculator", "filename": None, "content": None, "search_query": None, "url": None, "message": None},
-                    "confidence": 0.9
-                }
-            elif 'notepad' in command_lower or 'text editor' in command_lower:
-                return {
-                    "intent": "system_control",
-                    "action": "open_notepad",
-                    "parameters": {"application": "notepad", "filename": None, "content": None, "search_query": None, "url": None, "message": None},
-                    "confidence": 0.9
-                }
-            elif 'settings' in command_lower:
-                 return {
-                    "intent": "system_control",
-                    "action": "open_app",
-                    "parameters": {"application": "settings", "filename": None, "content": None, "search_query": None, "url": None, "message": None},
-                    "confidence": 0.7
-                }
-            elif 'chrome' in command_lower or 'google chrome' in command_lower:
-                return {
-                    "intent": "system_control",
-                    "action": "open_app",
-                    "parameters": {"application": "Google Chrome", "filename": None, "content": None, "search_query": None, "url": None, "message": None},
-                    "confidence": 0.8
-                }
-            elif 'opera' in command_lower:
-                return {
-                    "intent": "system_control",
-                    "action": "open_app",
-                    "parameters": {"application": "Opera", "filename": None, "content": None, "search_query": None, "url": None, "message": None},
-                    "confidence": 0.8
-                }
-            # Add more specific applications here if needed for rule-based fallback
-            
-        elif 'shutdown' in command_lower:
-            return {
-                "intent": "system_control",
-                "action": "shutdown_system",
-                "parameters": {"filename": None, "content": None, "search_query": None, "application": None, "url": None, "message": None},
-                "confidence": 0.95
-            }
-        elif 'restart' in command_lower:
-            return {
-                "intent": "system_control",
-                "action": "restart_system",
-                "parameters": {"filename": None, "content": None, "search_query": None, "application": None, "url": None, "message": None},
-                "confidence": 0.95
-            }
-
-        # Web Browse patterns
-        elif any(word in command_lower for word in ['search', 'google', 'browse', 'go to website', 'find on web']):
-            query_part = command_lower
-            for phrase in ['search for', 'google', 'browse', 'go to website', 'find on web', 'search']:
-                if phrase in query_part:
-                    query_part = query_part.split(phrase, 1)[-1].strip()
-            
-            # Remove any trailing "in google" or "on the web"
-            if query_part.endswith("in google"):
-                query_part = query_part.replace("in google", "").strip()
-            if query_part.endswith("on the web"):
-                query_part = query_part.replace("on the web", "").strip()
-
-            search_query = query_part if query_part and query_part != 'the' else None
-            return {
-                "intent": "web_Browse",
-                "action": "web_search",
-                "parameters": {"search_query": search_query, "filename": None, "content": None, "application": None, "url": None, "message": None},
-                "confidence": 0.7
-            }
-        elif 'open' in command_lower and 'website' in command_lower:
-            # Very basic URL extraction, would need regex for robust parsing
-            url_part = command_lower.replace('open website', '').strip()
-            if "." in url_part: # Simple check for domain
-                return {
-                    "intent": "web_Browse",
-                    "action": "open_url",
-                    "parameters": {"url": url_part, "filename": None, "content": None, "search_query": None, "application": None, "message": None},
-                    "confidence": 0.8
-                }
-        
-        # File management patterns
-        elif 'list files' in command_lower or 'show files' in command_lower:
-            return {
-                "intent": "file_management",
-                "action": "list_files",
-                "parameters": {"filename": None, "content": None, "search_query": None, "application": None, "url": None, "message": None},
-                "confidence": 0.85
-            }
-        elif 'open file' in command_lower:
-            filename = command_lower.replace('open file', '').strip()
-            return {
-                "intent": "file_management",
-                "action": "open_file",
-                "parameters": {"filename": filename if filename else None, "content": None, "search_query": None, "application": None, "url": None, "message": None},
-                "confidence": 0.7
-            }
-
-        # Information request patterns
-        elif any(word in command_lower for word in ['what is', 'how to', 'tell me about', 'explain', 'who is', 'define', 'how is the weather']):
-            return {
-                "intent": "information",
-                "action": "general_query",
-                "parameters": {"message": command, "filename": None, "content": None, "search_query": None, "application": None, "url": None},
-                "confidence": 0.6
-            }
-
-        # Default conversation
-        return {
-            "intent": "conversation",
-            "action": "chat",
-            "parameters": {"message": command, "filename": None, "content": None, "search_query": None, "application": None, "url": None},
-            "confidence": 0.5
-        }
+        return analyze_with_rules(command)
 
     # Removed _extract_action and _extract_parameters as they are now handled by AI or simpler rules
 
@@ -727,8 +689,10 @@ if __name__ == "__main__":
         try:
             if self.gemini_client:
                 # Use Gemini for information requests
-                response = self.gemini_client.generate_content(
+                response = self.gateway.gemini(
+                    self.gemini_client,
                     f"Answer the following question concisely and informatively: {message}",
+                    GEMINI_MODEL,
                     generation_config=genai.types.GenerationConfig(
                         max_output_tokens=300,
                         temperature=0.7 # Allow some creativity for information
@@ -741,8 +705,9 @@ if __name__ == "__main__":
                 return response.text
             elif self.openai_client:
                 # Fallback to OpenAI if Gemini is not available
-                response = self.openai_client.chat.completions.create(
-                    model="gpt-3.5-turbo-0125",
+                response = self.gateway.openai_chat(
+                    self.openai_client,
+                    model=OPENAI_MODEL,
                     messages=[{"role": "user", "content": message}],
                     max_tokens=300,
                     temperature=0.7
@@ -774,8 +739,10 @@ if __name__ == "__main__":
             # For general chat, try AI first, then local, then default
             try:
                 if self.gemini_client:
-                    response = self.gemini_client.generate_content(
+                    response = self.gateway.gemini(
+                        self.gemini_client,
                         f"Respond conversationally to: '{message}'",
+                        GEMINI_MODEL,
                         generation_config=genai.types.GenerationConfig(
                             max_output_tokens=100,
                             temperature=0.9 # More creative for conversation
@@ -787,8 +754,9 @@ if __name__ == "__main__":
                     )
                     return response.text
                 elif self.openai_client:
-                    response = self.openai_client.chat.completions.create(
-                        model="gpt-3.5-turbo-0125",
+                    response = self.gateway.openai_chat(
+                        self.openai_client,
+                        model=OPENAI_MODEL,
                         messages=[{"role": "user", "content": message}],
                         max_tokens=100,
                         temperature=0.9
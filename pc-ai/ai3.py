@@ -18,11 +18,24 @@ from docx.shared import Inches
 from openpyxl import Workbook
 from fpdf import FPDF
 
+# Shared LLM gateway lives with the modular assistant in ../ai
+sys.path.append(str(Path(__file__).resolve().parent.parent / "ai"))
+from llm_gateway import get_gateway
+from file_index import FileIndex
+from file_walker import find_paths
+
+GEMINI_MODEL = 'gemini-1.5-flash-latest'
+FILE_INDEX_FILE = ".index/file_index.sqlite3"
+FILE_INDEX_MAX_AGE_SECONDS = 5 * 60
+
 class JarvisAI:
     def __init__(self, api_key):
         self.system = platform.system().lower()
         self.workspace_dir = Path.home() / "JARVIS_Workspace"
         self.workspace_dir.mkdir(exist_ok=True)
+        # Filename index of the home folder; find/delete no longer walk it on every command
+        self.file_index = FileIndex(self.workspace_dir / FILE_INDEX_FILE, [Path.home()])
+        self.file_index.update_in_background()
         
         self.gemini_client = None
         self.pending_confirmation = None
@@ -36,7 +49,7 @@ class JarvisAI:
         try:
             if api_key and api_key != "PASTE_YOUR_REAL_API_KEY_HERE":
                 genai.configure(api_key=api_key)
-                self.gemini_client = genai.GenerativeModel('gemini-1.5-flash-latest')
+                self.gemini_client = genai.GenerativeModel(GEMINI_MODEL)
                 print("✅ Google Gemini API connected")
             else:
                 print("⚠️ Google Gemini API key not provided. AI features will be limited.")
@@ -53,7 +66,7 @@ class JarvisAI:
             prompt = f"Write a well-structured document about '{topic}' using Markdown (# headings, **bold**, * bullets)."
         try:
             print(f"🧠 Generating content for '{topic}' in {output_format} format...")
-            response = self.gemini_client.generate_content(prompt)
+            response = get_gateway().gemini(self.gemini_client, prompt, GEMINI_MODEL)
             return response.text
         except Exception as e:
             return f"An error occurred during content generation: {e}"
@@ -104,7 +117,7 @@ class JarvisAI:
         """
         try:
             print("🧠 Analyzing with Gemini...")
-            response = self.gemini_client.generate_content(prompt)
+            response = get_gateway().gemini(self.gemini_client, prompt, GEMINI_MODEL)
             # Use regex to find the JSON block robustly
             match = re.search(r'\{.*\}', response.text, re.DOTALL)
             if not match: raise ValueError("No valid JSON object found in AI response.")
@@ -237,21 +250,25 @@ class JarvisAI:
         elif action == "find_file":
             filename = params.get("filename");
             if not filename: return "What file do you want to find?"
-            print(f"🔎 Searching for '{filename}'..."); results = list(Path.home().rglob(filename))
+            print(f"🔎 Searching for '{filename}'..."); results = self._find_by_name(filename, 10)
             if not results: return f"I couldn't find '{filename}'."
             return f"I found:\n" + "\n".join([f"  -> {p}" for p in results[:10]])
         elif action == "delete_file":
             filename = params.get("filename");
             if not filename: return "What file do you want to delete?"
-            results = list(Path.home().rglob(filename));
+            results = self._find_by_name(filename, 2);
             if not results: return f"I couldn't find '{filename}'."
             if len(results) > 1: return "I found multiple files. Please be more specific."
             self.pending_confirmation = {"action": "confirm_delete", "file_path": results[0]}
             return f"I found: {results[0]}\n\n⚠️ Are you sure you want to permanently delete it? (yes/no)"
         return "Unknown file management action."
 
+    def _find_by_name(self, filename, limit):
+        if self.file_index.refresh_if_stale(FILE_INDEX_MAX_AGE_SECONDS): return self.file_index.glob(filename, limit)
+        return find_paths([Path.home()], filename, limit)  # Index still being built
+
     def _confirm_delete_action(self, details):
-        try: Path(details["file_path"]).unlink(); return f"✅ Successfully deleted."
+        try: Path(details["file_path"]).unlink(); self.file_index.note_change(details["file_path"]); return f"✅ Successfully deleted."
         except Exception as e: return f"❌ Failed to delete file. Error: {e}"
 
     def _handle_conversation(self, params):
@@ -10,16 +10,34 @@ import json
 import re
 import subprocess
 import platform
+import shutil
+import threading
 import webbrowser
 import logging
 import mimetypes
 import difflib
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Optional, Union, Any
-from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple, Union, Any
 import time
 
+# Shared analysis modules live with the modular assistant in ../ai
+sys.path.append(str(Path(__file__).resolve().parent.parent / "ai"))
+from intent_matcher import IntentMatcher, IntentRule
+from analysis_cache import AnalysisCache, refers_to_context
+from intent_classifier import IntentClassifier
+from analysis_router import CascadingRouter
+from batch_analysis import BATCH_REPLY_FORMAT, chunked, format_command_list, parse_batch_response
+from prompt_compiler import PromptTemplate, TokenLedger
+from analysis_schema import build_analysis_schema, structured_generation_config, read_streamed_analysis
+from llm_gateway import get_gateway
+from app_catalog import scan_catalog
+from file_index import FileIndex
+from content_index import ContentIndex
+from change_feed import ChangeFeed, DirectoryListing
+from file_walker import iter_paths
+from app_matcher import AppMatcher, confident
+
 # Third-party imports with error handling
 try:
     import google.generativeai as genai
@@ -55,6 +73,7 @@ try:
     from rich.table import Table
     from rich.progress import Progress, SpinnerColumn, TextColumn
     from rich.panel import Panel
+    from rich.live import Live
     RICH_AVAILABLE = True
     console = Console()
 except ImportError:
@@ -67,8 +86,26 @@ class Config:
     WORKSPACE_DIR = Path.home() / "JARVIS_Workspace"
     LOG_FILE = "jarvis.log"
     HISTORY_FILE = "command_history.json"
+    GEMINI_MODEL = "gemini-1.5-flash-latest"
+    STRUCTURED_OUTPUT = True
+    ANALYSIS_CACHE_FILE = "ai4_analysis_cache.json"  # Own file: ai/ stores a different parameter schema
+    # Own model and training log: ai/ trains on different rules and labels (intent_classifier.py --assistant ai4)
+    INTENT_MODEL_FILE = "ai4_intent_model.json"
+    INTENT_TRAINING_LOG = "ai4_intent_training.jsonl"
     MAX_SEARCH_RESULTS = 10
+    FILE_INDEX_FILE = ".index/file_index.sqlite3"
+    FILE_INDEX_MAX_AGE_SECONDS = 5 * 60
+    CONTENT_INDEX_FILE = ".index/content_index.sqlite3"
+    CHANGE_FEED_POLL_SECONDS = 2.0
+    FILE_SEARCH_IGNORE = [".*", "node_modules", "__pycache__", "site-packages", "venv", "env", "AppData", "Library"]
     MAX_HISTORY_ENTRIES = 100
+    ANALYSIS_BATCH_SIZE = 20
+    ANALYSIS_CACHE_MAX_ENTRIES = 256
+    ANALYSIS_CACHE_TTL_SECONDS = 24 * 60 * 60
+    RULE_CONFIDENCE_BAR = 0.9
+    LOCAL_CLASSIFIER_THRESHOLD = 0.85
+    SPECULATIVE_ANALYSIS = True
+    SPECULATE_AFTER_MS = 20
     
     SUPPORTED_FORMATS = ['docx', 'xlsx', 'pdf', 'txt', 'py', 'json', 'csv']
     
@@ -95,6 +132,120 @@ class Config:
     ]
 
 
+CREATE_WORDS = ('create', 'make', 'generate', 'write')
+TOPIC_MARKERS = ('about', 'on', 'for', 'regarding')
+FILE_TYPE_WORDS = ('a', 'an', 'word', 'excel', 'pdf', 'python', 'text', 'file', 'doc', 'document', 'script')
+DOCUMENT_WORDS = ('document', 'documents', 'doc', 'docs', 'file', 'files', 'notes', 'report', 'spreadsheet', 'pdf')
+CONTENT_MARKERS = ('about', 'mentioning', 'mentions', 'mention', 'containing', 'contains', 'regarding')
+# Whole commands that ask for help, not any sentence containing "help" or "commands"
+HELP_PHRASES = ('help', 'help me', 'show help', 'what can you do', 'what can you do for me', 'commands',
+                'show commands', 'list commands', 'what are your commands')
+
+
+def _creation_topic(match):
+    """Topic after about/on/for, else the command minus the creation words."""
+    topic = match.after(TOPIC_MARKERS, whole_words=True)
+    return {"content": topic or match.without(CREATE_WORDS + FILE_TYPE_WORDS) or match.command, "is_topic": True}
+
+
+def _content_query(match):
+    """Words after about/mentioning/containing; no query, no match."""
+    query = match.after(CONTENT_MARKERS, whole_words=True).rstrip('?. ')
+    return {"query": query} if query else None
+
+
+# Compiled once at import; the rule fallback is a single keyword-automaton pass
+COMMAND_RULES = IntentMatcher([
+    IntentRule('file_creation', 'create_word', [CREATE_WORDS, ('word', 'doc', '.docx')],
+               build=_creation_topic, slot_words=TOPIC_MARKERS + FILE_TYPE_WORDS),
+    IntentRule('file_creation', 'create_excel', [CREATE_WORDS, ('excel', '.xlsx', 'spreadsheet')],
+               build=_creation_topic, slot_words=TOPIC_MARKERS + FILE_TYPE_WORDS),
+    IntentRule('file_creation', 'create_pdf', [CREATE_WORDS, ('pdf',)],
+               build=_creation_topic, slot_words=TOPIC_MARKERS + FILE_TYPE_WORDS),
+    IntentRule('file_creation', 'create_python', [CREATE_WORDS, ('python', '.py', 'script')],
+               build=_creation_topic, slot_words=TOPIC_MARKERS + FILE_TYPE_WORDS),
+    IntentRule('file_creation', 'create_text', [CREATE_WORDS, ('text', '.txt', 'file')],
+               build=_creation_topic, slot_words=TOPIC_MARKERS + FILE_TYPE_WORDS),
+    IntentRule('file_management', 'search_content', [('find', 'locate', 'search', 'which', 'show'), DOCUMENT_WORDS,
+                                                     CONTENT_MARKERS], confidence=0.9, whole_words=True,
+               build=_content_query),
+    IntentRule('file_management', 'find_file', [('find', 'locate', 'search for')], confidence=0.85,
+               build=lambda m: {"query": m.without(('find', 'locate', 'search for'))}),
+    IntentRule('file_management', 'delete_file', [('delete', 'remove')], confidence=0.85,
+               build=lambda m: {"query": m.without(('delete', 'remove'))}),
+    IntentRule('file_management', 'list_files', [('list files',)], confidence=0.95),
+    IntentRule('system_control', 'open_application', [('open', 'launch', 'start')],
+               build=lambda m: {"application": m.without(('open', 'launch', 'start'))}),
+    IntentRule('web_browse', 'web_search', [('search', 'browse', 'google')],
+               build=lambda m: {"search_query": m.without(('search', 'browse', 'google'))}),
+    IntentRule('help', 'show_help', [HELP_PHRASES], confidence=0.95, whole_command=True),
+])
+
+
+# Shared by the single-command and batch analysis prompts
+ACTION_MAPPING = """
+        Action mapping rules:
+        - "word doc" or ".docx" -> create_word
+        - "excel" or ".xlsx" -> create_excel  
+        - "pdf" -> create_pdf
+        - "python" or ".py" -> create_python
+        - "text file" or ".txt" -> create_text
+        - "find the document about X" or "which file mentions X" -> search_content (query: X)
+        - "find" or "locate" -> find_file
+        - "delete" or "remove" -> delete_file
+        - "list files" -> list_files
+        - "search" or "browse" -> web_search
+        - "open" or "launch" -> open_application
+        - "help" -> show_help
+        - greetings -> chat
+"""
+
+# Bump when the actions or parameters below change, so cached analyses in the old shape are dropped
+ANALYSIS_CACHE_SCHEMA = 'ai4/1'
+
+# Structured output: replies are constrained to these intents, actions and parameters
+SCHEMA_VOCABULARY = (
+    Config.VALID_INTENTS,
+    [rule.action for rule in COMMAND_RULES.rules] + ['chat'],
+    {'filename': 'STRING', 'content': 'STRING', 'is_topic': 'BOOLEAN', 'query': 'STRING',
+     'application': 'STRING', 'search_query': 'STRING', 'message': 'STRING'},
+)
+ANALYSIS_SCHEMA = build_analysis_schema(*SCHEMA_VOCABULARY)
+BATCH_ANALYSIS_SCHEMA = build_analysis_schema(*SCHEMA_VOCABULARY, batch=True)
+
+# Static instructions are set once on the model; each call only sends the command(s)
+ANALYSIS_PROMPT = PromptTemplate(
+    "analysis",
+    system=[
+        "You are a command analyzer. Convert the user command to a JSON object with this exact structure:",
+        f"Valid intents: {', '.join(Config.VALID_INTENTS)}",
+        ACTION_MAPPING,
+        """
+        Return only valid JSON:
+        {"intent": "...", "action": "...", "parameters": {"filename": "...", "content": "...", "is_topic": true/false}}
+        """,
+    ],
+    user='COMMAND: "{command}"',
+)
+
+BATCH_ANALYSIS_PROMPT = PromptTemplate(
+    "batch_analysis",
+    system=[
+        """
+        You are a command analyzer. Convert each user command to a JSON object with this exact structure:
+        {"index": 0, "intent": "...", "action": "...", "parameters": {"filename": "...", "content": "...", "is_topic": true/false}}
+        """,
+        f"Valid intents: {', '.join(Config.VALID_INTENTS)}",
+        ACTION_MAPPING,
+        BATCH_REPLY_FORMAT,
+    ],
+    user="""
+        COMMANDS:
+        {commands}
+    """,
+)
+
+
 class JarvisLogger:
     """Enhanced logging for JARVIS"""
     
@@ -196,6 +347,7 @@ class AIContentGenerator:
     def __init__(self, api_key: Optional[str] = None):
         self.gemini_client = None
         self.logger = JarvisLogger().logger
+        self.gateway = get_gateway()
         
         if api_key and GEMINI_AVAILABLE:
             self.setup_gemini(api_key)
@@ -204,7 +356,7 @@ class AIContentGenerator:
         """Setup Google Gemini AI"""
         try:
             genai.configure(api_key=api_key)
-            self.gemini_client = genai.GenerativeModel('gemini-1.5-flash-latest')
+            self.gemini_client = genai.GenerativeModel(Config.GEMINI_MODEL)
             self.logger.info("Google Gemini AI initialized successfully")
         except Exception as e:
             self.logger.error(f"Failed to initialize Gemini AI: {e}")
@@ -229,7 +381,7 @@ class AIContentGenerator:
             prompt = prompts.get(output_format, prompts['text'])
             self.logger.info(f"Generating {output_format} content for: {topic}")
             
-            response = self.gemini_client.generate_content(prompt)
+            response = self.gateway.gemini(self.gemini_client, prompt, Config.GEMINI_MODEL)
             return SecurityValidator.sanitize_content(response.text)
             
         except Exception as e:
@@ -289,126 +441,137 @@ class CommandAnalyzer:
     def __init__(self, ai_generator: AIContentGenerator):
         self.ai_generator = ai_generator
         self.logger = JarvisLogger().logger
+        self.analysis_cache = AnalysisCache(
+            Config.WORKSPACE_DIR / Config.ANALYSIS_CACHE_FILE,
+            max_entries=Config.ANALYSIS_CACHE_MAX_ENTRIES,
+            ttl_seconds=Config.ANALYSIS_CACHE_TTL_SECONDS,
+            schema=ANALYSIS_CACHE_SCHEMA,
+        )
+        self.intent_classifier = IntentClassifier.load(Config.WORKSPACE_DIR / Config.INTENT_MODEL_FILE)
+        self.router = CascadingRouter(
+            [
+                ("rules", self._analyze_with_fast_rules, Config.RULE_CONFIDENCE_BAR),
+                ("local", self._analyze_locally, Config.LOCAL_CLASSIFIER_THRESHOLD),
+            ],
+            self._analyze_with_ai,
+            speculative=Config.SPECULATIVE_ANALYSIS,
+            speculate_after_ms=Config.SPECULATE_AFTER_MS,
+        )
+        self.token_ledger = TokenLedger()
+        self.analysis_model = self._build_model(ANALYSIS_PROMPT, ANALYSIS_SCHEMA)
+        self.batch_analysis_model = self._build_model(BATCH_ANALYSIS_PROMPT, BATCH_ANALYSIS_SCHEMA)
+    
+    def _build_model(self, template: PromptTemplate, schema: Dict[str, Any]):
+        """Gemini model with the template's static part as its system instruction"""
+        if not self.ai_generator.gemini_client:
+            return None
+        try:
+            generation_config = structured_generation_config(schema) if Config.STRUCTURED_OUTPUT else None
+            return genai.GenerativeModel(Config.GEMINI_MODEL, system_instruction=template.system,
+                                         generation_config=generation_config)
+        except Exception as e:
+            self.logger.error(f"Failed to create {template.name} model: {e}")
+            return None
+    
+    def _generate(self, template: PromptTemplate, model, stream: bool = False, **values):
+        """Send one prompt, inlining the static part when the model has no system instruction"""
+        request = template.render(**values) if model else template.inline(**values)
+        started_at = time.perf_counter()
+        response = self.ai_generator.gateway.gemini(model or self.ai_generator.gemini_client, request,
+                                                    Config.GEMINI_MODEL, stream=stream)
+        sent_text = template.system + request if model else request
+        if not stream:
+            # Streamed calls are recorded by the caller once it stops reading
+            self.token_ledger.record(template.name, sent_text, response, started_at)
+        return response, sent_text, started_at
     
-    @lru_cache(maxsize=50)
     def analyze_command(self, command: str) -> Dict[str, Any]:
         """Analyze command and return structured intent"""
-        if self.ai_generator.gemini_client:
-            return self._analyze_with_ai(command)
-        else:
+        if not self.ai_generator.gemini_client:
             return self._analyze_with_rules(command)
+        
+        cached = self.analysis_cache.get(command)
+        if cached is not None:
+            return cached
+        return self.router.route(command)
+    
+    def analyze_many(self, commands: List[str], batch_size: int = Config.ANALYSIS_BATCH_SIZE) -> List[Dict[str, Any]]:
+        """Analyze a list of commands with one AI call per batch, in input order"""
+        if not self.ai_generator.gemini_client:
+            return [self._analyze_with_rules(command) for command in commands]
+        
+        results: List[Optional[Dict[str, Any]]] = [None] * len(commands)
+        pending = []
+        for i, command in enumerate(commands):
+            results[i] = self.analysis_cache.get(command) or self.router.try_local(command)
+            if results[i] is None:
+                pending.append(i)
+        
+        training_log = Config.WORKSPACE_DIR / Config.INTENT_TRAINING_LOG
+        for batch in chunked(pending, batch_size):
+            try:
+                response, _, _ = self._generate(BATCH_ANALYSIS_PROMPT, self.batch_analysis_model,
+                                                commands=format_command_list([commands[i] for i in batch]))
+                parsed = parse_batch_response(response.text, len(batch))
+            except Exception as e:
+                self.logger.error(f"Batch command analysis failed: {e}")
+                parsed = [None] * len(batch)
+            
+            for i, analysis in zip(batch, parsed):
+                if analysis is None:
+                    results[i] = self._analyze_with_rules(commands[i])
+                    continue
+                results[i] = self._validate_analysis(analysis)
+                self.analysis_cache.put(commands[i], results[i], persist=False)
+                IntentClassifier.log_example(training_log, commands[i], results[i])
+        
+        if pending:
+            self.analysis_cache.save()
+        return results
+    
+    def _analyze_locally(self, command: str) -> Optional[Dict[str, Any]]:
+        """Local classifier tier; parameters come from the rule table"""
+        analysis = self.intent_classifier.analyze(command, COMMAND_RULES, Config.VALID_INTENTS)
+        if analysis and analysis["intent"] == "file_creation":
+            params = analysis["parameters"]
+            params["filename"] = self._generate_filename(params["content"], analysis["action"])
+        return analysis
     
     def _analyze_with_ai(self, command: str) -> Dict[str, Any]:
         """Use AI to analyze command"""
-        prompt = f"""
-        You are a command analyzer. Convert the user command to a JSON object with this exact structure:
-
-        COMMAND: "{command}"
-
-        Valid intents: {', '.join(Config.VALID_INTENTS)}
-
-        Action mapping rules:
-        - "word doc" or ".docx" -> create_word
-        - "excel" or ".xlsx" -> create_excel  
-        - "pdf" -> create_pdf
-        - "python" or ".py" -> create_python
-        - "text file" or ".txt" -> create_text
-        - "find" or "locate" -> find_file
-        - "delete" or "remove" -> delete_file
-        - "list files" -> list_files
-        - "search" or "browse" -> web_search
-        - "open" or "launch" -> open_application
-        - "help" -> show_help
-        - greetings -> chat
-
-        Return only valid JSON:
-        {{"intent": "...", "action": "...", "parameters": {{"filename": "...", "content": "...", "is_topic": true/false}}}}
-        """
-        
         try:
-            response = self.ai_generator.gemini_client.generate_content(prompt)
-            match = re.search(r'\{.*\}', response.text, re.DOTALL)
-            if match:
-                result = json.loads(match.group(0))
-                return self._validate_analysis(result)
+            response, sent_text, started_at = self._generate(ANALYSIS_PROMPT, self.analysis_model, stream=True,
+                                                             command=command)
+            # Returns as soon as intent, action and parameters have streamed in
+            analysis = read_streamed_analysis(response)
+            self.token_ledger.record(ANALYSIS_PROMPT.name, sent_text, response, started_at)
+            if analysis and analysis.get('intent'):
+                result = self._validate_analysis(analysis)
+                self.analysis_cache.put(command, result)
+                IntentClassifier.log_example(Config.WORKSPACE_DIR / Config.INTENT_TRAINING_LOG, command, result)
+                return result
         except Exception as e:
             self.logger.error(f"AI command analysis failed: {e}")
         
         return self._analyze_with_rules(command)
     
+    def _analyze_with_fast_rules(self, command: str) -> Optional[Dict[str, Any]]:
+        """Rules tier; commands that refer back ("open it again") are left to the AI"""
+        if refers_to_context(command):
+            return None
+        return self._analyze_with_rules(command)
+    
     def _analyze_with_rules(self, command: str) -> Dict[str, Any]:
         """Fallback rule-based command analysis"""
-        cmd = command.lower().strip()
-        
-        # File creation patterns
-        if any(word in cmd for word in ['create', 'make', 'generate', 'write']):
-            if any(word in cmd for word in ['word', 'doc', '.docx']):
-                return self._create_analysis('file_creation', 'create_word', command)
-            elif any(word in cmd for word in ['excel', '.xlsx', 'spreadsheet']):
-                return self._create_analysis('file_creation', 'create_excel', command)
-            elif 'pdf' in cmd:
-                return self._create_analysis('file_creation', 'create_pdf', command)
-            elif any(word in cmd for word in ['python', '.py', 'script']):
-                return self._create_analysis('file_creation', 'create_python', command)
-            elif any(word in cmd for word in ['text', '.txt', 'file']):
-                return self._create_analysis('file_creation', 'create_text', command)
-        
-        # File management
-        elif any(word in cmd for word in ['find', 'locate', 'search for']):
-            return {"intent": "file_management", "action": "find_file", "parameters": {"query": cmd}}
-        elif any(word in cmd for word in ['delete', 'remove']):
-            return {"intent": "file_management", "action": "delete_file", "parameters": {"query": cmd}}
-        elif 'list files' in cmd:
-            return {"intent": "file_management", "action": "list_files", "parameters": {}}
-        
-        # System control
-        elif any(word in cmd for word in ['open', 'launch', 'start']):
-            app = re.sub(r'\b(open|launch|start)\b', '', cmd).strip()
-            return {"intent": "system_control", "action": "open_application", "parameters": {"application": app}}
-        
-        # Web browsing
-        elif any(word in cmd for word in ['search', 'browse', 'google']):
-            query = re.sub(r'\b(search|browse|google)\b', '', cmd).strip()
-            return {"intent": "web_browse", "action": "web_search", "parameters": {"search_query": query}}
-        
-        # Help
-        elif any(word in cmd for word in ['help', 'commands', 'what can you do']):
-            return {"intent": "help", "action": "show_help", "parameters": {}}
-        
-        # Conversation
-        else:
+        analysis = COMMAND_RULES.match(command)
+        if analysis is None:
             return {"intent": "conversation", "action": "chat", "parameters": {"message": command}}
-    
-    def _create_analysis(self, intent: str, action: str, command: str) -> Dict[str, Any]:
-        """Create file creation analysis"""
-        # Extract topic/content
-        topic_patterns = [
-            r'(?:about|on|for|regarding)\s+(.+)',
-            r'(?:create|make|write)\s+(?:a\s+)?(?:word|excel|pdf|python|text)?\s*(?:file|doc|document|script)?\s*(?:about|on|for|regarding)?\s*(.+)',
-        ]
-        
-        topic = None
-        for pattern in topic_patterns:
-            match = re.search(pattern, command, re.IGNORECASE)
-            if match:
-                topic = match.group(1).strip()
-                break
-        
-        if not topic:
-            topic = command
         
-        # Generate filename
-        filename = self._generate_filename(topic, action)
+        if analysis["intent"] == "file_creation":
+            params = analysis["parameters"]
+            params["filename"] = self._generate_filename(params["content"], analysis["action"])
         
-        return {
-            "intent": intent,
-            "action": action,
-            "parameters": {
-                "filename": filename,
-                "content": topic,
-                "is_topic": True
-            }
-        }
+        return analysis
     
     def _generate_filename(self, topic: str, action: str) -> str:
         """Generate appropriate filename from topic"""
@@ -444,6 +607,24 @@ class FileManager:
         self.workspace_dir = workspace_dir
         self.workspace_dir.mkdir(exist_ok=True)
         self.logger = JarvisLogger().logger
+        self.search_dirs = [self.workspace_dir, Path.home() / "Documents", Path.home() / "Desktop"]
+        # Workspace changes reach the indexes and the listing as they happen (the index folder itself is excluded)
+        self.change_feed = ChangeFeed([self.workspace_dir], Config.FILE_SEARCH_IGNORE,
+                                      exclude=[(self.workspace_dir / Config.FILE_INDEX_FILE).parent],
+                                      poll_interval=Config.CHANGE_FEED_POLL_SECONDS)
+        self.workspace_listing = DirectoryListing(self.workspace_dir, Config.FILE_SEARCH_IGNORE)
+        self.change_feed.subscribe(self.workspace_listing.apply_changes)
+        # Filename index of the search folders, so find_files does not walk them on every query
+        self.file_index = FileIndex(self.workspace_dir / Config.FILE_INDEX_FILE, self.search_dirs,
+                                    Config.FILE_SEARCH_IGNORE)
+        self.file_index.follow(self.change_feed)
+        # Full-text index of the workspace documents, for "find the document about ..."
+        self.content_index = ContentIndex(self.workspace_dir / Config.CONTENT_INDEX_FILE, [self.workspace_dir],
+                                          Config.FILE_SEARCH_IGNORE)
+        self.content_index.follow(self.change_feed)
+        self.change_feed.start()
+        self.file_index.update_in_background()
+        self.content_index.update_in_background()
     
     def create_file(self, filepath: Path, content: str, file_type: str) -> str:
         """Create file with appropriate format"""
@@ -452,13 +633,17 @@ class FileManager:
             content = SecurityValidator.sanitize_content(content)
             
             if file_type == 'docx' and DOCX_AVAILABLE:
-                return self._create_word_document(filepath, content)
+                result = self._create_word_document(filepath, content)
             elif file_type == 'xlsx' and EXCEL_AVAILABLE:
-                return self._create_excel_file(filepath, content)
+                result = self._create_excel_file(filepath, content)
             elif file_type == 'pdf' and PDF_AVAILABLE:
-                return self._create_pdf_file(filepath, content)
+                result = self._create_pdf_file(filepath, content)
             else:
-                return self._create_text_file(filepath, content)
+                result = self._create_text_file(filepath, content)
+            self.file_index.note_change(filepath)
+            self.content_index.note_change(filepath)
+            self.workspace_listing.note_change(filepath)
+            return result
                 
         except Exception as e:
             self.logger.error(f"File creation failed: {e}")
@@ -565,20 +750,22 @@ class FileManager:
     
     def find_files(self, query: str, max_results: int = Config.MAX_SEARCH_RESULTS) -> List[Path]:
         """Find files matching query"""
-        results = []
-        search_dirs = [self.workspace_dir, Path.home() / "Documents", Path.home() / "Desktop"]
-        
-        for search_dir in search_dirs:
-            if search_dir.exists():
-                try:
-                    matches = list(search_dir.rglob(f"*{query}*"))
-                    results.extend(matches[:max_results])
-                    if len(results) >= max_results:
-                        break
-                except PermissionError:
-                    continue
+        return list(self.iter_files(query, max_results))
+    
+    def iter_files(self, query: str, max_results: int = Config.MAX_SEARCH_RESULTS,
+                   cancel: Optional[threading.Event] = None) -> Iterator[Path]:
+        """Yield files matching query as they are found; set cancel or close the generator to stop"""
+        if self.file_index.refresh_if_stale(Config.FILE_INDEX_MAX_AGE_SECONDS):
+            yield from self.file_index.search(query, max_results)
+            return
         
-        return results[:max_results]
+        # First run: walk the folders while the index is built
+        yield from iter_paths(self.search_dirs, f"*{query}*", max_results, Config.FILE_SEARCH_IGNORE, cancel=cancel)
+    
+    def search_content(self, query: str, max_results: int = Config.MAX_SEARCH_RESULTS) -> List[Tuple[Path, float]]:
+        """Workspace documents whose text best matches query, with their scores"""
+        self.content_index.refresh_if_stale(Config.FILE_INDEX_MAX_AGE_SECONDS)
+        return self.content_index.search(query, max_results)
     
     def delete_file(self, filepath: Path) -> str:
         """Delete file safely"""
@@ -586,6 +773,9 @@ class FileManager:
             filepath = SecurityValidator.validate_path(filepath)
             if filepath.exists():
                 filepath.unlink()
+                self.file_index.note_change(filepath)
+                self.content_index.note_change(filepath)
+                self.workspace_listing.note_change(filepath)
                 return f"File deleted: {filepath.name}"
             else:
                 return "File not found"
@@ -593,13 +783,9 @@ class FileManager:
             self.logger.error(f"File deletion failed: {e}")
             raise
     
-    def list_workspace_files(self) -> List[Path]:
-        """List files in workspace"""
-        try:
-            return [f for f in self.workspace_dir.iterdir() if f.is_file()]
-        except Exception as e:
-            self.logger.error(f"Failed to list files: {e}")
-            return []
+    def list_workspace_files(self) -> List[Tuple[Path, int, float]]:
+        """List files in workspace as (path, size, mtime), from the in-memory listing"""
+        return [(self.workspace_dir / name, size, mtime) for name, size, mtime in self.workspace_listing.files()]
     
     def open_file(self, filepath: Path) -> str:
         """Open file with system default application"""
@@ -622,18 +808,40 @@ class SystemController:
     
     def __init__(self):
         self.logger = JarvisLogger().logger
+        self.app_matcher = None  # Built from the scanned apps on first use
+        self._matcher_lock = threading.Lock()
+    
+    def find_app(self, app_name: str, limit: int = 3) -> List[tuple]:
+        """Ranked (score, name, path) matches, tolerant of misheard names like "fire fox" """
+        with self._matcher_lock:
+            if self.app_matcher is None:
+                start = time.perf_counter()
+                self.app_matcher = AppMatcher(scan_catalog(), Config.APP_ALIASES)
+                self.logger.info(f"Indexed {len(self.app_matcher.entries)} apps in {time.perf_counter() - start:.2f}s")
+        return self.app_matcher.search(app_name, limit)
     
     def open_application(self, app_name: str) -> str:
         """Open application by name"""
         try:
             # Get actual command from aliases
             command = Config.APP_ALIASES.get(app_name.lower(), app_name)
+            # Otherwise launch the best ranked installed app when it is a clear match, and ask when it is not
+            if not shutil.which(command):
+                matches = self.find_app(app_name)
+                if matches:
+                    self.logger.info(f"App matches for '{app_name}': {matches}")
+                    best = confident(matches)
+                    if not best:
+                        return f"❓ No app called '{app_name}'. Did you mean: {', '.join(name for _, name, _ in matches)}?"
+                    command = best[2]
             
             system = platform.system().lower()
             if system == "windows":
-                os.system(f'start {command}')
+                os.system(f'start "" "{command}"')
             else:
                 subprocess.Popen([command], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            if self.app_matcher is not None:
+                self.app_matcher.record_launch(command)
             
             return f"Opened {app_name}"
             
@@ -857,25 +1065,16 @@ class JarvisAI:
                 table.add_column("Size", style="green")
                 table.add_column("Modified", style="yellow")
                 
-                for file in files:
-                    try:
-                        stat = file.stat()
-                        size = f"{stat.st_size:,} bytes"
-                        modified = datetime.fromtimestamp(stat.st_mtime).strftime("%Y-%m-%d %H:%M")
-                        table.add_row(file.name, size, modified)
-                    except:
-                        table.add_row(file.name, "Unknown", "Unknown")
+                for file, size, mtime in files:
+                    modified = datetime.fromtimestamp(mtime).strftime("%Y-%m-%d %H:%M")
+                    table.add_row(file.name, f"{size:,} bytes", modified)
                 
                 console.print(table)
                 return ""
             else:
                 result = "📁 Files in workspace:\n"
-                for file in files:
-                    try:
-                        size = file.stat().st_size
-                        result += f"  📄 {file.name} ({size:,} bytes)\n"
-                    except:
-                        result += f"  📄 {file.name}\n"
+                for file, size, _ in files:
+                    result += f"  📄 {file.name} ({size:,} bytes)\n"
                 return result
         
         elif action == "find_file":
@@ -883,19 +1082,46 @@ class JarvisAI:
             if not query:
                 return "❌ Please specify what file to find."
             
-            if RICH_AVAILABLE:
-                with console.status(f"[bold yellow]Searching for '{query}'..."):
-                    results = self.file_manager.find_files(query)
-            else:
-                print(f"🔍 Searching for '{query}'...")
-                results = self.file_manager.find_files(query)
+            # Hits are shown as they are found; Ctrl+C stops the search and keeps what was found
+            results = []
+            search = self.file_manager.iter_files(query)
+            try:
+                if RICH_AVAILABLE:
+                    table = Table(title=f"🔍 Searching for '{query}'...")
+                    table.add_column("Name", style="cyan")
+                    table.add_column("Folder", style="green")
+                    with Live(table, console=console, refresh_per_second=20):
+                        for file_path in search:
+                            results.append(file_path)
+                            table.add_row(file_path.name, str(file_path.parent))
+                        table.title = f"🔍 Files matching '{query}'"
+                else:
+                    print(f"🔍 Searching for '{query}'...")
+                    for file_path in search:
+                        results.append(file_path)
+                        print(f"  📄 {file_path}", flush=True)
+            except KeyboardInterrupt:
+                return f"⏹️ Search stopped after {len(results)} file(s)."
+            finally:
+                search.close()
             
             if not results:
                 return f"❌ No files found matching '{query}'"
             
-            result = f"🔍 Found {len(results)} file(s) matching '{query}':\n"
-            for file_path in results:
-                result += f"  📄 {file_path}\n"
+            return f"🔍 Found {len(results)} file(s) matching '{query}'"
+        
+        elif action == "search_content":
+            query = params.get("query", "").strip()
+            if not query:
+                return "❌ Please specify what the document is about."
+            
+            results = self.file_manager.search_content(query)
+            if not results:
+                return f"❌ No documents found about '{query}'"
+            
+            result = f"🔍 Documents about '{query}' (best match first):\n"
+            for file_path, score in results:
+                result += f"  📄 {file_path.name} (score {score:.2f})\n"
             
             return result
         
@@ -967,8 +1193,10 @@ class JarvisAI:
         # Default conversation response
         if self.ai_generator.gemini_client:
             try:
-                response = self.ai_generator.gemini_client.generate_content(
-                    f"You are JARVIS, an AI assistant. Respond to: '{message}' in a helpful, professional manner."
+                response = self.ai_generator.gateway.gemini(
+                    self.ai_generator.gemini_client,
+                    f"You are JARVIS, an AI assistant. Respond to: '{message}' in a helpful, professional manner.",
+                    Config.GEMINI_MODEL,
                 )
                 return f"🤖 {response.text}"
             except:
@@ -991,6 +1219,7 @@ class JarvisAI:
 📁 FILE MANAGEMENT:
   • "list files" - Show workspace files
   • "find [filename]" - Search for files
+  • "find the document about [topic]" - Search inside workspace documents
   • "delete [filename]" - Delete a file
 
 🖥️ SYSTEM CONTROL:
@@ -1029,6 +1258,28 @@ Type any command naturally - I'll understand what you want to do!
         except Exception as e:
             return f"❌ Failed to delete file: {e}"
     
+    def run_batch(self, commands_file: Path):
+        """Replay a file of commands (one per line), analyzing them in batches"""
+        commands = [line.strip() for line in commands_file.read_text(encoding='utf-8').splitlines() if line.strip()]
+        analyses = self.command_analyzer.analyze_many(commands)
+        
+        for command, analysis in zip(commands, analyses):
+            result = self.execute_command(analysis)
+            if self.pending_confirmation:
+                # Destructive actions are never confirmed unattended
+                self.pending_confirmation = None
+                result = "❌ Skipped: confirmation required in batch mode."
+            success = not result.startswith("❌")
+            self.command_history.add_command(command, success, result)
+            
+            if RICH_AVAILABLE:
+                style = "bold green" if success else "bold red"
+                console.print(f"[cyan]💬 {command}[/cyan]")
+                console.print(f"[{style}]🤖 JARVIS:[/{style}] {result}")
+            else:
+                print(f"💬 {command}")
+                print(f"🤖 JARVIS: {result}")
+    
     def run(self):
         """Main application loop"""
         if RICH_AVAILABLE:
@@ -1182,7 +1433,10 @@ def main():
     try:
         # Initialize and run JARVIS
         jarvis = JarvisAI(api_key=api_key)
-        jarvis.run()
+        if len(sys.argv) > 1:
+            jarvis.run_batch(Path(sys.argv[1]))
+        else:
+            jarvis.run()
         
     except Exception as e:
         if RICH_AVAILABLE:
@@ -1,34 +1,161 @@
-import subprocess
 import json
+import os
+import sys
+import time
+
+# The scanner is shared with the modular assistant in ./ai
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "ai"))
+from app_catalog import build_catalog
+from app_scanner import default_roots, scan_roots
+from binary_app_cache import write_app_cache
 
 CACHE_FILE = "apps_cache.json"
+# Same records in the memory-mapped binary format that AppIndex reads
+BINARY_CACHE_FILE = "apps_cache.bin"
+# Per-root scan state used by the incremental refresh
+MANIFEST_FILE = "apps_manifest.json"
+# Added/removed apps listed per side in a refresh report
+REPORT_LIMIT = 20
+
+def update_apps_cache(binary_file=BINARY_CACHE_FILE):
+    """Full rescan of every root; rewrites both app caches and the manifest."""
+    print("⚡ Scanning installed apps...")
+    report = refresh_apps_cache(full=True, binary_file=binary_file)
+    if report is None:
+        return False
+    print_stages(report)
+    print(f"✅ Apps list updated and saved to {CACHE_FILE} ({report['apps']} apps in {report['seconds']:.2f}s).")
+    return True
+
+def write_json(path, data):
+    """Compact JSON, written to a temp file and swapped in so readers never see half a file."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
 
-def update_apps_cache():
+def read_json(path, default):
     try:
-        print("⚡ Updating apps list via apppath.ps1...")
-        ps_command = [
-            "powershell.exe",
-            "-ExecutionPolicy", "Bypass",
-            "-File", "apppath.ps1"
-        ]
-        result = subprocess.run(ps_command, capture_output=True, text=True, check=True)
-        output = result.stdout.strip()
-
-        if output and output.startswith("["):
-            apps = json.loads(output)
-            with open(CACHE_FILE, "w", encoding="utf-8") as f:
-                json.dump(apps, f, ensure_ascii=False, indent=2)
-            print(f"✅ Apps list updated and saved to {CACHE_FILE}.")
-            return True
+        with open(path, "r", encoding="utf-8-sig") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return default
+
+# --- Incremental refresh ---
+def root_signature(root, recursive):
+    """
+    Newest mtime and entry count under a root (the folder itself, its entries
+    and, for Start Menu and .desktop roots, every subfolder). None if the root is missing.
+    """
+    if not os.path.isdir(root):
+        return None
+    newest = os.stat(root).st_mtime
+    entries = 0
+    pending = [root]
+    while pending:
+        try:
+            with os.scandir(pending.pop()) as it:
+                for entry in it:
+                    entries += 1
+                    try:
+                        newest = max(newest, entry.stat(follow_symlinks=False).st_mtime)
+                        if recursive and entry.is_dir(follow_symlinks=False):
+                            pending.append(entry.path)
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+    return {"mtime": newest, "entries": entries}
+
+def _app_keys(apps):
+    return {(app.get("Name"), app.get("Path")) for app in apps}
+
+def refresh_apps_cache(full=False, binary_file=BINARY_CACHE_FILE):
+    """
+    Rescans only the roots whose mtime or entry count changed since the last
+    refresh (every root with full=True), runs the merged scan through the
+    app_catalog stages and writes the result to apps_cache.json and
+    binary_file (apps_cache.bin); the manifest keeps the raw per-root scans.
+    Nothing is written when no root changed and both caches exist.
+    Returns a report with the added and removed apps and the per-stage
+    counts, or None on failure.
+    """
+    start = time.perf_counter()
+    manifest = {} if full else read_json(MANIFEST_FILE, {})
+    roots = default_roots()
+    report = {"rescanned": [], "unchanged": 0, "added": [], "removed": []}
+    new_manifest = {}
+    changed = []
+
+    for root, kind in roots:
+        signature = root_signature(root, recursive=kind != "path")
+        previous = manifest.get(root)
+        if signature is None:
+            if previous:
+                report["rescanned"].append(root)
+                report["removed"] += previous["apps"]
+            continue
+        if previous and previous.get("mtime") == signature["mtime"] and previous.get("entries") == signature["entries"]:
+            new_manifest[root] = previous
+            report["unchanged"] += 1
         else:
-            print("⚠️ apppath.ps1 did not return valid JSON.")
-            return False
-    except subprocess.CalledProcessError as e:
-        print(f"⚠️ apppath.ps1 failed: {e}")
-        return False
+            changed.append((root, kind, signature))
+
+    # Changed roots are walked together on the scanner's thread pool
+    try:
+        scanned = scan_roots([(root, kind) for root, kind, _ in changed])
     except Exception as e:
-        print(f"⚠️ Error running apppath.ps1: {e}")
-        return False
+        print(f"⚠️ Error scanning apps: {e}")
+        return None
+    for root, kind, signature in changed:
+        apps, previous = scanned[root], manifest.get(root)
+        old_keys, new_keys = _app_keys(previous["apps"] if previous else []), _app_keys(apps)
+        report["rescanned"].append(root)
+        report["added"] += [app for app in apps if (app.get("Name"), app.get("Path")) not in old_keys]
+        if previous:
+            report["removed"] += [app for app in previous["apps"] if (app.get("Name"), app.get("Path")) not in new_keys]
+        new_manifest[root] = dict(signature, kind=kind, apps=apps)
+
+    # Roots that dropped out of PATH take their apps with them
+    current = {root for root, _ in roots}
+    for root, previous in manifest.items():
+        if root not in current:
+            report["rescanned"].append(root)
+            report["removed"] += previous["apps"]
+
+    report["stages"] = []
+    if report["rescanned"] or full or not os.path.exists(CACHE_FILE) or not os.path.exists(BINARY_CACHE_FILE):
+        scanned = [dict(app, Source=kind) for root, kind in roots if root in new_manifest
+                   for app in new_manifest[root]["apps"]]
+        apps, report["stages"] = build_catalog(scanned)
+        write_json(CACHE_FILE, apps)
+        write_app_cache(binary_file, apps)
+        write_json(MANIFEST_FILE, new_manifest)
+        report["apps"] = len(apps)
+    else:
+        report["apps"] = len(read_json(CACHE_FILE, []))
+    report["seconds"] = round(time.perf_counter() - start, 4)
+    return report
+
+def print_stages(report):
+    for stage in report["stages"]:
+        print(f"   {stage['stage']:<11} {stage['in']:>6} -> {stage['out']:<6} {stage['ms']:>8.2f} ms")
+
+def print_report(report):
+    if report is None:
+        print("⚠️ Incremental refresh failed; run 'python update_apps.py --full'.")
+        return
+    print(f"✅ Refreshed in {report['seconds'] * 1000:.1f} ms: {len(report['rescanned'])} roots rescanned, "
+          f"{report['unchanged']} unchanged.")
+    print_stages(report)
+    for sign, apps in (("+", report["added"]), ("-", report["removed"])):
+        for app in apps[:REPORT_LIMIT]:
+            print(f"   {sign} {app.get('Name')} ({app.get('Path')})")
+        if len(apps) > REPORT_LIMIT:
+            print(f"   {sign} ... and {len(apps) - REPORT_LIMIT} more")
 
 if __name__ == "__main__":
-    update_apps_cache()
+    if "--full" in sys.argv[1:]:
+        update_apps_cache()
+    else:
+        print_report(refresh_apps_cache())